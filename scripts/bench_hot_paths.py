@@ -0,0 +1,268 @@
+"""
+Microbenchmarks of the per-turn hot paths, checked against saved baselines.
+
+Each benchmark reports the best time per call over several repeats, and
+that time relative to a fixed pure-Python reference workload measured just
+before it. This is done in several independent runs and the median is kept.
+Comparisons use the relative figure, which cancels most of the drift of
+shared or frequency-scaled CPUs. With ``--save`` the results become the new
+baseline file; otherwise the run exits with status 1 when any benchmark is
+slower than its baseline by more than ``--threshold`` (25% by default). The
+threshold is wider for benchmarks of a few microseconds and for file I/O,
+whose run-to-run noise alone exceeds 25%.
+
+Usage:
+    PYTHONPATH=src python scripts/bench_hot_paths.py [--save] [--filter memory]
+"""
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+os.environ.setdefault("LLM_API_KEY", "benchmark")
+
+from agente_perfilamiento.adapters.file_long_term_repository import (  # noqa: E402
+    FileLongTermMemoryRepository,
+)
+from agente_perfilamiento.adapters.in_memory_repository import (  # noqa: E402
+    InMemoryMemoryRepository,
+)
+from agente_perfilamiento.agents.base_agent import extract_json_object  # noqa: E402
+from agente_perfilamiento.agents.entrevistador_node import (  # noqa: E402
+    EntrevistadorAgent,
+)
+from agente_perfilamiento.agents.welcome_node import WelcomeAgent  # noqa: E402
+from agente_perfilamiento.domain.models.conversation_state import (  # noqa: E402
+    apply_state_defaults,
+)
+from agente_perfilamiento.domain.models.memory import ShortTermMemoryItem  # noqa: E402
+from agente_perfilamiento.domain.services.memory_service import (  # noqa: E402
+    MemoryService,
+)
+from agente_perfilamiento.infrastructure.config.settings import settings  # noqa: E402
+
+BASELINE_PATH = Path(__file__).with_name("bench_baseline.json")
+AGENT = "entrevistador_agent"
+
+
+def _memory_service(prefill: int) -> MemoryService:
+    memory = MemoryService(
+        repository=InMemoryMemoryRepository(default_maxlen=300),
+        ttl_seconds=1800,
+        max_items_per_agent=300,
+        window_limit=12,
+    )
+    for i in range(prefill):
+        memory.append(AGENT, "s1", "user" if i % 2 else "assistant", f"mensaje {i}")
+    return memory
+
+
+def bench_append_and_get_window() -> Callable[[], object]:
+    memory = _memory_service(300)
+    return lambda: memory.append_and_get_window(AGENT, "s1", "user", "respuesta")
+
+
+def bench_get_window() -> Callable[[], object]:
+    memory = _memory_service(300)
+    return lambda: memory.get_window(AGENT, "s1")
+
+
+def bench_prune() -> Callable[[], object]:
+    repo = InMemoryMemoryRepository(default_maxlen=300)
+    for i in range(300):
+        repo.save(ShortTermMemoryItem(AGENT, "s1", "user", f"mensaje {i}"))
+
+    def run() -> None:
+        repo.save(ShortTermMemoryItem(AGENT, "s1", "user", "nuevo"))
+        repo.prune(AGENT, "s1", ttl_seconds=1800, max_items=300)
+
+    return run
+
+
+def bench_apply_state_defaults() -> Callable[[], object]:
+    state = {
+        "id_user": "u1",
+        "id_conversacion": "s1",
+        "conversation_history": [
+            {"role": "user", "content": f"r{i}"} for i in range(50)
+        ],
+        "user_profile": {"respuestas_test": [f"r{i}" for i in range(50)]},
+        "current_question_index": 12,
+    }
+    return lambda: apply_state_defaults(state)
+
+
+def bench_build_transcript() -> Callable[[], object]:
+    questions = [{"role": "assistant", "content": f"Pregunta {i}"} for i in range(30)]
+    answers = [{"role": "user", "content": f"Respuesta {i}"} for i in range(30)]
+    return lambda: EntrevistadorAgent._build_transcript(questions, answers)
+
+
+def bench_extract_json_object() -> Callable[[], object]:
+    body = json.dumps({"tags_acumulados_vector": {f"tag_{i}": i for i in range(20)}})
+    reply = f"Claro, aqui esta el perfil:\n{body}\nAvisame si necesitas algo mas."
+    return lambda: extract_json_object(reply)
+
+
+def _long_term_repository(
+    files: int, users: int
+) -> Tuple[FileLongTermMemoryRepository, str]:
+    base_dir = Path(tempfile.mkdtemp(prefix="bench-ltm-"))
+    atexit.register(shutil.rmtree, base_dir, True)
+    repo = FileLongTermMemoryRepository(base_dir)
+    fsync, settings.persist_fsync = settings.persist_fsync, "none"
+    try:
+        for n in range(files):
+            record = {"id_user": f"user{n % users}", "id_conversacion": f"s{n}"}
+            repo.save_summary({**record, "resumen": f"Resumen {n}"})
+    finally:
+        settings.persist_fsync = fsync
+    return repo, "user7"
+
+
+def bench_list_user_summaries_cold() -> Callable[[], object]:
+    repo, user_id = _long_term_repository(10_000, 1_000)
+
+    def run() -> None:
+        repo.clear_cache()
+        repo.list_user_summaries(user_id)
+
+    return run
+
+
+def bench_list_user_summaries_cached() -> Callable[[], object]:
+    repo, user_id = _long_term_repository(10_000, 1_000)
+    return lambda: repo.list_user_summaries(user_id)
+
+
+def bench_create_chat_prompt() -> Callable[[], object]:
+    agent = WelcomeAgent()
+    memory = [("system", "Memoria reciente:\n{memory_block}")]
+    return lambda: agent.create_chat_prompt(memory, with_scratchpad=True)
+
+
+BENCHMARKS: Dict[str, Callable[[], Callable[[], object]]] = {
+    "memory.append_and_get_window": bench_append_and_get_window,
+    "memory.get_window": bench_get_window,
+    "in_memory_repository.prune": bench_prune,
+    "state.apply_state_defaults": bench_apply_state_defaults,
+    "entrevistador.build_transcript": bench_build_transcript,
+    "base_agent.extract_json_object": bench_extract_json_object,
+    "long_term.list_user_summaries[10k,cold]": bench_list_user_summaries_cold,
+    "long_term.list_user_summaries[10k,cached]": bench_list_user_summaries_cached,
+    "base_agent.create_chat_prompt": bench_create_chat_prompt,
+}
+
+# Threshold multipliers for benchmarks dominated by file I/O, which the
+# CPU reference does not normalise
+TOLERANCE = {"long_term.list_user_summaries[10k,cold]": 3.0}
+# Benchmarks whose baseline is under MICRO_SCALE_US microseconds per call swing
+# by 20-40% between identical runs; their threshold is widened by this factor
+MICRO_SCALE_US = 10.0
+MICRO_TOLERANCE = 2.0
+
+
+def tolerance(name: str, baseline_us: float) -> float:
+    """Multiplier of ``--threshold`` for one benchmark."""
+    if name in TOLERANCE:
+        return TOLERANCE[name]
+    return MICRO_TOLERANCE if baseline_us < MICRO_SCALE_US else 1.0
+
+
+def _reference() -> int:
+    table = {i: str(i) for i in range(64)}
+    return sum(len(table[i % 64]) for i in range(256))
+
+
+def measure(
+    func: Callable[[], object], repeat: int, runs: int = 1
+) -> Tuple[float, float]:
+    """
+    Median over ``runs`` of the best microseconds per call (out of ``repeat``)
+    and of the same time in reference units.
+    """
+    timer, reference_timer = timeit.Timer(func), timeit.Timer(_reference)
+    number, _ = timer.autorange()
+    reference_number, _ = reference_timer.autorange()
+    micros: List[float] = []
+    relatives: List[float] = []
+    for _ in range(runs):
+        best = reference = float("inf")
+        # Interleaved so both see the same machine conditions
+        for _ in range(repeat):
+            reference_time = reference_timer.timeit(reference_number)
+            reference = min(reference, reference_time / reference_number)
+            best = min(best, timer.timeit(number) / number)
+        micros.append(best * 1e6)
+        relatives.append(best / reference)
+    return statistics.median(micros), statistics.median(relatives)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--save", action="store_true", help="write results as the baseline"
+    )
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--runs", type=int, default=5, help="independent runs; the median is kept"
+    )
+    parser.add_argument("--filter", default="", help="only names containing this text")
+    args = parser.parse_args()
+
+    baseline: Dict[str, Dict[str, float]] = {}
+    if args.baseline.exists():
+        saved = json.loads(args.baseline.read_text(encoding="utf-8"))
+        baseline = saved.get("results", {})
+
+    results: Dict[str, Dict[str, float]] = {}
+    regressions: List[str] = []
+    header = ("benchmark", "us/call", "relative", "baseline", "change")
+    print("{:<44}{:>10}{:>10}{:>10}{:>9}".format(*header))
+    for name, setup in BENCHMARKS.items():
+        if args.filter not in name:
+            continue
+        micros, relative = measure(setup(), args.repeat, args.runs)
+        results[name] = {"us": round(micros, 3), "relative": round(relative, 3)}
+        entry = baseline.get(name, {})
+        base = entry.get("relative")
+        change = f"{relative / base - 1:+.0%}" if base else "new"
+        print(
+            f"{name:<44}{micros:>10.2f}{relative:>10.3f}{base or 0:>10.3f}{change:>9}"
+        )
+        allowed = 1 + args.threshold * tolerance(name, entry.get("us", micros))
+        if base and relative > base * allowed:
+            regressions.append(name)
+
+    if args.save:
+        payload = {
+            "machine": f"{platform.machine()} {platform.python_implementation()} "
+            f"{platform.python_version()}",
+            "results": {**baseline, **results},
+        }
+        args.baseline.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if regressions:
+        print(
+            f"REGRESSION (> {args.threshold:.0%} slower than baseline, widened "
+            "for micro and I/O benchmarks): " + ", ".join(regressions),
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
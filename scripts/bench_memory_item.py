@@ -0,0 +1,113 @@
+"""
+Benchmark the short-term memory item representation.
+
+Compares the previous dataclass item (``__dict__``, ``datetime`` timestamp,
+public dict rebuilt on every read) with the slotted ``ShortTermMemoryItem``:
+bytes held per item and window reads per second.
+
+Usage:
+    PYTHONPATH=src python scripts/bench_memory_item.py [--items 50000]
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+os.environ.setdefault("LLM_API_KEY", "benchmark")
+
+from agente_perfilamiento.adapters.in_memory_repository import (  # noqa: E402
+    InMemoryMemoryRepository,
+)
+from agente_perfilamiento.domain.models.memory import ShortTermMemoryItem  # noqa: E402
+from agente_perfilamiento.domain.services.memory_service import (  # noqa: E402
+    MemoryService,
+)
+
+
+@dataclass
+class LegacyMemoryItem:
+    agent_name: str
+    session_id: str
+    role: str
+    content: str
+    metadata: Optional[Dict[str, Any]] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+
+def legacy_public_dict(item: LegacyMemoryItem) -> Dict[str, Any]:
+    return {
+        "role": item.role,
+        "content": item.content,
+        "created_at": item.created_at.isoformat(),
+        "agent_name": item.agent_name,
+    }
+
+
+def fresh(text: str) -> str:
+    """A new string object equal to ``text`` (as parsed from a request)."""
+    return (text + ".")[:-1]
+
+
+def bytes_per_item(factory, count: int) -> float:
+    session = str(uuid.uuid4())
+    content = "respuesta de ejemplo " * 4
+    tracemalloc.start()
+    start = tracemalloc.take_snapshot()
+    items: List[Any] = [
+        factory(fresh("entrevistador_agent"), fresh(session), fresh("user"), content)
+        for _ in range(count)
+    ]
+    end = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in end.compare_to(start, "filename"))
+    del items
+    return allocated / count
+
+
+def legacy_reads_per_second(window: int, limit: int, reads: int) -> float:
+    dq = deque(
+        LegacyMemoryItem("entrevistador_agent", "s1", "user", f"mensaje {i}")
+        for i in range(window)
+    )
+    started = time.perf_counter()
+    for _ in range(reads):
+        [legacy_public_dict(item) for item in list(dq)[-limit:]]
+    return reads / (time.perf_counter() - started)
+
+
+def reads_per_second(window: int, limit: int, reads: int) -> float:
+    memory = MemoryService(repository=InMemoryMemoryRepository(default_maxlen=window))
+    for i in range(window):
+        memory.append("entrevistador_agent", "s1", "user", f"mensaje {i}")
+    started = time.perf_counter()
+    for _ in range(reads):
+        memory.get_window("entrevistador_agent", "s1", limit=limit)
+    return reads / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=50_000)
+    parser.add_argument("--window", type=int, default=300)
+    parser.add_argument("--limit", type=int, default=12)
+    parser.add_argument("--reads", type=int, default=50_000)
+    args = parser.parse_args()
+
+    print(f"{'':<12}{'bytes/item':>12}{'window reads/s':>18}")
+    for name, factory, reads in (
+        ("dataclass", LegacyMemoryItem, legacy_reads_per_second),
+        ("slotted", ShortTermMemoryItem, reads_per_second),
+    ):
+        size = bytes_per_item(factory, args.items)
+        rate = reads(args.window, args.limit, args.reads)
+        print(f"{name:<12}{size:>12.0f}{rate:>18,.0f}")
+
+
+if __name__ == "__main__":
+    main()
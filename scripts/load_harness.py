@@ -0,0 +1,297 @@
+"""
+Load test: many concurrent interviews against ``process_conversation``.
+
+Each simulated user runs the full welcome -> entrevistador -> analista ->
+final -> memory flow on its own conversation, from a thread pool. LLM calls
+are replaced by canned replies (as in ``test_conversation_flow.py``) after a
+delay drawn from ``--latency``:
+
+    fixed:MS | uniform:MIN_MS,MAX_MS | lognormal:MEDIAN_MS,SIGMA | exp:MEAN_MS
+
+Reports throughput, p50/p95/p99 of whole turns and of every graph node, and
+process memory (RSS plus short-term memory items) sampled over the run.
+Summaries and profiles are written to a temporary data directory.
+
+Usage:
+    PYTHONPATH=src python scripts/load_harness.py --users 50 --latency lognormal:400,0.5
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import math
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+os.environ.setdefault("LLM_API_KEY", "load-test")
+
+from agente_perfilamiento.agents.base_agent import BaseAgent  # noqa: E402
+from agente_perfilamiento.application import orchestrator  # noqa: E402
+from agente_perfilamiento.infrastructure.config.settings import settings  # noqa: E402
+from agente_perfilamiento.infrastructure.logging.logger import (  # noqa: E402
+    configure_logging,
+)
+from agente_perfilamiento.infrastructure.persistence.provider import (  # noqa: E402
+    create_memory_service,
+    set_memory_service,
+)
+from agente_perfilamiento.infrastructure.persistence.write_behind import (  # noqa: E402
+    get_write_behind_writer,
+)
+from agente_perfilamiento.main import process_conversation  # noqa: E402
+
+TURNS = [
+    "hola",
+    "Me gusta programar y aprender cosas nuevas.",
+    "Disfruto cuando trabajamos en grupo para lograr algo grande.",
+    "Definitivamente crear algo nuevo me entusiasma.",
+    "terminar",
+    "ok",
+    "gracias",
+]
+
+REPLIES = {
+    "welcome_agent": "Bienvenido, empecemos la entrevista.",
+    "analista_agent": "Resumen generado. Recomendaciones: Ingenieria de Software.",
+    "final_agent": "Gracias por compartir. Aqui tienes los proximos pasos.",
+    "memory_agent": "Memoria consolidada y guardada.",
+}
+
+NODES = (
+    "router",
+    "welcome",
+    "entrevistador",
+    "analista",
+    "final",
+    "memory",
+    "fallback",
+)
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Sampler of fake LLM delays in seconds for a ``kind:params`` spec."""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",")] if params else []
+    if kind == "fixed":
+        return lambda: values[0] / 1000
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda: random.lognormvariate(math.log(median), sigma) / 1000
+    if kind == "exp":
+        return lambda: random.expovariate(1 / values[0]) / 1000
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def rss_mb() -> float:
+    """Resident set size of this process in MiB."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Recorder:
+    """Thread-safe latency samples keyed by name."""
+
+    def __init__(self) -> None:
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.samples[name].append(seconds)
+
+
+def install_fake_llm(sample_latency: Callable[[], float]) -> None:
+    """Replace every agent LLM call with a delayed canned reply."""
+
+    def reply(agent: BaseAgent, state: Dict[str, Any]) -> str:
+        time.sleep(sample_latency())
+        if agent.agent_name == "entrevistador_agent":
+            return f"Pregunta {int(state.get('current_question_index') or 0)}"
+        return REPLIES.get(agent.agent_name, "Mensaje auxiliar.")
+
+    def fake_json(agent: BaseAgent, state: Dict[str, Any], **kwargs: Any) -> Dict:
+        time.sleep(sample_latency())
+        return {"tags_acumulados_vector": {"pensamiento_logico": 1}}
+
+    BaseAgent.execute_agent = lambda self, state, **kwargs: reply(self, state)
+    BaseAgent.execute_json = fake_json
+
+
+def instrument_nodes(recorder: Recorder) -> None:
+    """Time every node through its agent's ``process``."""
+    for node in NODES:
+        module = importlib.import_module(f"agente_perfilamiento.agents.{node}_node")
+        agent = getattr(module, f"{node}_agent")
+        original = agent.process
+
+        def timed(state: Dict[str, Any], _original=original, _node=node) -> Any:
+            started = time.perf_counter()
+            try:
+                return _original(state)
+            finally:
+                recorder.add(_node, time.perf_counter() - started)
+
+        agent.process = timed
+
+
+def run_user(user: int, recorder: Recorder) -> int:
+    state: Optional[Dict[str, Any]] = None
+    conversation_id = f"load-{user}"
+    for text in TURNS:
+        started = time.perf_counter()
+        state = process_conversation(
+            user_id=f"load-user-{user}",
+            user_input=text,
+            conversation_id=conversation_id,
+            existing_state=state if orchestrator.app.checkpointer is None else None,
+        )
+        recorder.add("turn", time.perf_counter() - started)
+    return int(bool(state and state.get("evaluation_complete")))
+
+
+class MemorySampler:
+    """Background sampling of RSS and short-term memory size."""
+
+    def __init__(self, memory: Any, interval: float) -> None:
+        self.memory = memory
+        self.interval = interval
+        self.series: List[Dict[str, float]] = []
+        self._stop = threading.Event()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="load-sampler", daemon=True
+        )
+
+    def _run(self) -> None:
+        while True:
+            repo = self.memory._repo
+            stats = repo.stats() if hasattr(repo, "stats") else {}
+            self.series.append(
+                {
+                    "t": round(time.perf_counter() - self._started, 2),
+                    "rss_mb": round(rss_mb(), 1),
+                    "memory_items": stats.get("items", 0),
+                    "memory_sessions": stats.get("sessions", 0),
+                }
+            )
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument(
+        "--concurrency", type=int, default=None, help="defaults to --users"
+    )
+    parser.add_argument("--latency", default="lognormal:200,0.5")
+    parser.add_argument("--sample-interval", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--json", dest="json_path", default=None, help="write the report here"
+    )
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    # Module loggers carry their own handlers; per-turn INFO lines would
+    # dominate the measurement
+    configure_logging("ERROR")
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("agente_perfilamiento"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+    data_dir = tempfile.mkdtemp(prefix="load-test-")
+    settings.interviews_dir = os.path.join(data_dir, "interviews")
+    settings.memory_dir = os.path.join(data_dir, "memory")
+
+    memory = create_memory_service()
+    set_memory_service(memory)
+    recorder = Recorder()
+    install_fake_llm(parse_latency(args.latency))
+    instrument_nodes(recorder)
+
+    sampler = MemorySampler(memory, args.sample_interval)
+    started = time.perf_counter()
+    sampler.start()
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency or args.users) as pool:
+            completed = sum(
+                pool.map(lambda u: run_user(u, recorder), range(args.users))
+            )
+        elapsed = time.perf_counter() - started
+        get_write_behind_writer().flush(timeout=30)
+    finally:
+        sampler.stop()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    turns = len(recorder.samples["turn"])
+    report = {
+        "users": args.users,
+        "completed_flows": completed,
+        "turns": turns,
+        "seconds": round(elapsed, 2),
+        "turns_per_second": round(turns / elapsed, 1),
+        "latency_ms": {
+            name: {
+                "count": len(samples),
+                "mean": round(statistics.fmean(samples) * 1000, 1),
+                "p50": round(percentile(samples, 50) * 1000, 1),
+                "p95": round(percentile(samples, 95) * 1000, 1),
+                "p99": round(percentile(samples, 99) * 1000, 1),
+            }
+            for name, samples in sorted(recorder.samples.items())
+        },
+        "memory": sampler.series,
+    }
+
+    print(
+        f"{args.users} users, {completed} complete flows, {turns} turns in "
+        f"{report['seconds']}s ({report['turns_per_second']} turns/s)"
+    )
+    print(f"{'':<16}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, row in report["latency_ms"].items():
+        quantiles = "".join(f"{row[q]:>10}" for q in ("p50", "p95", "p99"))
+        print(f"{name:<16}{row['count']:>7}{quantiles}")
+    first, last = sampler.series[0], sampler.series[-1]
+    print(
+        f"rss {first['rss_mb']} -> {last['rss_mb']} MiB, short-term items "
+        f"{first['memory_items']} -> {last['memory_items']} "
+        f"over {len(sampler.series)} samples"
+    )
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
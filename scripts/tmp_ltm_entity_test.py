@@ -1,12 +1,14 @@
+import os
 import sys
 sys.path.append('src')
+os.environ.setdefault('LLM_API_KEY', 'local-test')
 
 from datetime import datetime
 
-from agente_perfilamiento.application.services.long_term_memory_service import LongTermMemoryService
-from agente_perfilamiento.infrastructure.memory.file_long_term_repository import FileLongTermMemoryRepository
-from agente_perfilamiento.application.services.entity_memory_service import EntityMemoryService
-from agente_perfilamiento.infrastructure.memory.file_entity_repository import FileEntityMemoryRepository
+from agente_perfilamiento.domain.services.long_term_memory_service import LongTermMemoryService
+from agente_perfilamiento.adapters.file_long_term_repository import FileLongTermMemoryRepository
+from agente_perfilamiento.domain.services.entity_memory_service import EntityMemoryService
+from agente_perfilamiento.adapters.file_entity_repository import FileEntityMemoryRepository
 
 
 def main():
@@ -27,6 +29,7 @@ def main():
     print('Entity get 1:', ems.get('u1'))
     ems.upsert('u1', {'hoja_ruta': ['Paso 1', 'Paso 2']})
     print('Entity get 2:', ems.get('u1'))
+    ems.flush()
 
 
 if __name__ == '__main__':
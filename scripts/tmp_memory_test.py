@@ -1,9 +1,11 @@
+import os
 import sys
 
 sys.path.append('src')
+os.environ.setdefault('LLM_API_KEY', 'local-test')
 
-from agente_perfilamiento.application.services.memory_service import MemoryService
-from agente_perfilamiento.infrastructure.memory.in_memory_repository import (
+from agente_perfilamiento.domain.services.memory_service import MemoryService
+from agente_perfilamiento.adapters.in_memory_repository import (
     InMemoryMemoryRepository,
 )
 
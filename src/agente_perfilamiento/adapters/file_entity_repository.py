@@ -1,44 +1,202 @@
 """
 File-based entity memory repository storing per-user JSON profiles.
+
+Profiles are cached in memory and changed under a per-user lock, so
+concurrent turns of one user in this process cannot lose each other's
+updates. The cache is write-back: changes stay dirty until ``flush()`` (once
+per turn), which hands each changed profile to the write-behind writer as a
+single atomic temp+rename write.
+
+Other processes may write the same files. A clean cached profile is served
+only while its file's mtime and size match the ones seen when it was read;
+otherwise it is read again. At ``flush()``, a dirty profile whose file
+changed since it was read is rebuilt by replaying the turn's changes on the
+current file, so updates of another worker are merged instead of
+overwritten. Only recently used clean profiles, and the locks of cached
+users, are kept.
 """
 
+import copy
 import json
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
 
 from agente_perfilamiento.ports.entity_memory_repository import (
     EntityMemoryRepository,
 )
 from agente_perfilamiento.infrastructure.config.settings import settings
+from agente_perfilamiento.infrastructure.persistence.write_behind import (
+    get_write_behind_writer,
+)
+
+# (mtime_ns, size) of a profile file, or None when it does not exist
+FileVersion = Optional[Tuple[int, int]]
+Change = Callable[[Dict], Dict]
+
+
+def _file_version(path: Path) -> FileVersion:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
 
 
 class FileEntityMemoryRepository(EntityMemoryRepository):
-    def __init__(self, base_dir: Path | None = None) -> None:
-        self.base_dir = Path(base_dir) if base_dir else Path(settings.memory_dir) / "entities"
+    def __init__(self, base_dir: Path | None = None, max_cached: int = 1024) -> None:
+        self.base_dir = (
+            Path(base_dir) if base_dir else Path(settings.memory_dir) / "entities"
+        )
         self.base_dir.mkdir(parents=True, exist_ok=True)
+        self._writer = get_write_behind_writer()
+        self._max_cached = max_cached
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        # File version each cached profile was read from
+        self._versions: Dict[str, FileVersion] = {}
+        self._dirty: Set[str] = set()
+        # Changes applied since the last flush, replayed if the file moved on
+        self._changes: Dict[str, List[Change]] = {}
+        # user_id -> [lock, number of threads using it]
+        self._user_locks: Dict[str, list] = {}
+        self._lock = threading.Lock()
 
     def _path(self, user_id: str) -> Path:
         return self.base_dir / f"{user_id}.json"
 
-    def get(self, user_id: str) -> Dict:
+    @contextmanager
+    def _user_lock(self, user_id: str) -> Iterator[None]:
+        with self._lock:
+            entry = self._user_locks.setdefault(user_id, [threading.RLock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1] and user_id not in self._cache:
+                    del self._user_locks[user_id]
+
+    def _read(self, user_id: str) -> Tuple[Dict, FileVersion]:
         path = self._path(user_id)
-        if not path.exists():
-            return {}
+        # Queued writes are newer than the file on disk
+        pending, attributes = self._writer.read_json(path)
+        if pending:
+            return attributes or {}, None
+        version = _file_version(path)
+        if version is None:
+            return {}, None
         try:
             with path.open("r", encoding="utf-8") as f:
-                return json.load(f)
+                return json.load(f), version
         except Exception:
-            return {}
+            return {}, version
+
+    def _is_current(self, user_id: str) -> bool:
+        """Whether the cached profile still reflects the file on disk."""
+        path = self._path(user_id)
+        if user_id in self._dirty or self._writer.has_pending(path):
+            return True
+        return _file_version(path) == self._versions.get(user_id)
+
+    def _load(self, user_id: str) -> Dict:
+        with self._lock:
+            cached = self._cache.get(user_id)
+        if cached is not None and self._is_current(user_id):
+            with self._lock:
+                self._cache.move_to_end(user_id)
+            return cached
+        attributes, version = self._read(user_id)
+        with self._lock:
+            self._versions[user_id] = version
+        self._store(user_id, attributes, dirty=False)
+        return attributes
+
+    def _store(self, user_id: str, attributes: Dict, dirty: bool) -> None:
+        with self._lock:
+            self._cache[user_id] = attributes
+            self._cache.move_to_end(user_id)
+            if dirty:
+                self._dirty.add(user_id)
+            if len(self._cache) > self._max_cached:
+                for key in [k for k in self._cache if k not in self._dirty]:
+                    if len(self._cache) <= self._max_cached:
+                        break
+                    self._evict(key)
+
+    def _evict(self, user_id: str) -> None:
+        # Called with self._lock held
+        del self._cache[user_id]
+        self._versions.pop(user_id, None)
+        entry = self._user_locks.get(user_id)
+        if entry is not None and not entry[1]:
+            del self._user_locks[user_id]
+
+    def _change(self, user_id: str, change: Change) -> None:
+        with self._user_lock(user_id):
+            current = copy.deepcopy(self._load(user_id))
+            self._store(user_id, change(current), dirty=True)
+            with self._lock:
+                self._changes.setdefault(user_id, []).append(change)
+                too_many_dirty = len(self._dirty) >= self._max_cached
+        # Outside the user lock: flush takes the lock of every dirty user
+        if too_many_dirty:
+            self.flush()
+
+    def get(self, user_id: str) -> Dict:
+        with self._user_lock(user_id):
+            return copy.deepcopy(self._load(user_id))
 
     def upsert(self, user_id: str, attributes: Dict) -> None:
+        replacement = copy.deepcopy(attributes or {})
+        self._change(user_id, lambda _: copy.deepcopy(replacement))
+
+    def update(self, user_id: str, change: Callable[[Dict], Dict]) -> None:
+        """
+        Replace a user's attributes with ``change(current)``.
+
+        ``change`` may run again at flush time on a newer copy of the
+        profile, so it must not have side effects.
+        """
+        self._change(user_id, change)
+
+    def flush(self) -> None:
+        """Queue one write per profile changed since the last flush."""
+        with self._lock:
+            dirty = list(self._dirty)
+        for user_id in dirty:
+            with self._user_lock(user_id):
+                self._flush_user(user_id)
+
+    def _flush_user(self, user_id: str) -> None:
         path = self._path(user_id)
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(attributes or {}, f, ensure_ascii=False, indent=2)
+        with self._lock:
+            if user_id not in self._dirty:
+                return
+            self._dirty.discard(user_id)
+            changes = self._changes.pop(user_id, [])
+            attributes = self._cache[user_id]
+            base_version = self._versions.get(user_id)
+        if not self._writer.has_pending(path):
+            version = _file_version(path)
+            if version != base_version:
+                # Another process wrote the profile since it was read
+                attributes, version = self._read(user_id)
+                for change in changes:
+                    attributes = change(attributes)
+                with self._lock:
+                    self._cache[user_id] = attributes
+                    self._versions[user_id] = version
+        self._writer.write_json(path, attributes)
 
     def clear(self, user_id: str) -> None:
-        path = self._path(user_id)
-        if path.exists():
-            try:
-                path.unlink()
-            except Exception:
-                pass
+        with self._user_lock(user_id):
+            with self._lock:
+                self._dirty.discard(user_id)
+                self._changes.pop(user_id, None)
+                self._cache[user_id] = {}
+                self._versions[user_id] = None
+            self._writer.delete(self._path(user_id))
@@ -1,55 +1,203 @@
 """
 File-based implementation of long-term memory repository (summaries),
 compatible with the external repo pattern.
+
+Summaries are sharded per user: ``users/<user>/summaries.jsonl`` holds one
+record per line and ``users/<user>/manifest.jsonl`` is an append-only index
+of (session, date, offset, length) into it. Saving a session again appends
+a new record that supersedes the previous one: readers keep only the latest
+record per session. Looking up a user touches only that user's directory,
+and the parsed summaries are cached until the data file's mtime or size
+changes. Flat ``<user>_<date><session>.json`` files from the previous layout
+are migrated once on first use.
 """
 
+import fcntl
 import json
+import os
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
 
 from agente_perfilamiento.ports.long_term_memory_repository import (
     LongTermMemoryRepository,
 )
 from agente_perfilamiento.infrastructure.config.settings import settings
+from agente_perfilamiento.infrastructure.logging.logger import get_logger
+from agente_perfilamiento.infrastructure.persistence.write_behind import FSYNC_NONE
+
+logger = get_logger(__name__)
+
+USERS_DIR = "users"
+DATA_FILE = "summaries.jsonl"
+MANIFEST_FILE = "manifest.jsonl"
+MIGRATION_MARKER = ".layout_v2"
+
+# Parsed summaries per data file, valid while (mtime_ns, size) is unchanged
+_cache: Dict[Path, Tuple[Tuple[int, int], List[Dict], str]] = {}
+_cache_lock = threading.Lock()
+_user_locks: Dict[Path, threading.Lock] = {}
+
+
+def _user_lock(directory: Path) -> threading.Lock:
+    with _cache_lock:
+        return _user_locks.setdefault(directory, threading.Lock())
+
+
+def _latest_per_session(items: List[Dict], key: str) -> List[Dict]:
+    """Keep the last item per session, ordered by when it was last saved."""
+    latest: Dict[object, Dict] = {}
+    for index, item in enumerate(items):
+        # Items without a session id never supersede each other
+        session = item.get(key) or (None, index)
+        latest.pop(session, None)
+        latest[session] = item
+    return list(latest.values())
 
 
 class FileLongTermMemoryRepository(LongTermMemoryRepository):
     def __init__(self, base_dir: Path | None = None) -> None:
         self.base_dir = Path(base_dir) if base_dir else Path(settings.memory_dir)
-        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.users_dir = self.base_dir / USERS_DIR
+        self.users_dir.mkdir(parents=True, exist_ok=True)
+        if not (self.users_dir / MIGRATION_MARKER).exists():
+            self._migrate_flat_files()
 
-    def _user_files(self, user_id: str) -> List[Path]:
-        pattern = f"{user_id}_*.json"
-        return sorted(self.base_dir.glob(pattern))
+    def _user_dir(self, user_id: str) -> Path:
+        # Quoting keeps any user id a single, unambiguous directory name
+        return self.users_dir / quote(str(user_id), safe="")
 
     def save_summary(self, record: Dict) -> str:
         user_id = str(record.get("id_user", "unknown"))
-        session_id = str(record.get("id_conversacion", ""))
-        fecha_inicio = str(record.get("fecha_inicio", ""))
-        timestamp = datetime.now().strftime("%Y%m%d")
+        return self._append(user_id, record, datetime.now().strftime("%Y%m%d"))
 
-        # Filename format similar to external repo: user_YYYYMMDD<session>.json
-        filename = f"{user_id}_{timestamp}{session_id}.json"
-        path = self.base_dir / filename
-        with path.open("w", encoding="utf-8") as f:
-            json.dump(record, f, ensure_ascii=False, indent=2)
-        return str(path)
+    def _append(self, user_id: str, record: Dict, date: str) -> str:
+        directory = self._user_dir(user_id)
+        directory.mkdir(exist_ok=True)
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        data_path = directory / DATA_FILE
 
-    def list_user_summaries(self, user_id: str) -> List[Dict]:
-        result: List[Dict] = []
-        for p in self._user_files(user_id):
+        with _user_lock(directory):
+            fd = os.open(data_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
             try:
-                with p.open("r", encoding="utf-8") as f:
-                    result.append(json.load(f))
-            except Exception:
-                continue
-        return result
+                # Other processes append to the same shard
+                fcntl.lockf(fd, fcntl.LOCK_EX)
+                offset = os.fstat(fd).st_size
+                os.write(fd, line)
+                entry = {
+                    "session": str(record.get("id_conversacion", "")),
+                    "fecha_inicio": str(record.get("fecha_inicio", "")),
+                    "date": date,
+                    "offset": offset,
+                    "length": len(line),
+                }
+                manifest_path = directory / MANIFEST_FILE
+                with manifest_path.open("a", encoding="utf-8") as manifest:
+                    manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                    if settings.persist_fsync != FSYNC_NONE:
+                        manifest.flush()
+                        os.fsync(manifest.fileno())
+                if settings.persist_fsync != FSYNC_NONE:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+        return f"{data_path}#{offset}"
+
+    def read_manifest(self, user_id: str) -> List[Dict]:
+        """Latest index entry (session, date, offset, length) per session."""
+        path = self._user_dir(user_id) / MANIFEST_FILE
+        entries: List[Dict] = []
+        try:
+            with path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # A torn trailing line from a crash mid-append
+                        continue
+        except FileNotFoundError:
+            return []
+        return _latest_per_session(entries, "session")
+
+    def get_summary(self, user_id: str, session_id: str) -> Optional[Dict]:
+        """Read one session's latest summary by seeking to its manifest offset."""
+        entries = [
+            e for e in self.read_manifest(user_id) if e.get("session") == session_id
+        ]
+        if not entries:
+            return None
+        entry = entries[-1]
+        with (self._user_dir(user_id) / DATA_FILE).open("rb") as f:
+            f.seek(entry["offset"])
+            return json.loads(f.read(entry["length"]))
+
+    def _load(self, user_id: str) -> Tuple[List[Dict], str]:
+        path = self._user_dir(user_id) / DATA_FILE
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return [], ""
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2]
+
+        records: List[Dict] = []
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # A torn trailing line from a crash mid-append
+                    continue
+        records = _latest_per_session(records, "id_conversacion")
+        blocks = [r.get("resumen") or r.get("summary") or "" for r in records]
+        text = "\n\n---\n\n".join(block for block in blocks if block)
+        with _cache_lock:
+            _cache[path] = (version, records, text)
+        return records, text
+
+    def clear_cache(self) -> None:
+        """Drop the parsed summaries cached for this repository's users."""
+        with _cache_lock:
+            for path in [p for p in _cache if p.parent.parent == self.users_dir]:
+                del _cache[path]
+
+    def list_user_summaries(self, user_id: str) -> List[Dict]:
+        return list(self._load(user_id)[0])
 
     def read_user_summaries_text(self, user_id: str) -> str:
-        blocks: List[str] = []
-        for rec in self.list_user_summaries(user_id):
-            resumen = rec.get("resumen") or rec.get("summary") or ""
-            if resumen:
-                blocks.append(resumen)
-        return "\n\n---\n\n".join(blocks)
+        return self._load(user_id)[1]
+
+    def _migrate_flat_files(self) -> None:
+        """Move ``<user>_<date><session>.json`` files into per-user shards."""
+        flat_files = sorted(self.base_dir.glob("*_*.json"))
+        migrated = self.base_dir / "migrated"
+        for path in flat_files:
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    record = json.load(f)
+                user_id = str(record["id_user"])
+            except FileNotFoundError:
+                # Already migrated by another worker
+                continue
+            except Exception as e:
+                logger.warning(f"Skipping unreadable summary {path.name}: {e}")
+                continue
+            date = path.stem[len(user_id) + 1 :][:8]
+            self._append(user_id, record, date)
+            migrated.mkdir(exist_ok=True)
+            try:
+                path.replace(migrated / path.name)
+            except FileNotFoundError:
+                # Another worker moved it first; its copy collapses with ours
+                pass
+        (self.users_dir / MIGRATION_MARKER).touch()
+        if flat_files:
+            logger.info(
+                f"Migrated {len(flat_files)} long-term summaries to per-user shards"
+            )
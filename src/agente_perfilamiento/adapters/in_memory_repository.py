@@ -1,36 +1,251 @@
 """
 In-memory implementation of MemoryRepository.
+
+Each session keeps a single ordered log of memory items; per-agent windows
+are deques of references into that log, so an item is stored once no
+matter how many views include it. A background sweeper drops sessions that
+have been idle longer than the TTL, so abandoned conversations do not wait
+for a write that will never come.
+
+Optional global item and byte budgets bound the whole store: when either is
+exceeded, the least recently touched sessions are evicted first and, if a
+spill directory is configured, written to disk and reloaded on next access.
 """
 
-from collections import defaultdict, deque
-from datetime import datetime, timedelta
-from typing import Deque, Dict, List, Optional, Tuple
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional
 
 from agente_perfilamiento.ports.memory_repository import MemoryRepository
 from agente_perfilamiento.domain.models.memory import ShortTermMemoryItem
+from agente_perfilamiento.infrastructure.logging.logger import get_logger
+from agente_perfilamiento.infrastructure.persistence.write_behind import (
+    get_write_behind_writer,
+)
 
-Key = Tuple[str, str]  # (session_id, agent_name)
+logger = get_logger(__name__)
 
+# Approximate fixed cost of one stored item: the slotted item, its float
+# timestamp and its log and view deque slots (content is measured separately)
+ITEM_OVERHEAD_BYTES = 120
 
-class InMemoryMemoryRepository(MemoryRepository):
-    def __init__(self, default_maxlen: int = 500) -> None:
-        self._store: Dict[Key, Deque[ShortTermMemoryItem]] = defaultdict(
-            lambda: deque(maxlen=default_maxlen)
+# (session_id, evicted items) -> None, called after a session is evicted
+EvictionListener = Callable[[str, List[ShortTermMemoryItem]], None]
+
+
+def approx_item_bytes(item: ShortTermMemoryItem) -> int:
+    """Approximate memory held by one item, used for the global byte budget."""
+    size = ITEM_OVERHEAD_BYTES + sys.getsizeof(item.content)
+    if item.metadata_items:
+        size += sys.getsizeof(item.metadata_items) + sum(
+            sys.getsizeof(value) for _, value in item.metadata_items
         )
+    return size
+
+
+def _item_to_dict(item: ShortTermMemoryItem) -> Dict[str, Any]:
+    return {
+        "agent_name": item.agent_name,
+        "role": item.role,
+        "content": item.content,
+        "metadata": item.metadata,
+        "created_at": item.created_at,
+    }
+
+
+def _item_from_dict(session_id: str, data: Dict[str, Any]) -> ShortTermMemoryItem:
+    return ShortTermMemoryItem(
+        agent_name=data["agent_name"],
+        session_id=session_id,
+        role=data["role"],
+        content=data["content"],
+        metadata=data.get("metadata"),
+        created_at=data["created_at"],
+    )
+
+
+class _SessionLog:
+    __slots__ = ("items", "views", "bytes")
+
+    def __init__(self) -> None:
+        self.items: Deque[ShortTermMemoryItem] = deque()
+        self.views: Dict[str, Deque[ShortTermMemoryItem]] = defaultdict(deque)
+        self.bytes = 0
+
+    def append(self, item: ShortTermMemoryItem) -> None:
+        self.items.append(item)
+        self.views[item.agent_name].append(item)
+        self.bytes += approx_item_bytes(item)
+
+    def drop_oldest(self) -> None:
+        item = self.items.popleft()
+        self.bytes -= approx_item_bytes(item)
+        view = self.views[item.agent_name]
+        # Views are ordered like the log, so the oldest item heads its view too
+        view.popleft()
+        if not view:
+            del self.views[item.agent_name]
+
+    def drop_from_log(self, item: ShortTermMemoryItem) -> None:
+        # Items dropped from a view are among the oldest: scan from the left
+        for index, candidate in enumerate(self.items):
+            if candidate is item:
+                del self.items[index]
+                self.bytes -= approx_item_bytes(item)
+                return
+
+
+class InMemoryMemoryRepository(MemoryRepository):
+    def __init__(
+        self,
+        default_maxlen: int = 500,
+        ttl_seconds: Optional[int] = None,
+        sweep_interval_seconds: Optional[float] = None,
+        max_total_items: Optional[int] = None,
+        max_total_bytes: Optional[int] = None,
+        spill_dir: Optional[Path] = None,
+        on_evict: Optional[EvictionListener] = None,
+    ) -> None:
+        self._maxlen = default_maxlen
+        self._ttl_seconds = ttl_seconds
+        self._max_total_items = max_total_items
+        self._max_total_bytes = max_total_bytes
+        self._spill_dir = Path(spill_dir) if spill_dir else None
+        self._on_evict = on_evict
+        # Least recently touched session first
+        self._sessions: "OrderedDict[str, _SessionLog]" = OrderedDict()
+        # Spilled session -> creation time (epoch) of its newest item
+        self._spilled: Dict[str, float] = {}
+        self._items = 0
+        self._bytes = 0
+        self._swept_sessions = 0
+        self._evicted_sessions = 0
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        if ttl_seconds is not None and sweep_interval_seconds:
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop,
+                args=(sweep_interval_seconds,),
+                name="memory-sweeper",
+                daemon=True,
+            )
+            self._sweeper.start()
+
+    def _touch(self, session_id: str, create: bool = False) -> Optional[_SessionLog]:
+        log = self._sessions.get(session_id)
+        restored = False
+        if log is None and session_id in self._spilled:
+            log = self._restore(session_id)
+            restored = log is not None
+        if log is None and create:
+            log = self._sessions[session_id] = _SessionLog()
+        if log is not None:
+            self._sessions.move_to_end(session_id)
+        if restored:
+            self._enforce_budget()
+        return log
+
+    def _update(self, log: _SessionLog, change: Callable[[], None]) -> None:
+        """Apply ``change`` to ``log`` keeping the global counters in sync."""
+        items, size = len(log.items), log.bytes
+        change()
+        self._items += len(log.items) - items
+        self._bytes += log.bytes - size
 
     def save(self, item: ShortTermMemoryItem) -> None:
-        key = (item.session_id, item.agent_name)
-        self._store[key].append(item)
+        with self._lock:
+            log = self._touch(item.session_id, create=True)
+
+            def change() -> None:
+                log.append(item)
+                if len(log.items) > self._maxlen:
+                    log.drop_oldest()
+
+            self._update(log, change)
+            self._enforce_budget()
+
+    def _over_budget(self) -> bool:
+        max_items, max_bytes = self._max_total_items, self._max_total_bytes
+        if max_items is not None and self._items > max_items:
+            return True
+        return max_bytes is not None and self._bytes > max_bytes
+
+    def _enforce_budget(self) -> None:
+        # The session just written is the most recent one, so it goes last
+        while self._over_budget() and len(self._sessions) > 1:
+            self._evict(next(iter(self._sessions)))
+
+    def _evict(self, session_id: str) -> None:
+        log = self._sessions.pop(session_id)
+        self._items -= len(log.items)
+        self._bytes -= log.bytes
+        self._evicted_sessions += 1
+        items = list(log.items)
+        spilled = self._spill(session_id, items)
+        logger.info(
+            f"memory.evict session={session_id} items={len(items)} "
+            f"bytes={log.bytes} spilled={spilled}"
+        )
+        if self._on_evict is not None:
+            try:
+                self._on_evict(session_id, items)
+            except Exception as e:
+                logger.error(f"memory.evict listener failed: {e}")
+
+    def _spill_path(self, session_id: str) -> Path:
+        return self._spill_dir / f"{session_id}.json"
+
+    def _spill(self, session_id: str, items: List[ShortTermMemoryItem]) -> bool:
+        if self._spill_dir is None or not items:
+            return False
+        get_write_behind_writer().write_json(
+            self._spill_path(session_id), [_item_to_dict(i) for i in items], indent=None
+        )
+        self._spilled[session_id] = items[-1].created_at
+        return True
+
+    def _restore(self, session_id: str) -> Optional[_SessionLog]:
+        del self._spilled[session_id]
+        path = self._spill_path(session_id)
+        writer = get_write_behind_writer()
+        pending, payload = writer.read_json(path)
+        try:
+            if not pending:
+                payload = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.error(f"memory.restore failed for session={session_id}: {e}")
+            payload = None
+        writer.delete(path)
+        if not payload:
+            return None
+        log = self._sessions[session_id] = _SessionLog()
+        for data in payload:
+            log.append(_item_from_dict(session_id, data))
+        self._items += len(log.items)
+        self._bytes += log.bytes
+        logger.debug(f"memory.restore session={session_id} items={len(log.items)}")
+        return log
 
     def get_recent(
-        self, agent_name: str, session_id: str, limit: Optional[int] = None
+        self, agent_name: Optional[str], session_id: str, limit: Optional[int] = None
     ) -> List[ShortTermMemoryItem]:
-        key = (session_id, agent_name)
-        dq = self._store.get(key, deque())
-        if limit is None or limit >= len(dq):
-            return list(dq)
-        # return the most recent items (deque is ordered oldest->newest)
-        return list(dq)[-limit:]
+        with self._lock:
+            log = self._touch(session_id)
+            if log is None:
+                return []
+            dq = log.items if agent_name is None else log.views.get(agent_name, ())
+            if limit is None or limit >= len(dq):
+                return list(dq)
+            # Walk back from the newest end: O(limit), not O(len(dq))
+            recent = list(islice(reversed(dq), limit))
+        recent.reverse()
+        return recent
 
     def prune(
         self,
@@ -39,25 +254,97 @@ class InMemoryMemoryRepository(MemoryRepository):
         ttl_seconds: Optional[int],
         max_items: Optional[int],
     ) -> None:
-        key = (session_id, agent_name)
-        dq = self._store.get(key)
-        if not dq:
-            return
-
-        # prune by TTL
-        if ttl_seconds is not None:
-            cutoff = datetime.utcnow() - timedelta(seconds=ttl_seconds)
-            # remove from left while older than cutoff
-            while dq and dq[0].created_at < cutoff:
-                dq.popleft()
-
-        # prune by max_items (keep most recent)
-        if max_items is not None and len(dq) > max_items:
-            # remove from left until size fits
-            while len(dq) > max_items:
-                dq.popleft()
+        with self._lock:
+            log = self._sessions.get(session_id)
+            if log is None:
+                return
+
+            def change() -> None:
+                # prune by TTL (the whole session log is ordered by creation time)
+                if ttl_seconds is not None:
+                    cutoff = time.time() - ttl_seconds
+                    while log.items and log.items[0].created_at < cutoff:
+                        log.drop_oldest()
+
+                # prune by max_items (keep the agent's most recent items)
+                view = log.views.get(agent_name)
+                if max_items is not None and view is not None:
+                    while len(view) > max_items:
+                        log.drop_from_log(view.popleft())
+
+            self._update(log, change)
+            if not log.items:
+                del self._sessions[session_id]
 
     def clear_session(self, session_id: str) -> None:
-        keys = [k for k in self._store.keys() if k[0] == session_id]
-        for k in keys:
-            self._store.pop(k, None)
+        with self._lock:
+            log = self._sessions.pop(session_id, None)
+            if log is not None:
+                self._items -= len(log.items)
+                self._bytes -= log.bytes
+            if self._spilled.pop(session_id, None) is not None:
+                get_write_behind_writer().delete(self._spill_path(session_id))
+
+    def sweep(self, ttl_seconds: Optional[int] = None) -> int:
+        """
+        Drop every session whose newest item is older than the TTL.
+
+        Args:
+            ttl_seconds: Idle time allowed (defaults to the repository TTL)
+
+        Returns:
+            Number of sessions removed
+        """
+        ttl_seconds = self._ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl_seconds is None:
+            return 0
+        cutoff = time.time() - ttl_seconds
+        with self._lock:
+            idle = [
+                session_id
+                for session_id, log in self._sessions.items()
+                if log.items[-1].created_at < cutoff
+            ]
+            for session_id in idle:
+                log = self._sessions.pop(session_id)
+                self._items -= len(log.items)
+                self._bytes -= log.bytes
+            idle_spilled = [
+                session_id
+                for session_id, newest in self._spilled.items()
+                if newest < cutoff
+            ]
+            for session_id in idle_spilled:
+                del self._spilled[session_id]
+                get_write_behind_writer().delete(self._spill_path(session_id))
+            idle += idle_spilled
+            self._swept_sessions += len(idle)
+        if idle:
+            logger.debug(f"memory.sweep removed {len(idle)} idle sessions")
+        return len(idle)
+
+    def _sweep_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"memory.sweep failed: {e}")
+
+    def close(self) -> None:
+        """Stop the background sweeper."""
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def stats(self) -> Dict[str, int]:
+        """Live sessions, items and approximate bytes plus eviction counters."""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "items": self._items,
+                "bytes": self._bytes,
+                "swept_sessions": self._swept_sessions,
+                "evicted_sessions": self._evicted_sessions,
+                "spilled_sessions": len(self._spilled),
+            }
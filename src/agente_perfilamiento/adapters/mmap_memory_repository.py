@@ -0,0 +1,500 @@
+"""
+Memory-mapped implementation of MemoryRepository.
+
+Worker processes on one host share short-term memory through a single
+mapped file, without a database round trip:
+
+- A fixed table of slots, addressed by an open-addressing hash of the
+  session id. Each slot is a ring buffer of fixed-size records tagged with
+  their agent, so agent windows are views of the session log as in the
+  other repositories.
+- Appends take a POSIX byte-range lock on their slot only (plus a
+  per-process lock, since record locks do not exclude threads). Reads take
+  no lock: every slot carries a sequence counter that writers make odd
+  while they write, and readers retry if it changed under them.
+- Payloads that do not fit inline go to a side file used as a ring of
+  fixed capacity, so its disk use stays bounded whatever records are
+  evicted, pruned or swept. Its header holds the count of bytes ever
+  written; a writer advances it before overwriting the oldest bytes, and a
+  payload that has been overwritten reads as an expired record.
+
+When the table is full, the slot with the oldest activity is reused.
+"""
+
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from hashlib import sha256
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from agente_perfilamiento.ports.memory_repository import MemoryRepository
+from agente_perfilamiento.domain.models.memory import ShortTermMemoryItem
+from agente_perfilamiento.infrastructure.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+MAGIC = b"APMEMRB2"
+HEADER_SIZE = 64
+OVERFLOW_MAGIC = b"APMEMOV1"
+OVERFLOW_HEADER_SIZE = 32
+# magic, ring capacity in bytes, cursor (bytes ever written)
+_OVERFLOW_HEADER = struct.Struct("<8sQQ")
+_CURSOR = struct.Struct("<Q")
+_CURSOR_OFFSET = 16
+# magic, slots, capacity (records per slot), inline payload bytes
+_HEADER = struct.Struct("<8sIII")
+# state, sequence, head (records ever written), tail (oldest live record),
+# last write time, session key
+_SLOT = struct.Struct("<BxxxIQQd64s")
+# created_at, flags, agent length, role length, content bytes, metadata bytes,
+# overflow offset, agent, role (the inline payload follows)
+_RECORD = struct.Struct("<dBBBxIIQ48s16s")
+
+_EMPTY, _USED, _FREE = 0, 1, 2
+_LIVE, _DELETED = 1, 2
+_INLINE = 2**64 - 1
+_READ_RETRIES = 100
+
+
+def _file_size(slots: int, capacity: int, inline_bytes: int) -> int:
+    return HEADER_SIZE + slots * (_SLOT.size + capacity * (_RECORD.size + inline_bytes))
+
+
+def _session_key(session_id: str) -> bytes:
+    key = session_id.encode("utf-8")
+    # Keys are fixed-width; long ids are stored by digest
+    return key if len(key) <= 64 else sha256(key).hexdigest().encode("ascii")
+
+
+class MmapMemoryRepository(MemoryRepository):
+    def __init__(
+        self,
+        path: str,
+        slots: int = 1024,
+        capacity: int = 64,
+        inline_bytes: int = 512,
+        overflow_bytes: int = 64 * 2**20,
+        ttl_seconds: Optional[int] = None,
+        sweep_interval_seconds: Optional[float] = None,
+    ) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._overflow_fd = os.open(f"{path}.overflow", os.O_RDWR | os.O_CREAT, 0o644)
+
+        with self._range_lock(0, HEADER_SIZE):
+            header = os.pread(self._fd, _HEADER.size, 0)
+            if len(header) == _HEADER.size and header[:8] == MAGIC:
+                # An existing file keeps the geometry it was created with
+                _, slots, capacity, inline_bytes = _HEADER.unpack(header)
+            else:
+                # New file, or an older layout: start from an empty table
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, _file_size(slots, capacity, inline_bytes))
+                os.pwrite(
+                    self._fd, _HEADER.pack(MAGIC, slots, capacity, inline_bytes), 0
+                )
+                os.ftruncate(self._overflow_fd, 0)
+            overflow_header = os.pread(self._overflow_fd, _OVERFLOW_HEADER.size, 0)
+            if (
+                len(overflow_header) == _OVERFLOW_HEADER.size
+                and overflow_header[:8] == OVERFLOW_MAGIC
+            ):
+                _, overflow_bytes, _ = _OVERFLOW_HEADER.unpack(overflow_header)
+            else:
+                os.ftruncate(self._overflow_fd, 0)
+                os.pwrite(
+                    self._overflow_fd,
+                    _OVERFLOW_HEADER.pack(OVERFLOW_MAGIC, overflow_bytes, 0),
+                    0,
+                )
+        self._overflow_capacity = overflow_bytes
+        self._slots, self._capacity, self._inline = slots, capacity, inline_bytes
+        self._record_size = _RECORD.size + inline_bytes
+        self._slot_size = _SLOT.size + capacity * self._record_size
+        self._mm = mmap.mmap(self._fd, _file_size(slots, capacity, inline_bytes))
+
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        if ttl_seconds is not None and sweep_interval_seconds:
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop,
+                args=(sweep_interval_seconds,),
+                name="memory-sweeper",
+                daemon=True,
+            )
+            self._sweeper.start()
+
+    # -- layout helpers -------------------------------------------------
+
+    def _slot_offset(self, index: int) -> int:
+        return HEADER_SIZE + index * self._slot_size
+
+    def _record_offset(self, index: int, position: int) -> int:
+        return (
+            self._slot_offset(index)
+            + _SLOT.size
+            + (position % self._capacity) * self._record_size
+        )
+
+    def _read_slot(self, index: int) -> Tuple[int, int, int, int, float, bytes]:
+        return _SLOT.unpack_from(self._mm, self._slot_offset(index))
+
+    @contextmanager
+    def _range_lock(
+        self, start: int, length: int, fd: Optional[int] = None
+    ) -> Iterator[None]:
+        fd = self._fd if fd is None else fd
+        fcntl.lockf(fd, fcntl.LOCK_EX, length, start)
+        try:
+            yield
+        finally:
+            fcntl.lockf(fd, fcntl.LOCK_UN, length, start)
+
+    @contextmanager
+    def _slot_write(self, index: int) -> Iterator[list]:
+        """Lock a slot and expose its header as a mutable list for the writer."""
+        with self._lock, self._range_lock(self._slot_offset(index), self._slot_size):
+            header = list(self._read_slot(index))
+            # Odd sequence: readers retry until the write is complete
+            header[1] = (header[1] + 1) & 0xFFFFFFFF
+            _SLOT.pack_into(self._mm, self._slot_offset(index), *header)
+            try:
+                yield header
+            finally:
+                header[1] = (header[1] + 1) & 0xFFFFFFFF
+                _SLOT.pack_into(self._mm, self._slot_offset(index), *header)
+
+    # -- index ----------------------------------------------------------
+
+    def _probe(self, key: bytes) -> Tuple[Optional[int], Optional[int]]:
+        """Return (slot holding ``key``, first reusable slot) along its probe chain."""
+        start = zlib.crc32(key) % self._slots
+        reusable = None
+        for step in range(self._slots):
+            index = (start + step) % self._slots
+            state, _, _, _, _, slot_key = self._read_slot(index)
+            if state == _EMPTY:
+                return None, reusable if reusable is not None else index
+            if state == _USED and slot_key.rstrip(b"\0") == key:
+                return index, None
+            if state == _FREE and reusable is None:
+                reusable = index
+        return None, reusable
+
+    def _find(self, key: bytes) -> Optional[int]:
+        return self._probe(key)[0]
+
+    def _find_or_create(self, key: bytes) -> int:
+        index = self._find(key)
+        if index is not None:
+            return index
+        with self._lock, self._range_lock(0, HEADER_SIZE):
+            # Another worker may have created it while we were probing
+            index, reusable = self._probe(key)
+            if index is not None:
+                return index
+            if reusable is None:
+                reusable = self._oldest_slot()
+                logger.info(f"memory.evict slot={reusable} (mmap table full)")
+            with self._slot_write(reusable) as header:
+                header[0], header[2], header[3] = _USED, 0, 0
+                header[4], header[5] = time.time(), key
+            return reusable
+
+    def _oldest_slot(self) -> int:
+        return min(range(self._slots), key=lambda index: self._read_slot(index)[4])
+
+    # -- records --------------------------------------------------------
+
+    def _overflow_cursor(self) -> int:
+        return _CURSOR.unpack(os.pread(self._overflow_fd, 8, _CURSOR_OFFSET))[0]
+
+    def _overflow_spans(self, position: int, length: int) -> List[Tuple[int, int]]:
+        """(file offset, length) pieces of a ring range, split where it wraps."""
+        start = position % self._overflow_capacity
+        first = min(length, self._overflow_capacity - start)
+        spans = [(OVERFLOW_HEADER_SIZE + start, first)]
+        if first < length:
+            spans.append((OVERFLOW_HEADER_SIZE, length - first))
+        return spans
+
+    def _append_overflow(self, payload: bytes) -> Optional[int]:
+        """Write ``payload`` to the ring; ``None`` if it is larger than the ring."""
+        if len(payload) > self._overflow_capacity:
+            return None
+        with self._lock, self._range_lock(0, OVERFLOW_HEADER_SIZE, self._overflow_fd):
+            position = self._overflow_cursor()
+            # Claim the range first, so readers of the bytes being overwritten
+            # see them expire
+            os.pwrite(
+                self._overflow_fd,
+                _CURSOR.pack(position + len(payload)),
+                _CURSOR_OFFSET,
+            )
+            written = 0
+            for offset, length in self._overflow_spans(position, len(payload)):
+                os.pwrite(
+                    self._overflow_fd, payload[written : written + length], offset
+                )
+                written += length
+        return position
+
+    def _read_overflow(self, position: int, length: int) -> Optional[bytes]:
+        """A ring payload, or ``None`` once newer payloads have overwritten it."""
+        payload = b"".join(
+            os.pread(self._overflow_fd, size, offset)
+            for offset, size in self._overflow_spans(position, length)
+        )
+        cursor = self._overflow_cursor()
+        if position < cursor - self._overflow_capacity or position + length > cursor:
+            return None
+        return payload
+
+    def save(self, item: ShortTermMemoryItem) -> None:
+        agent = item.agent_name.encode("utf-8")
+        role = item.role.encode("utf-8")
+        if len(agent) > 48 or len(role) > 16:
+            raise ValueError("agent_name or role too long for the mmap record")
+        content = item.content.encode("utf-8")
+        metadata = (
+            json.dumps(item.metadata, ensure_ascii=False).encode("utf-8")
+            if item.metadata_items
+            else b""
+        )
+        overflow = _INLINE
+        if len(content) + len(metadata) > self._inline:
+            position = self._append_overflow(content + metadata)
+            if position is None:
+                logger.warning(
+                    "memory.mmap payload larger than the overflow ring; truncated"
+                )
+                if len(metadata) > self._inline:
+                    metadata = b""
+                content = content[: self._inline - len(metadata)]
+            else:
+                overflow = position
+
+        key = _session_key(item.session_id)
+        while True:
+            index = self._find_or_create(key)
+            with self._slot_write(index) as header:
+                # The slot may have been freed or reused since we found it
+                if header[0] == _USED and header[5].rstrip(b"\0") == key:
+                    self._append_record(
+                        index, header, item, agent, role, content, metadata, overflow
+                    )
+                    return
+
+    def _append_record(
+        self,
+        index: int,
+        header: list,
+        item: ShortTermMemoryItem,
+        agent: bytes,
+        role: bytes,
+        content: bytes,
+        metadata: bytes,
+        overflow: int,
+    ) -> None:
+        head, tail = header[2], header[3]
+        offset = self._record_offset(index, head)
+        _RECORD.pack_into(
+            self._mm,
+            offset,
+            item.created_at,
+            _LIVE,
+            len(agent),
+            len(role),
+            len(content),
+            len(metadata),
+            overflow,
+            agent,
+            role,
+        )
+        if overflow == _INLINE:
+            start = offset + _RECORD.size
+            payload = content + metadata
+            self._mm[start : start + len(payload)] = payload
+        header[2] = head + 1
+        header[3] = max(tail, head + 1 - self._capacity)
+        header[4] = item.created_at
+
+    def _read_record(self, index: int, position: int) -> tuple:
+        offset = self._record_offset(index, position)
+        fields = _RECORD.unpack_from(self._mm, offset)
+        inline = None
+        if fields[6] == _INLINE:
+            start = offset + _RECORD.size
+            inline = bytes(self._mm[start : start + fields[4] + fields[5]])
+        return fields, inline
+
+    def _decode(
+        self, session_id: str, fields: tuple, inline: Optional[bytes]
+    ) -> Optional[ShortTermMemoryItem]:
+        created_at, _, agent_len, role_len, content_len, metadata_len = fields[:6]
+        overflow, agent, role = fields[6:]
+        payload = inline
+        if payload is None:
+            payload = self._read_overflow(overflow, content_len + metadata_len)
+            if payload is None:
+                return None
+        metadata = payload[content_len:]
+        return ShortTermMemoryItem(
+            agent_name=agent[:agent_len].decode("utf-8"),
+            session_id=session_id,
+            role=role[:role_len].decode("utf-8"),
+            # Content truncated to fit inline may end mid-character
+            content=payload[:content_len].decode("utf-8", errors="ignore"),
+            metadata=json.loads(metadata) if metadata else None,
+            created_at=created_at,
+        )
+
+    def _collect(
+        self, index: int, key: bytes, agent: Optional[bytes], limit: Optional[int]
+    ) -> Optional[List[tuple]]:
+        """Newest-first raw records of a slot, or None if a writer interfered."""
+        state, seq, head, tail, _, slot_key = self._read_slot(index)
+        if seq % 2:
+            return None
+        if state != _USED or slot_key.rstrip(b"\0") != key:
+            return []
+        records = []
+        for position in range(head - 1, tail - 1, -1):
+            fields, inline = self._read_record(index, position)
+            if fields[1] != _LIVE or (
+                agent is not None and fields[7][: fields[2]] != agent
+            ):
+                continue
+            records.append((fields, inline))
+            if limit is not None and len(records) >= limit:
+                break
+        if self._read_slot(index)[1] != seq:
+            return None
+        return records
+
+    def get_recent(
+        self, agent_name: Optional[str], session_id: str, limit: Optional[int] = None
+    ) -> List[ShortTermMemoryItem]:
+        key = _session_key(session_id)
+        index = self._find(key)
+        if index is None:
+            return []
+        agent = agent_name.encode("utf-8") if agent_name is not None else None
+        records = None
+        for _ in range(_READ_RETRIES):
+            records = self._collect(index, key, agent, limit)
+            if records is not None:
+                break
+            time.sleep(0)
+        if records is None:
+            # Persistent contention: read under the writers' lock
+            with self._slot_write(index):
+                records = self._collect(index, key, agent, limit) or []
+        items = [self._decode(session_id, f, inline) for f, inline in reversed(records)]
+        # Records whose overflow payload was overwritten have expired
+        return [item for item in items if item is not None]
+
+    def prune(
+        self,
+        agent_name: str,
+        session_id: str,
+        ttl_seconds: Optional[int],
+        max_items: Optional[int],
+    ) -> None:
+        if ttl_seconds is None and max_items is None:
+            return
+        key = _session_key(session_id)
+        index = self._find(key)
+        if index is None:
+            return
+        agent = agent_name.encode("utf-8")
+        with self._slot_write(index) as header:
+            head, tail = header[2], header[3]
+            if ttl_seconds is not None:
+                cutoff = time.time() - ttl_seconds
+                while tail < head and self._read_record(index, tail)[0][0] < cutoff:
+                    tail += 1
+            if max_items is not None:
+                kept = 0
+                for position in range(head - 1, tail - 1, -1):
+                    offset = self._record_offset(index, position)
+                    fields = _RECORD.unpack_from(self._mm, offset)
+                    if fields[1] != _LIVE or fields[7][: fields[2]] != agent:
+                        continue
+                    kept += 1
+                    if kept > max_items:
+                        struct.pack_into("<B", self._mm, offset + 8, _DELETED)
+            header[3] = tail
+            if tail == head:
+                header[0] = _FREE
+
+    def clear_session(self, session_id: str) -> None:
+        index = self._find(_session_key(session_id))
+        if index is None:
+            return
+        with self._slot_write(index) as header:
+            header[0], header[2], header[3] = _FREE, 0, 0
+
+    def sweep(self, ttl_seconds: Optional[int] = None) -> int:
+        """
+        Free every slot whose newest record is older than the TTL.
+
+        Returns:
+            Number of sessions removed
+        """
+        ttl_seconds = self._ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl_seconds is None:
+            return 0
+        cutoff = time.time() - ttl_seconds
+        removed = 0
+        for index in range(self._slots):
+            state, _, _, _, last, _ = self._read_slot(index)
+            if state != _USED or last >= cutoff:
+                continue
+            with self._slot_write(index) as header:
+                if header[0] == _USED and header[4] < cutoff:
+                    header[0], header[2], header[3] = _FREE, 0, 0
+                    removed += 1
+        if removed:
+            logger.debug(f"memory.sweep removed {removed} idle sessions")
+        return removed
+
+    def _sweep_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"memory.sweep failed: {e}")
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+        self._mm.close()
+        os.close(self._fd)
+        os.close(self._overflow_fd)
+
+    def stats(self) -> Dict[str, int]:
+        """Sessions and live ring positions in the shared file, plus overflow use."""
+        sessions = items = 0
+        for index in range(self._slots):
+            state, _, head, tail, _, _ = self._read_slot(index)
+            if state == _USED:
+                sessions += 1
+                items += head - tail
+        return {
+            "sessions": sessions,
+            "items": items,
+            "overflow_bytes": min(self._overflow_cursor(), self._overflow_capacity),
+            "overflow_capacity": self._overflow_capacity,
+        }
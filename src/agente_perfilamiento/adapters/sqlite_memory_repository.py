@@ -0,0 +1,213 @@
+"""
+SQLite implementation of MemoryRepository.
+
+Short-term memory lives in a WAL-mode SQLite file, so several worker
+processes on one host share sessions and memory survives restarts without
+a network service. Writes are buffered and committed in one transaction
+per turn (or as soon as the buffer fills, or before any read); pruning runs
+as set-based DELETE statements in that same transaction.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from agente_perfilamiento.ports.memory_repository import MemoryRepository
+from agente_perfilamiento.domain.models.memory import ShortTermMemoryItem
+from agente_perfilamiento.infrastructure.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+# (session_id, agent_name) -> (ttl_seconds, max_items) of the latest prune
+PruneKey = Tuple[str, str]
+
+
+class SqliteMemoryRepository(MemoryRepository):
+    def __init__(
+        self,
+        db_path: str,
+        ttl_seconds: Optional[int] = None,
+        sweep_interval_seconds: Optional[float] = None,
+        batch_size: int = 64,
+    ) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._sweep_interval = sweep_interval_seconds
+        self._next_sweep = 0.0
+        self._batch_size = batch_size
+        self._pending: List[ShortTermMemoryItem] = []
+        self._prunes: Dict[PruneKey, Tuple[Optional[int], Optional[int]]] = {}
+        self._lock = threading.RLock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS memory_items ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " session_id TEXT NOT NULL,"
+            " agent_name TEXT NOT NULL,"
+            " role TEXT NOT NULL,"
+            " content TEXT NOT NULL,"
+            " metadata TEXT,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_memory_session_agent"
+            " ON memory_items (session_id, agent_name, created_at)"
+        )
+        self._conn.commit()
+
+    def save(self, item: ShortTermMemoryItem) -> None:
+        with self._lock:
+            self._pending.append(item)
+            if len(self._pending) >= self._batch_size:
+                self.flush()
+
+    def prune(
+        self,
+        agent_name: str,
+        session_id: str,
+        ttl_seconds: Optional[int],
+        max_items: Optional[int],
+    ) -> None:
+        if ttl_seconds is None and max_items is None:
+            return
+        with self._lock:
+            # Deferred to the flush: one DELETE per (session, agent) per batch
+            self._prunes[(session_id, agent_name)] = (ttl_seconds, max_items)
+
+    def flush(self) -> None:
+        """Commit buffered items and pruning in a single transaction."""
+        with self._lock:
+            if not self._pending and not self._prunes:
+                return
+            pending, self._pending = self._pending, []
+            prunes, self._prunes = self._prunes, {}
+            now = time.time()
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO memory_items"
+                    " (session_id, agent_name, role, content, metadata, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            item.session_id,
+                            item.agent_name,
+                            item.role,
+                            item.content,
+                            (
+                                json.dumps(item.metadata, ensure_ascii=False)
+                                if item.metadata_items
+                                else None
+                            ),
+                            item.created_at,
+                        )
+                        for item in pending
+                    ],
+                )
+                for (session_id, agent_name), (ttl, max_items) in prunes.items():
+                    self._prune_now(session_id, agent_name, ttl, max_items, now)
+            if (
+                self._ttl_seconds is not None
+                and self._sweep_interval
+                and now >= self._next_sweep
+            ):
+                self._next_sweep = now + self._sweep_interval
+                self.sweep()
+
+    def _prune_now(
+        self,
+        session_id: str,
+        agent_name: str,
+        ttl_seconds: Optional[int],
+        max_items: Optional[int],
+        now: float,
+    ) -> None:
+        if ttl_seconds is not None:
+            self._conn.execute(
+                "DELETE FROM memory_items WHERE session_id = ? AND created_at < ?",
+                (session_id, now - ttl_seconds),
+            )
+        if max_items is not None:
+            self._conn.execute(
+                "DELETE FROM memory_items WHERE session_id = ? AND agent_name = ?"
+                " AND id NOT IN (SELECT id FROM memory_items"
+                "  WHERE session_id = ? AND agent_name = ? ORDER BY id DESC LIMIT ?)",
+                (session_id, agent_name, session_id, agent_name, max_items),
+            )
+
+    def get_recent(
+        self, agent_name: Optional[str], session_id: str, limit: Optional[int] = None
+    ) -> List[ShortTermMemoryItem]:
+        with self._lock:
+            # Read-your-writes: this turn's buffered items must be visible
+            self.flush()
+            query = (
+                "SELECT agent_name, role, content, metadata, created_at"
+                " FROM memory_items WHERE session_id = ?"
+            )
+            params: list = [session_id]
+            if agent_name is not None:
+                query += " AND agent_name = ?"
+                params.append(agent_name)
+            query += " ORDER BY id DESC LIMIT ?"
+            params.append(-1 if limit is None else limit)
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            ShortTermMemoryItem(
+                agent_name=agent,
+                session_id=session_id,
+                role=role,
+                content=content,
+                metadata=json.loads(metadata) if metadata else None,
+                created_at=created_at,
+            )
+            for agent, role, content, metadata, created_at in reversed(rows)
+        ]
+
+    def clear_session(self, session_id: str) -> None:
+        with self._lock:
+            self._pending = [i for i in self._pending if i.session_id != session_id]
+            self._prunes = {k: v for k, v in self._prunes.items() if k[0] != session_id}
+            with self._conn:
+                self._conn.execute(
+                    "DELETE FROM memory_items WHERE session_id = ?", (session_id,)
+                )
+
+    def sweep(self, ttl_seconds: Optional[int] = None) -> int:
+        """
+        Delete every session whose newest item is older than the TTL.
+
+        Returns:
+            Number of items removed
+        """
+        ttl_seconds = self._ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl_seconds is None:
+            return 0
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM memory_items WHERE session_id IN ("
+                " SELECT session_id FROM memory_items"
+                " GROUP BY session_id HAVING MAX(created_at) < ?)",
+                (time.time() - ttl_seconds,),
+            )
+        if cursor.rowcount:
+            logger.debug(f"memory.sweep removed {cursor.rowcount} idle items")
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        """Stored sessions and items plus writes still buffered."""
+        with self._lock:
+            sessions, items = self._conn.execute(
+                "SELECT COUNT(DISTINCT session_id), COUNT(*) FROM memory_items"
+            ).fetchone()
+            return {"sessions": sessions, "items": items, "pending": len(self._pending)}
@@ -4,8 +4,8 @@ Analista node for Agente_Perfilamiento agent.
 This node analyzes collected data and produces recommendations.
 """
 
-import json
-from typing import List
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
 from langchain_core.tools import BaseTool
 
@@ -15,14 +15,26 @@ from agente_perfilamiento.domain.models.conversation_state import (
     ConversationState,
     apply_state_defaults,
 )
-from agente_perfilamiento.infrastructure.persistence.provider import get_memory_service
+from agente_perfilamiento.domain.services.career_matching_service import (
+    CareerMatcher,
+    parse_dossiers,
+    profile_tags,
+)
+
+# Careers handed to the LLM for narration
+RANKING_TOP_K = 3
 
 
 class AnalistaAgent(BaseAgent):
     """Agent for analysis and recommendations only."""
 
+    # Re-analysing an unchanged interview summary yields the same result
+    cacheable = True
+
     def __init__(self):
         super().__init__("analista_agent")
+        self._matcher: Optional[CareerMatcher] = None
+        self._matcher_lock = threading.Lock()
 
     def get_tools(self) -> List[BaseTool]:
         # Solo lectura de memoria de conversación para contexto
@@ -31,21 +43,62 @@ class AnalistaAgent(BaseAgent):
     def get_fallback_response(self) -> str:
         return "Análisis no disponible ahora. Retomaré con recomendaciones resumidas." 
 
+    def get_matcher(self) -> CareerMatcher:
+        """Career matcher built once from the dossiers in the agent prompt."""
+        if self._matcher is None:
+            with self._matcher_lock:
+                if self._matcher is None:
+                    self._matcher = CareerMatcher(parse_dossiers(self.load_prompt()))
+                    self.logger.info(
+                        f"Career matcher ready ({len(self._matcher.careers)} careers, "
+                        f"{len(self._matcher.tags)} tags)"
+                    )
+        return self._matcher
+
+    def warm_up(self) -> None:
+        super().warm_up()
+        self.get_matcher()
+
+    def rank_careers(
+        self, summary_input: Dict[str, Any]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Deterministic career ranking for an interview summary, if it has tags."""
+        tags = profile_tags(summary_input.get("structured_profile"))
+        if not tags:
+            return None
+        try:
+            return self.get_matcher().rank(tags)
+        except Exception as e:
+            self.logger.error(f"Career matching failed: {e}")
+            return None
+
     def process(self, state: ConversationState) -> ConversationState:
         self.logger.info("Processing analista node")
 
+        state, exec_state = self._prepare_analysis(state)
+
+        # Execute agent with the synthetic message
+        response = self.execute_agent(exec_state)
+
+        return self._complete_turn(state, response)
+
+    async def aprocess(self, state: ConversationState) -> ConversationState:
+        """Async variant of :meth:`process`."""
+        self.logger.info("Processing analista node")
+
+        state, exec_state = self._prepare_analysis(state)
+        response = await self.aexecute_agent(exec_state)
+
+        return self._complete_turn(state, response)
+
+    def _prepare_analysis(
+        self, state: ConversationState
+    ) -> Tuple[ConversationState, ConversationState]:
+        """Return the updated state and the state used to call the LLM."""
         state = apply_state_defaults(state)
 
         # Attach short-term memory window to context
-        try:
-            memory = get_memory_service()
-            session_id = state.get("id_conversacion", "")
-            window = memory.get_window(self.agent_name, session_id)
-            context_data = state.get("context_data", {}) or {}
-            context_data["short_term_memory"] = window
-            state = {**state, "context_data": context_data}
-        except Exception:
-            pass
+        state = self.attach_short_term_memory(state)
 
         # Compose a synthetic user_message that includes full profile/context for analysis
         summary_input = state.get("interview_summary")
@@ -59,39 +112,77 @@ class AnalistaAgent(BaseAgent):
             }
         if state.get("interview_summary_path"):
             summary_input = {**summary_input, "summary_path": state["interview_summary_path"]}
-        analysis_user_message = (
-            "Analiza el siguiente perfil y entrega el resultado en el formato solicitado.\n\n"
-            + json.dumps(summary_input, ensure_ascii=False)
-        )
 
-        # Execute agent with the synthetic message
+        analysis_user_message, ranking = self.build_analysis_message(
+            summary_input, state.get("id_user")
+        )
         exec_state = {**state, "input_usuario": analysis_user_message}
-        response = self.execute_agent(exec_state)
-
-        # Update messages and memory
-        messages = state.get("mensajes_previos", []) or []
-        messages.append({"role": "assistant", "content": response})
+        return {**state, "career_ranking": ranking}, exec_state
+
+    def build_analysis_message(
+        self, summary_input: Dict[str, Any], id_user: Optional[str] = None
+    ) -> Tuple[str, Optional[List[Dict[str, Any]]]]:
+        """Return the analysis request for an interview summary and its ranking."""
+        ranking = self.rank_careers(summary_input)
+        if ranking:
+            # The matching is already computed; the LLM only narrates it
+            structured = summary_input.get("structured_profile") or {}
+            message = self.render_payload(
+                {
+                    "perfil_nombre": structured.get("perfil_nombre") or id_user,
+                    "ranking_calculado": ranking[:RANKING_TOP_K],
+                },
+                prefix=(
+                    "Presenta este ranking calculado en el formato solicitado, "
+                    "sin recalcular los porcentajes.\n\n"
+                ),
+            )
+        else:
+            # Raw answers are repeated in user_profile; trim them first when over budget
+            message = self.render_payload(
+                summary_input,
+                trim_paths=[
+                    ("conversation_history",),
+                    ("user_profile", "respuestas_test"),
+                ],
+                prefix=(
+                    "Analiza el siguiente perfil y entrega el resultado "
+                    "en el formato solicitado.\n\n"
+                ),
+            )
+        return message, ranking
+
+    async def areanalyze(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Analyse a stored interview summary outside of a conversation.
+
+        Used by batch re-analysis: no session memory, no tools and no token
+        streaming.
+
+        Returns:
+            ``response``, ``career_ranking`` and ``fallback`` (True when the
+            LLM call failed and the fallback text was returned)
+        """
+        message, ranking = self.build_analysis_message(summary, summary.get("id_user"))
+        exec_state: ConversationState = {
+            "id_user": summary.get("id_user") or "",
+            "input_usuario": message,
+        }
+        response = await self.aexecute_agent(exec_state, stream=False, use_tools=False)
+        return {
+            "response": response,
+            "career_ranking": ranking,
+            "fallback": response == self.get_fallback_response(),
+        }
 
-        try:
-            if state.get("id_conversacion"):
-                get_memory_service().append_and_get_window(
-                    agent_name=self.agent_name,
-                    session_id=state["id_conversacion"],
-                    role="assistant",
-                    content=response,
-                )
-                get_memory_service().append_and_get_window(
-                    agent_name="session_agent",
-                    session_id=state["id_conversacion"],
-                    role="assistant",
-                    content=response,
-                )
-        except Exception:
-            pass
+    def _complete_turn(
+        self, state: ConversationState, response: str
+    ) -> ConversationState:
+        self.remember_response(state, response)
 
         return {
-            **state,
-            "mensajes_previos": messages,
+            "mensajes_previos": [{"role": "assistant", "content": response}],
+            "career_ranking": state.get("career_ranking"),
             "evaluation_complete": True,
             "agent_recommendations": response,
             "ready_for_analysis": False,
@@ -104,3 +195,7 @@ analista_agent = AnalistaAgent()
 
 def analista_node(state: ConversationState) -> ConversationState:
     return analista_agent.process(state)
+
+
+async def aanalista_node(state: ConversationState) -> ConversationState:
+    return await analista_agent.aprocess(state)
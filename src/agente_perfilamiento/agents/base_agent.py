@@ -5,23 +5,75 @@ This module provides the base functionality for all agent nodes,
 following hexagonal architecture principles with separated concerns.
 """
 
+import json
 import os
+import re
+import threading
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import Runnable, RunnableConfig
 from langchain_core.tools import BaseTool
+from langgraph.constants import TAG_NOSTREAM
 
 from agente_perfilamiento.domain.models.conversation_state import ConversationState
-from agente_perfilamiento.infrastructure.config.settings import get_llm_model
+from agente_perfilamiento.infrastructure.cache.response_cache import (
+    ResponseCache,
+    get_response_cache,
+)
+from agente_perfilamiento.infrastructure.config.settings import get_llm_model, settings
+from agente_perfilamiento.infrastructure.llm.token_budget import get_prompt_budgeter
 from agente_perfilamiento.infrastructure.logging.logger import get_logger
+from agente_perfilamiento.infrastructure.metrics.registry import (
+    LLM_CALL_DURATION,
+    LLM_CALLS,
+    PROMPT_BUILD_DURATION,
+    get_metrics,
+    timed_tool,
+)
+from agente_perfilamiento.infrastructure.persistence.provider import get_memory_service
+
+# Prompt variable holding the rendered short-term memory window
+MEMORY_BLOCK_VARIABLE = "memory_block"
+
+# Executor modes: tool-calling agent loop, plain completion, JSON completion
+MODE_TOOLS = "tools"
+MODE_DIRECT = "direct"
+MODE_JSON = "json"
+
+
+def extract_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """Parse a JSON object from ``text``, tolerating surrounding prose."""
+    if not text:
+        return None
+    try:
+        parsed = json.loads(text)
+    except json.JSONDecodeError:
+        match = re.search(r"\{.*\}", text, re.DOTALL)
+        if not match:
+            return None
+        try:
+            parsed = json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return None
+    return parsed if isinstance(parsed, dict) else None
 
 
 class BaseAgent(ABC):
     """Base class for all LangGraph agent nodes."""
 
+    # Whether LLM tokens of this agent are streamed to the user by default
+    stream_output: bool = True
+    # Whether responses may be served from the LLM response cache
+    cacheable: bool = False
+    # Prompt token budget override (defaults to settings.prompt_token_budget)
+    prompt_token_budget: Optional[int] = None
+
     def __init__(self, agent_name: str):
         """
         Initialize the base agent.
@@ -32,7 +84,11 @@ class BaseAgent(ABC):
         self.agent_name = agent_name
         self.logger = get_logger(f"{__name__}.{agent_name}")
         self._prompt_template = None
-        self._tools = []
+        self._escaped_prompt: Optional[str] = None
+        self._tools: Optional[List[BaseTool]] = None
+        # Compiled executors keyed by (with_memory, mode)
+        self._executor_cache: Dict[Tuple[bool, str], Runnable] = {}
+        self._executor_lock = threading.Lock()
 
     def load_prompt(self) -> str:
         """
@@ -71,88 +127,420 @@ class BaseAgent(ABC):
         pass
 
     def create_chat_prompt(
-        self, additional_messages: Optional[List] = None
+        self,
+        additional_messages: Optional[List] = None,
+        with_scratchpad: bool = True,
     ) -> ChatPromptTemplate:
         """
         Create the chat prompt template for this agent.
 
         Args:
             additional_messages: Additional message templates to include
+            with_scratchpad: Whether to reserve the tool-calling scratchpad
 
         Returns:
             ChatPromptTemplate: The configured prompt template
         """
-        system_prompt = self.load_prompt()
-        # Escape curly braces in system prompts to avoid ChatPromptTemplate
-        # interpreting JSON/examples as template variables.
-        system_prompt = system_prompt.replace("{", "{{").replace("}", "}}")
-
-        messages = [
-            ("system", system_prompt),
-            ("human", "{user_message}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad"),
-        ]
-
+        if self._escaped_prompt is None:
+            # Escape curly braces in system prompts to avoid ChatPromptTemplate
+            # interpreting JSON/examples as template variables.
+            self._escaped_prompt = (
+                self.load_prompt().replace("{", "{{").replace("}", "}}")
+            )
+        system_prompt = self._escaped_prompt
+
+        messages = [("system", system_prompt), ("human", "{user_message}")]
         if additional_messages:
-            # Insert additional messages before the scratchpad
-            messages = messages[:-1] + additional_messages + [messages[-1]]
+            messages += additional_messages
+        if with_scratchpad:
+            messages.append(MessagesPlaceholder(variable_name="agent_scratchpad"))
 
         return ChatPromptTemplate.from_messages(messages)
 
-    def execute_agent(self, state: ConversationState, **kwargs) -> str:
+    def has_tools(self) -> bool:
+        """Whether this agent exposes any tool to the LLM."""
+        if self._tools is None:
+            self._tools = [timed_tool(tool) for tool in self.get_tools() or []]
+        return bool(self._tools)
+
+    def _resolve_mode(self, use_tools: bool) -> str:
+        # Tool-less agents and tool-less calls skip the agent loop entirely
+        return MODE_TOOLS if use_tools and self.has_tools() else MODE_DIRECT
+
+    def get_executor(
+        self, with_memory: bool = False, mode: Optional[str] = None
+    ) -> Runnable:
+        """
+        Get the compiled executor for this agent, building it on first use.
+
+        The prompt template, LLM client and executor are built once per
+        prompt layout and mode, and reused on every turn.
+
+        Args:
+            with_memory: Whether the prompt includes the short-term memory block
+            mode: ``MODE_TOOLS`` (AgentExecutor), ``MODE_DIRECT`` (prompt | llm)
+                or ``MODE_JSON`` (prompt | llm | JSON parser). Defaults to
+                tools when the agent has any, direct otherwise.
+
+        Returns:
+            Runnable: Cached executor for the requested layout
+        """
+        key = (with_memory, mode or self._resolve_mode(True))
+        executor = self._executor_cache.get(key)
+        if executor is None:
+            with self._executor_lock:
+                executor = self._executor_cache.get(key)
+                if executor is None:
+                    executor = self._build_executor(*key)
+                    self._executor_cache[key] = executor
+        return executor
+
+    def warm_up(self) -> None:
+        """Build every executor variant used on the hot path."""
+        for with_memory in (False, True):
+            self.get_executor(with_memory)
+        self.logger.debug(f"Agent {self.agent_name} executors warmed up")
+
+    def _build_executor(self, with_memory: bool, mode: str) -> Runnable:
+        additional_msgs = (
+            [("system", f"Memoria reciente:\n{{{MEMORY_BLOCK_VARIABLE}}}")]
+            if with_memory
+            else None
+        )
+        chat_prompt = self.create_chat_prompt(
+            additional_msgs, with_scratchpad=mode == MODE_TOOLS
+        )
+        llm = get_llm_model()
+        self.logger.info(
+            f"Built {mode} executor for {self.agent_name} (with_memory={with_memory})"
+        )
+
+        if mode == MODE_DIRECT:
+            return chat_prompt | llm | StrOutputParser()
+        if mode == MODE_JSON:
+            return chat_prompt | llm | JsonOutputParser()
+
+        # Create agent (provider-agnostic)
+        tools = self._tools if self.has_tools() else []
+        agent = create_tool_calling_agent(llm, tools, chat_prompt)
+        return AgentExecutor(agent=agent, tools=tools, verbose=False)
+
+    @staticmethod
+    def _memory_lines(state: ConversationState) -> Optional[List[str]]:
+        """Render the short-term memory window attached to the state, if any."""
+        ctx = state.get("context_data") or {}
+        window = ctx.get("short_term_memory") if isinstance(ctx, dict) else None
+        if not window:
+            return None
+        try:
+            lines = []
+            for item in window:
+                role = item.get("role", "?")
+                content = item.get("content", "")
+                lines.append(f"{role}: {content}")
+            return lines
+        except Exception:
+            return None
+
+    @classmethod
+    def _format_memory_block(cls, state: ConversationState) -> Optional[str]:
+        lines = cls._memory_lines(state)
+        return "\n".join(lines) if lines else None
+
+    def _token_budget(self) -> Optional[int]:
+        return self.prompt_token_budget or settings.prompt_token_budget
+
+    def render_payload(
+        self,
+        payload: Dict[str, Any],
+        trim_paths: Sequence[Tuple[str, ...]] = (),
+        prefix: str = "",
+    ) -> str:
+        """
+        Build a user message ending with a JSON payload, within the prompt budget.
+
+        Args:
+            payload: Data to embed in the user message
+            trim_paths: Lists inside ``payload`` that may lose their oldest
+                entries when the payload is over budget, in trimming order
+            prefix: Instructions placed before the payload; their tokens are
+                reserved so the message is never cut inside the JSON
+
+        Returns:
+            str: ``prefix`` followed by the compact JSON text
+        """
+        budget = self._token_budget()
+        if not budget:
+            return prefix + json.dumps(payload, ensure_ascii=False)
+        budgeter = get_prompt_budgeter(settings.llm_model_name)
+        available = (
+            budget
+            - budgeter.counter.count_static(self.load_prompt())
+            - budgeter.counter.count(prefix)
+        )
+        return prefix + budgeter.fit_json(payload, available, trim_paths)
+
+    def _prepare_invocation(
+        self,
+        state: ConversationState,
+        kwargs: Dict[str, Any],
+        mode: Optional[str] = None,
+    ) -> Tuple[Runnable, Dict[str, Any]]:
+        """Pick the cached executor and build its input for the given state."""
+        user_message = state.get("input_usuario", "")
+        memory_lines = self._memory_lines(state)
+
+        budget = self._token_budget()
+        if budget:
+            # System prompt > user payload > memory window
+            budgeter = get_prompt_budgeter(settings.llm_model_name)
+            user_message, memory_lines = budgeter.allocate(
+                budget, self.load_prompt(), user_message, memory_lines
+            )
+
+        memory_block = "\n".join(memory_lines) if memory_lines else None
+        executor = self.get_executor(with_memory=memory_block is not None, mode=mode)
+
+        # Prepare input parameters
+        input_params = {
+            "user_message": user_message,
+            "id_user": state.get("id_user", ""),
+            **kwargs,
+        }
+        if memory_block is not None:
+            input_params[MEMORY_BLOCK_VARIABLE] = memory_block
+        return executor, input_params
+
+    def _cache_key(self, input_params: Dict[str, Any], mode: str) -> Optional[str]:
+        """Cache key for a call, or ``None`` when the call must not be cached."""
+        if not self.cacheable or get_response_cache() is None:
+            return None
+        # Tool results (user memories, entities) are not part of the key
+        if mode == MODE_TOOLS:
+            return None
+        return ResponseCache.make_key(
+            agent_name=f"{self.agent_name}:{mode}",
+            system_prompt=self.load_prompt(),
+            memory_block=input_params.get(MEMORY_BLOCK_VARIABLE),
+            user_message=str(input_params.get("user_message", "")),
+            model=f"{settings.llm_provider}:{settings.llm_model_name}",
+        )
+
+    def _invoke_config(self, stream: Optional[bool]) -> Optional[RunnableConfig]:
+        """Tag the run so graph token streaming skips non user-facing calls."""
+        if stream is None:
+            stream = self.stream_output
+        return None if stream else {"tags": [TAG_NOSTREAM]}
+
+    @staticmethod
+    def _output_text(result: Any) -> str:
+        # AgentExecutor returns {"output": ...}; the direct chain returns text
+        if isinstance(result, dict):
+            result = result["output"]
+        return str(result).strip()
+
+    def execute_agent(
+        self,
+        state: ConversationState,
+        stream: Optional[bool] = None,
+        use_tools: bool = True,
+        **kwargs,
+    ) -> str:
         """
         Execute the agent with the given state and parameters.
 
         Args:
             state: Current conversation state
+            stream: Whether tokens may be streamed to the user (defaults to
+                ``stream_output``)
+            use_tools: Set to ``False`` for calls that need no tools, so they
+                run as a single prompt | llm completion
+            **kwargs: Additional parameters for agent execution
+
+        Returns:
+            str: Agent response
+        """
+        metrics = get_metrics()
+        try:
+            mode = self._resolve_mode(use_tools)
+            with metrics.timer(PROMPT_BUILD_DURATION, agent=self.agent_name):
+                executor, input_params = self._prepare_invocation(state, kwargs, mode)
+            cache_key = self._cache_key(input_params, mode)
+            if cache_key is not None:
+                cached = get_response_cache().get(cache_key)
+                if cached is not None:
+                    self.logger.info(f"Agent {self.agent_name} served from cache")
+                    metrics.inc(LLM_CALLS, agent=self.agent_name, outcome="cache_hit")
+                    return cached
+
+            with metrics.timer(LLM_CALL_DURATION, agent=self.agent_name, mode=mode):
+                result = executor.invoke(
+                    input_params, config=self._invoke_config(stream)
+                )
+            metrics.inc(LLM_CALLS, agent=self.agent_name, outcome="ok")
+            response = self._output_text(result)
+            self.logger.info(f"Agent {self.agent_name} executed successfully")
+
+            if cache_key is not None:
+                get_response_cache().set(cache_key, response)
+            return response
+
+        except Exception as e:
+            self.logger.error(f"Error executing agent {self.agent_name}: {e}")
+            metrics.inc(LLM_CALLS, agent=self.agent_name, outcome="error")
+            return self.get_fallback_response()
+
+    async def aexecute_agent(
+        self,
+        state: ConversationState,
+        stream: Optional[bool] = None,
+        use_tools: bool = True,
+        **kwargs,
+    ) -> str:
+        """
+        Async variant of :meth:`execute_agent` using ``executor.ainvoke``.
+
+        Args:
+            state: Current conversation state
+            stream: Whether tokens may be streamed to the user (defaults to
+                ``stream_output``)
+            use_tools: Set to ``False`` for calls that need no tools
             **kwargs: Additional parameters for agent execution
 
         Returns:
             str: Agent response
         """
+        metrics = get_metrics()
         try:
-            # Get tools and create agent
-            tools = self.get_tools()
-
-            # Build optional memory context as additional messages if available
-            additional_msgs = None
-            ctx = state.get("context_data") or {}
-            window = ctx.get("short_term_memory") if isinstance(ctx, dict) else None
-            if window:
-                try:
-                    lines = []
-                    for item in window:
-                        role = item.get("role", "?")
-                        content = item.get("content", "")
-                        lines.append(f"{role}: {content}")
-                    memory_block = "\n".join(lines)
-                    additional_msgs = [("system", f"Memoria reciente:\n{memory_block}")]
-                except Exception:
-                    additional_msgs = None
-
-            chat_prompt = self.create_chat_prompt(additional_msgs)
-            llm = get_llm_model()
-
-            # Create and execute agent (provider-agnostic)
-            agent = create_tool_calling_agent(llm, tools, chat_prompt)
-            executor = AgentExecutor(agent=agent, tools=tools, verbose=False)
-
-            # Prepare input parameters
-            input_params = {
-                "user_message": state.get("input_usuario", ""),
-                "id_user": state.get("id_user", ""),
-                **kwargs,
-            }
-
-            response = executor.invoke(input_params)["output"].strip()
+            mode = self._resolve_mode(use_tools)
+            with metrics.timer(PROMPT_BUILD_DURATION, agent=self.agent_name):
+                executor, input_params = self._prepare_invocation(state, kwargs, mode)
+            cache_key = self._cache_key(input_params, mode)
+            if cache_key is not None:
+                cached = get_response_cache().get(cache_key)
+                if cached is not None:
+                    self.logger.info(f"Agent {self.agent_name} served from cache")
+                    metrics.inc(LLM_CALLS, agent=self.agent_name, outcome="cache_hit")
+                    return cached
+
+            with metrics.timer(LLM_CALL_DURATION, agent=self.agent_name, mode=mode):
+                result = await executor.ainvoke(
+                    input_params, config=self._invoke_config(stream)
+                )
+            metrics.inc(LLM_CALLS, agent=self.agent_name, outcome="ok")
+            response = self._output_text(result)
             self.logger.info(f"Agent {self.agent_name} executed successfully")
 
+            if cache_key is not None:
+                get_response_cache().set(cache_key, response)
             return response
 
         except Exception as e:
             self.logger.error(f"Error executing agent {self.agent_name}: {e}")
+            metrics.inc(LLM_CALLS, agent=self.agent_name, outcome="error")
             return self.get_fallback_response()
 
+    def execute_json(
+        self, state: ConversationState, stream: bool = False, **kwargs
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Run a tool-less completion whose output is parsed as a JSON object.
+
+        Args:
+            state: Current conversation state
+            stream: Whether tokens may be streamed to the user
+            **kwargs: Additional parameters for agent execution
+
+        Returns:
+            The parsed object, or ``None`` when the call or parsing fails
+        """
+        metrics = get_metrics()
+        agent = self.agent_name
+        try:
+            with metrics.timer(PROMPT_BUILD_DURATION, agent=agent):
+                executor, input_params = self._prepare_invocation(
+                    state, kwargs, MODE_JSON
+                )
+            with metrics.timer(LLM_CALL_DURATION, agent=agent, mode=MODE_JSON):
+                result = executor.invoke(
+                    input_params, config=self._invoke_config(stream)
+                )
+        except OutputParserException as e:
+            # Replies wrapped in prose are still recoverable
+            metrics.inc(LLM_CALLS, agent=agent, outcome="unparsed")
+            return extract_json_object(e.llm_output or "")
+        except Exception as e:
+            self.logger.error(f"Error executing agent {self.agent_name}: {e}")
+            metrics.inc(LLM_CALLS, agent=agent, outcome="error")
+            return None
+        metrics.inc(LLM_CALLS, agent=agent, outcome="ok")
+        return result if isinstance(result, dict) else None
+
+    async def aexecute_json(
+        self, state: ConversationState, stream: bool = False, **kwargs
+    ) -> Optional[Dict[str, Any]]:
+        """Async variant of :meth:`execute_json`."""
+        metrics = get_metrics()
+        agent = self.agent_name
+        try:
+            with metrics.timer(PROMPT_BUILD_DURATION, agent=agent):
+                executor, input_params = self._prepare_invocation(
+                    state, kwargs, MODE_JSON
+                )
+            with metrics.timer(LLM_CALL_DURATION, agent=agent, mode=MODE_JSON):
+                result = await executor.ainvoke(
+                    input_params, config=self._invoke_config(stream)
+                )
+        except OutputParserException as e:
+            metrics.inc(LLM_CALLS, agent=agent, outcome="unparsed")
+            return extract_json_object(e.llm_output or "")
+        except Exception as e:
+            self.logger.error(f"Error executing agent {self.agent_name}: {e}")
+            metrics.inc(LLM_CALLS, agent=agent, outcome="error")
+            return None
+        metrics.inc(LLM_CALLS, agent=agent, outcome="ok")
+        return result if isinstance(result, dict) else None
+
+    def attach_short_term_memory(self, state: ConversationState) -> ConversationState:
+        """
+        Attach this agent's short-term memory window to ``context_data``.
+
+        Args:
+            state: Current conversation state
+
+        Returns:
+            ConversationState: State with ``context_data.short_term_memory`` set
+        """
+        try:
+            memory = get_memory_service()
+            session_id = state.get("id_conversacion", "")
+            window = memory.get_window(self.agent_name, session_id)
+            context_data = state.get("context_data", {}) or {}
+            context_data["short_term_memory"] = window
+            state = {**state, "context_data": context_data}
+        except Exception:
+            pass
+        return state
+
+    def remember_response(self, state: ConversationState, response: str) -> None:
+        """
+        Persist an assistant response in the session log under this agent.
+
+        Args:
+            state: Current conversation state
+            response: Assistant response to store
+        """
+        try:
+            if state.get("id_conversacion"):
+                get_memory_service().append(
+                    agent_name=self.agent_name,
+                    session_id=state["id_conversacion"],
+                    role="assistant",
+                    content=response,
+                )
+        except Exception:
+            pass
+
     @abstractmethod
     def get_fallback_response(self) -> str:
         """
@@ -172,6 +560,22 @@ class BaseAgent(ABC):
             state: Current conversation state
 
         Returns:
-            ConversationState: Updated conversation state
+            ConversationState: State update with only the fields this agent
+                changed; list fields are appended by the graph reducers
         """
         pass
+
+    async def aprocess(self, state: ConversationState) -> ConversationState:
+        """
+        Async variant of :meth:`process`.
+
+        Agents that call the LLM override this to await
+        :meth:`aexecute_agent`; the default suits agents without I/O.
+
+        Args:
+            state: Current conversation state
+
+        Returns:
+            ConversationState: State update (see :meth:`process`)
+        """
+        return self.process(state)
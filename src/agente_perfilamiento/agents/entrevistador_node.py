@@ -1,14 +1,15 @@
 """Entrevistador node for Agente_Perfilamiento."""
 
 import json
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-import re
 from typing import Any, Dict, List, Optional
 
 from langchain_core.tools import BaseTool
 
 from agente_perfilamiento.agents.base_agent import BaseAgent
+from agente_perfilamiento.agents.incremental_profiler import IncrementalProfiler
 from agente_perfilamiento.agents.tools.entity_tools import (
     get_entity_memory,
     upsert_entity_memory,
@@ -19,7 +20,68 @@ from agente_perfilamiento.domain.models.conversation_state import (
     apply_state_defaults,
 )
 from agente_perfilamiento.infrastructure.config.settings import settings
-from agente_perfilamiento.infrastructure.persistence.provider import get_memory_service
+from agente_perfilamiento.infrastructure.persistence.write_behind import (
+    get_write_behind_writer,
+)
+
+
+FINAL_TRIGGER = "<<FIN_ENTREVISTA>>"
+HANDOFF_MESSAGE = "Gracias. Voy a pasar tu perfil al analisis."
+
+ANSWER_TAGS_INSTRUCTION = (
+    "Ignora cualquier instrucción previa que te obligue a continuar la entrevista. "
+    "Evalúa únicamente la respuesta indicada y devuelve solo un JSON válido con las "
+    "etiquetas que activa, usando esta estructura (listas u objetos vacíos si no "
+    "activa ninguna). No incluyas texto adicional ni formato markdown."
+)
+ANSWER_TAGS_SCHEMA = json.dumps(
+    {
+        "dimensiones_mapeadas": {
+            "intereses": ["<tag>"],
+            "estilo_aprendizaje": ["<tag>"],
+            "competencias_tecnicas_iniciales": {"<competencia>": "<nivel>"},
+            "valores_aspiraciones": ["<tag>"],
+        },
+        "tags_acumulados_vector": {"<tag>": 1},
+    },
+    ensure_ascii=False,
+)
+
+
+@dataclass
+class _InterviewTurn:
+    """
+    Working data for a single interviewer turn.
+
+    ``conversation_history``, ``user_profile`` and ``messages`` are the
+    state's own (append-only) containers and are never modified here; this
+    turn's additions are kept apart and returned as a delta.
+    """
+
+    state: ConversationState
+    conversation_history: List[Dict[str, str]]
+    user_profile: Dict[str, Any]
+    current_question_index: int
+    ready_for_analysis: bool
+    summary_payload: Optional[Dict[str, Any]]
+    summary_path: Optional[str]
+    messages: List[Dict[str, str]]
+    new_history: List[Dict[str, str]] = field(default_factory=list)
+    new_answers: List[str] = field(default_factory=list)
+    stop_requested: bool = False
+    response: str = HANDOFF_MESSAGE
+
+    def full_history(self) -> List[Dict[str, str]]:
+        return [*self.conversation_history, *self.new_history]
+
+    def full_profile(self) -> Dict[str, Any]:
+        answers = self.user_profile.get("respuestas_test") or []
+        return {**self.user_profile, "respuestas_test": [*answers, *self.new_answers]}
+
+    def profiled_answers(self) -> int:
+        """Answers sent to incremental profiling (all but a closing request)."""
+        answers = len(self.full_profile()["respuestas_test"])
+        return answers - 1 if self.stop_requested and self.new_answers else answers
 
 
 class EntrevistadorAgent(BaseAgent):
@@ -28,6 +90,13 @@ class EntrevistadorAgent(BaseAgent):
     def __init__(self, max_questions: int = 15) -> None:
         super().__init__("entrevistador_agent")
         self.max_questions = max_questions
+        self.profiler: Optional[IncrementalProfiler] = (
+            IncrementalProfiler(
+                self._extract_answer_tags, max_workers=settings.profiler_max_workers
+            )
+            if settings.incremental_profiling
+            else None
+        )
 
     def get_tools(self) -> List[BaseTool]:
         # Puede leer memoria de conversación y actualizar/leer entidad
@@ -39,40 +108,73 @@ class EntrevistadorAgent(BaseAgent):
     def process(self, state: ConversationState) -> ConversationState:
         self.logger.info("Processing entrevistador node")
 
-        state = apply_state_defaults(state)
+        turn = self._start_turn(state)
 
-        conversation_history: List[Dict[str, str]] = list(
-            state.get("conversation_history") or []
-        )
+        if not turn.ready_for_analysis:
+            self._apply_interviewer_reply(turn, self.execute_agent(turn.state))
 
-        raw_profile: Dict[str, Any] = state.get("user_profile") or {}
-        user_profile: Dict[str, Any] = {
-            "respuestas_test": list(raw_profile.get("respuestas_test") or []),
-            "intereses": list(raw_profile.get("intereses") or []),
-            "valores": list(raw_profile.get("valores") or []),
-        }
-        for key, value in raw_profile.items():
-            if key not in user_profile:
-                user_profile[key] = value
+        if turn.ready_for_analysis and turn.summary_payload is None:
+            structured_profile = None
+            if self.profiler is not None:
+                structured_profile = self.profiler.collect(
+                    turn.state.get("id_conversacion", ""),
+                    timeout=settings.profiler_collect_timeout,
+                    expected_answers=turn.profiled_answers(),
+                )
+            if structured_profile is None:
+                structured_profile = self._generate_structured_profile(
+                    base_state=turn.state,
+                    conversation_history=turn.full_history(),
+                    user_profile=turn.full_profile(),
+                    assistant_messages=turn.messages,
+                )
+            self._close_interview(turn, structured_profile)
 
+        return self._finish_turn(turn)
+
+    async def aprocess(self, state: ConversationState) -> ConversationState:
+        """Async variant of :meth:`process`."""
+        self.logger.info("Processing entrevistador node")
+
+        turn = self._start_turn(state)
+
+        if not turn.ready_for_analysis:
+            ai_response = await self.aexecute_agent(turn.state)
+            self._apply_interviewer_reply(turn, ai_response)
+
+        if turn.ready_for_analysis and turn.summary_payload is None:
+            structured_profile = None
+            if self.profiler is not None:
+                structured_profile = await self.profiler.acollect(
+                    turn.state.get("id_conversacion", ""),
+                    timeout=settings.profiler_collect_timeout,
+                    expected_answers=turn.profiled_answers(),
+                )
+            if structured_profile is None:
+                structured_profile = await self._agenerate_structured_profile(
+                    base_state=turn.state,
+                    conversation_history=turn.full_history(),
+                    user_profile=turn.full_profile(),
+                    assistant_messages=turn.messages,
+                )
+            self._close_interview(turn, structured_profile)
+
+        return self._finish_turn(turn)
+
+    def _start_turn(self, state: ConversationState) -> "_InterviewTurn":
+        """Register the user's answer and decide whether the interview is over."""
+        state = apply_state_defaults(state)
         current_question_index = int(state.get("current_question_index") or 0)
 
         # Attach short-term memory window to context
-        try:
-            memory = get_memory_service()
-            session_id = state.get("id_conversacion", "")
-            window = memory.get_window(self.agent_name, session_id)
-            context_data = state.get("context_data", {}) or {}
-            context_data["short_term_memory"] = window
-            state = {**state, "context_data": context_data}
-        except Exception:
-            pass
+        state = self.attach_short_term_memory(state)
 
+        new_history: List[Dict[str, str]] = []
+        new_answers: List[str] = []
         user_input = (state.get("input_usuario") or "").strip()
         if user_input:
-            conversation_history.append({"role": "user", "content": user_input})
-            user_profile.setdefault("respuestas_test", [])
-            user_profile["respuestas_test"].append(user_input)
+            new_history.append({"role": "user", "content": user_input})
+            new_answers.append(user_input)
             current_question_index += 1
 
         farewell_keywords = ["terminar", "fin", "listo", "basta", "suficiente"]
@@ -85,68 +187,92 @@ class EntrevistadorAgent(BaseAgent):
             current_question_index >= self.max_questions
         )
 
-        summary_payload: Optional[Dict[str, Any]] = state.get("interview_summary")
-        summary_path: Optional[str] = state.get("interview_summary_path")
-
-        final_trigger = "<<FIN_ENTREVISTA>>"
-
-        if not ready_for_analysis:
-            ai_response = self.execute_agent(state)
-            if final_trigger in ai_response:
-                ready_for_analysis = True
-                ai_response = ai_response.replace(final_trigger, "").strip()
-            response = ai_response or "Gracias. Voy a pasar tu perfil al analisis."
-        else:
-            response = "Gracias. Voy a pasar tu perfil al analisis."
-
         messages = state.get("mensajes_previos", []) or []
-        structured_profile: Optional[Dict[str, Any]] = None
-
-        if ready_for_analysis and summary_payload is None:
-            structured_profile = self._generate_structured_profile(
-                base_state=state,
-                conversation_history=conversation_history,
-                user_profile=user_profile,
-                assistant_messages=messages,
+        if user_input and not stop_requested and self.profiler is not None:
+            self.profiler.submit(
+                state.get("id_conversacion", ""),
+                question=self._last_assistant_message(messages),
+                answer=user_input,
             )
-            summary_payload = self._build_summary_payload(
-                state=state,
-                conversation_history=conversation_history,
-                user_profile=user_profile,
-                question_index=current_question_index,
-                structured_profile=structured_profile,
-            )
-            summary_path = self._persist_summary(summary_payload)
-            response = "Gracias. Voy a pasar tu perfil al analisis."
-
-        messages.append({"role": "assistant", "content": response})
-
-        try:
-            if state.get("id_conversacion"):
-                get_memory_service().append_and_get_window(
-                    agent_name=self.agent_name,
-                    session_id=state["id_conversacion"],
-                    role="assistant",
-                    content=response,
-                )
-                get_memory_service().append_and_get_window(
-                    agent_name="session_agent",
-                    session_id=state["id_conversacion"],
-                    role="assistant",
-                    content=response,
+
+        return _InterviewTurn(
+            state=state,
+            conversation_history=state["conversation_history"],
+            user_profile=state["user_profile"],
+            current_question_index=current_question_index,
+            ready_for_analysis=ready_for_analysis,
+            summary_payload=state.get("interview_summary"),
+            summary_path=state.get("interview_summary_path"),
+            messages=messages,
+            new_history=new_history,
+            new_answers=new_answers,
+            stop_requested=stop_requested,
+        )
+
+    @staticmethod
+    def _last_assistant_message(messages: List[Dict[str, str]]) -> str:
+        for message in reversed(messages):
+            if isinstance(message, dict) and message.get("role") == "assistant":
+                return message.get("content", "")
+        return ""
+
+    def _extract_answer_tags(
+        self, question: str, answer: str
+    ) -> Optional[Dict[str, Any]]:
+        """Tag a single answer; runs on the profiler's background threads."""
+        payload = json.dumps(
+            {"pregunta": question, "respuesta": answer}, ensure_ascii=False
+        )
+        return self.execute_json(
+            {
+                "input_usuario": (
+                    f"{ANSWER_TAGS_INSTRUCTION}\n"
+                    f"Formato esperado:\n{ANSWER_TAGS_SCHEMA}\n\n"
+                    f"Datos de referencia:\n{payload}"
                 )
-        except Exception:
-            pass
+            },
+            stream=False,
+        )
+
+    def _apply_interviewer_reply(
+        self, turn: "_InterviewTurn", ai_response: str
+    ) -> None:
+        if FINAL_TRIGGER in ai_response:
+            turn.ready_for_analysis = True
+            ai_response = ai_response.replace(FINAL_TRIGGER, "").strip()
+        turn.response = ai_response or HANDOFF_MESSAGE
 
+    def _close_interview(
+        self,
+        turn: "_InterviewTurn",
+        structured_profile: Optional[Dict[str, Any]],
+    ) -> None:
+        if structured_profile is not None and not structured_profile.get(
+            "perfil_nombre"
+        ):
+            structured_profile["perfil_nombre"] = turn.state.get("id_user") or ""
+        turn.summary_payload = self._build_summary_payload(
+            state=turn.state,
+            conversation_history=turn.full_history(),
+            user_profile=turn.full_profile(),
+            question_index=turn.current_question_index,
+            structured_profile=structured_profile,
+        )
+        turn.summary_path = self._persist_summary(turn.summary_payload)
+        turn.response = HANDOFF_MESSAGE
+
+    def _finish_turn(self, turn: "_InterviewTurn") -> ConversationState:
+        self.remember_response(turn.state, turn.response)
+
+        # Only the delta; the graph reducers append the lists
         return {
-            **state,
-            "mensajes_previos": messages,
-            "conversation_history": conversation_history,
-            "user_profile": user_profile,
-            "current_question_index": current_question_index,
-            "ready_for_analysis": ready_for_analysis,
-            "interview_summary": summary_payload,
-            "interview_summary_path": summary_path,
+            "mensajes_previos": [{"role": "assistant", "content": turn.response}],
+            "conversation_history": turn.new_history,
+            "user_profile": {"respuestas_test": turn.new_answers},
+            "current_question_index": turn.current_question_index,
+            "ready_for_analysis": turn.ready_for_analysis,
+            "interview_summary": turn.summary_payload,
+            "interview_summary_path": turn.summary_path,
             "next_node": None,
         }
 
@@ -159,6 +285,44 @@ class EntrevistadorAgent(BaseAgent):
     ) -> Optional[Dict[str, Any]]:
         """Ask the interviewer LLM for the structured JSON profile."""
 
+        summary_state = self._build_structured_profile_state(
+            base_state, conversation_history, user_profile, assistant_messages
+        )
+        if summary_state is None:
+            return None
+
+        # The JSON profile is internal and needs no tools: single completion,
+        # kept out of the user token stream
+        return self._check_structured_profile(
+            self.execute_json(summary_state, stream=False)
+        )
+
+    async def _agenerate_structured_profile(
+        self,
+        base_state: ConversationState,
+        conversation_history: List[Dict[str, str]],
+        user_profile: Dict[str, Any],
+        assistant_messages: List[Dict[str, str]],
+    ) -> Optional[Dict[str, Any]]:
+        """Async variant of :meth:`_generate_structured_profile`."""
+
+        summary_state = self._build_structured_profile_state(
+            base_state, conversation_history, user_profile, assistant_messages
+        )
+        if summary_state is None:
+            return None
+
+        return self._check_structured_profile(
+            await self.aexecute_json(summary_state, stream=False)
+        )
+
+    def _build_structured_profile_state(
+        self,
+        base_state: ConversationState,
+        conversation_history: List[Dict[str, str]],
+        user_profile: Dict[str, Any],
+        assistant_messages: List[Dict[str, str]],
+    ) -> Optional[ConversationState]:
         if not conversation_history:
             return None
 
@@ -194,18 +358,23 @@ class EntrevistadorAgent(BaseAgent):
             indent=2,
         )
 
-        summary_state = {
+        return {
             **base_state,
-            "input_usuario": (
-                f"{summary_instruction}\n"
-                f"Formato esperado:\n{schema_hint}\n\n"
-                f"Datos de referencia:\n"
-                + json.dumps(summary_input, ensure_ascii=False)
+            # The transcript already holds the answers; drop duplicates first
+            "input_usuario": self.render_payload(
+                summary_input,
+                trim_paths=[("user_profile", "respuestas_test"), ("transcript",)],
+                prefix=(
+                    f"{summary_instruction}\n"
+                    f"Formato esperado:\n{schema_hint}\n\n"
+                    f"Datos de referencia:\n"
+                ),
             ),
         }
 
-        response = self.execute_agent(summary_state)
-        structured = self._extract_json_block(response)
+    def _check_structured_profile(
+        self, structured: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
         if not structured:
             self.logger.warning("Entrevistador agent did not return parsable structured profile")
         return structured
@@ -233,22 +402,6 @@ class EntrevistadorAgent(BaseAgent):
 
         return transcript
 
-    @staticmethod
-    def _extract_json_block(text: str) -> Optional[Dict[str, Any]]:
-        if not text:
-            return None
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            match = re.search(r"\{.*\}", text, re.DOTALL)
-            if match:
-                candidate = match.group(0)
-                try:
-                    return json.loads(candidate)
-                except json.JSONDecodeError:
-                    return None
-        return None
-
     def _build_summary_payload(
         self,
         state: ConversationState,
@@ -270,8 +423,7 @@ class EntrevistadorAgent(BaseAgent):
         return payload
 
     def _persist_summary(self, payload: Dict[str, Any]) -> str:
-        base_dir = Path(settings.data_dir) / "interviews"
-        base_dir.mkdir(parents=True, exist_ok=True)
+        base_dir = Path(settings.interviews_dir)
 
         user_id = payload.get("id_user") or "unknown"
         session_id = payload.get("session_id") or "session"
@@ -279,10 +431,10 @@ class EntrevistadorAgent(BaseAgent):
         filename = f"{user_id}_{session_id}_{timestamp}.json"
         path = base_dir / filename
 
-        with path.open("w", encoding="utf-8") as handle:
-            json.dump(payload, handle, ensure_ascii=False, indent=2)
+        # Written by the background persistence worker, off the turn path
+        get_write_behind_writer().write_json(path, payload)
 
-        self.logger.info("Saved interview summary at %s", path)
+        self.logger.info("Queued interview summary at %s", path)
         return str(path)
 
 
@@ -291,3 +443,7 @@ entrevistador_agent = EntrevistadorAgent()
 
 def entrevistador_node(state: ConversationState) -> ConversationState:
     return entrevistador_agent.process(state)
+
+
+async def aentrevistador_node(state: ConversationState) -> ConversationState:
+    return await entrevistador_agent.aprocess(state)
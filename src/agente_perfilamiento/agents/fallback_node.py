@@ -11,12 +11,14 @@ from langchain_core.tools import BaseTool
 
 from agente_perfilamiento.agents.base_agent import BaseAgent
 from agente_perfilamiento.domain.models.conversation_state import ConversationState
-from agente_perfilamiento.infrastructure.persistence.provider import get_memory_service
 
 
 class FallbackAgent(BaseAgent):
     """Agent class for handling fallback situations and errors."""
 
+    # Fallback replies for the same context are interchangeable
+    cacheable = True
+
     def __init__(self):
         super().__init__("fallback_agent")
 
@@ -37,21 +39,13 @@ class FallbackAgent(BaseAgent):
             state: Current conversation state
 
         Returns:
-            ConversationState: Updated conversation state with fallback response
+            ConversationState: State update with fallback response
         """
         self.logger.info("Processing fallback node")
 
         try:
             # Fetch short-term memory window and attach to context
-            try:
-                memory = get_memory_service()
-                session_id = state.get("id_conversacion", "")
-                window = memory.get_window(self.agent_name, session_id)
-                context_data = state.get("context_data", {}) or {}
-                context_data["short_term_memory"] = window
-                state = {**state, "context_data": context_data}
-            except Exception:
-                pass
+            state = self.attach_short_term_memory(state)
 
             # Execute the agent to get a contextual fallback response
             response = self.execute_agent(state)
@@ -61,34 +55,34 @@ class FallbackAgent(BaseAgent):
             self.logger.error(f"Error in fallback agent: {e}")
             response = self.get_fallback_response()
 
-        # Update conversation history
-        messages = state.get("mensajes_previos", [])
-        messages.append({"role": "assistant", "content": response})
+        return self._complete_turn(state, response)
+
+    async def aprocess(self, state: ConversationState) -> ConversationState:
+        """Async variant of :meth:`process`."""
+        self.logger.info("Processing fallback node")
 
-        # Persist assistant response in short-term memory
         try:
-            if state.get("id_conversacion"):
-                get_memory_service().append_and_get_window(
-                    agent_name=self.agent_name,
-                    session_id=state["id_conversacion"],
-                    role="assistant",
-                    content=response,
-                )
-                # Session-wide stream for full summaries
-                get_memory_service().append_and_get_window(
-                    agent_name="session_agent",
-                    session_id=state["id_conversacion"],
-                    role="assistant",
-                    content=response,
-                )
-        except Exception:
-            pass
+            state = self.attach_short_term_memory(state)
+            response = await self.aexecute_agent(state)
+            self.logger.info("Fallback response generated successfully")
+
+        except Exception as e:
+            self.logger.error(f"Error in fallback agent: {e}")
+            response = self.get_fallback_response()
+
+        return self._complete_turn(state, response)
+
+    def _complete_turn(
+        self, state: ConversationState, response: str
+    ) -> ConversationState:
+        # Persist assistant response in short-term memory
+        self.remember_response(state, response)
 
         self.logger.debug("Fallback node processing completed")
 
+        # Only the delta; the graph appends the message to the history
         return {
-            **state,
-            "mensajes_previos": messages,
+            "mensajes_previos": [{"role": "assistant", "content": response}],
             "fallback_triggered": True,
             "next_node": None,  # End conversation or let router decide
         }
@@ -106,6 +100,11 @@ def fallback_node(state: ConversationState) -> ConversationState:
         state: Current conversation state
 
     Returns:
-        Updated conversation state with fallback response
+        State update with fallback response
     """
     return fallback_agent.process(state)
+
+
+async def afallback_node(state: ConversationState) -> ConversationState:
+    """Async function wrapper for the fallback agent."""
+    return await fallback_agent.aprocess(state)
@@ -12,7 +12,6 @@ from langchain_core.tools import BaseTool
 from agente_perfilamiento.agents.base_agent import BaseAgent
 from agente_perfilamiento.agents.tools.memory_tools import save_conversation_memory
 from agente_perfilamiento.domain.models.conversation_state import ConversationState
-from agente_perfilamiento.infrastructure.persistence.provider import get_memory_service
 
 
 class FinalAgent(BaseAgent):
@@ -37,52 +36,38 @@ class FinalAgent(BaseAgent):
             state: Current conversation state
 
         Returns:
-            ConversationState: Updated conversation state with final response
+            ConversationState: State update with final response
         """
         self.logger.info("Processing final node")
 
         # Fetch short-term memory window for this agent/session and attach to context
-        try:
-            memory = get_memory_service()
-            session_id = state.get("id_conversacion", "")
-            window = memory.get_window(self.agent_name, session_id)
-            context_data = state.get("context_data", {}) or {}
-            context_data["short_term_memory"] = window
-            state = {**state, "context_data": context_data}
-        except Exception:
-            pass
+        state = self.attach_short_term_memory(state)
 
         # Execute the agent to get closing response
         response = self.execute_agent(state)
 
-        # Update conversation history
-        messages = state.get("mensajes_previos", [])
-        messages.append({"role": "assistant", "content": response})
+        return self._complete_turn(state, response)
 
+    async def aprocess(self, state: ConversationState) -> ConversationState:
+        """Async variant of :meth:`process`."""
+        self.logger.info("Processing final node")
+
+        state = self.attach_short_term_memory(state)
+        response = await self.aexecute_agent(state)
+
+        return self._complete_turn(state, response)
+
+    def _complete_turn(
+        self, state: ConversationState, response: str
+    ) -> ConversationState:
         # Persist assistant response in short-term memory
-        try:
-            if state.get("id_conversacion"):
-                get_memory_service().append_and_get_window(
-                    agent_name=self.agent_name,
-                    session_id=state["id_conversacion"],
-                    role="assistant",
-                    content=response,
-                )
-                # Session-wide stream for full summaries
-                get_memory_service().append_and_get_window(
-                    agent_name="session_agent",
-                    session_id=state["id_conversacion"],
-                    role="assistant",
-                    content=response,
-                )
-        except Exception:
-            pass
+        self.remember_response(state, response)
 
         self.logger.debug("Final node processing completed")
 
+        # Only the delta; the graph appends the message to the history
         return {
-            **state,
-            "mensajes_previos": messages,
+            "mensajes_previos": [{"role": "assistant", "content": response}],
             "conversation_finished": True,
             "next_node": "memory",  # Proceed to memory node to save conversation
         }
@@ -100,6 +85,11 @@ def final_node(state: ConversationState) -> ConversationState:
         state: Current conversation state
 
     Returns:
-        Updated conversation state with final response
+        State update with final response
     """
     return final_agent.process(state)
+
+
+async def afinal_node(state: ConversationState) -> ConversationState:
+    """Async function wrapper for the final agent."""
+    return await final_agent.aprocess(state)
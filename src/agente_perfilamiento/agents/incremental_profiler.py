@@ -0,0 +1,246 @@
+"""
+Incremental structured profiling for the interviewer agent.
+
+Each answer is sent to a small tag-extraction call on a background thread
+pool, so the per-answer tags are already extracted when the interview ends
+instead of being generated from the whole transcript on the closing turn.
+The tags are merged in the order the answers were given. Sessions live in
+this process only: a profile that does not cover every answer of the
+interview (evicted session, restart, another worker) is not returned.
+"""
+
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from agente_perfilamiento.infrastructure.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+# (question, answer) -> partial structured profile, or None on failure
+ExtractFn = Callable[[str, str], Optional[Dict[str, Any]]]
+
+LIST_DIMENSIONS = ("intereses", "estilo_aprendizaje", "valores_aspiraciones")
+LEVEL_DIMENSION = "competencias_tecnicas_iniciales"
+
+
+def empty_profile() -> Dict[str, Any]:
+    """Structured profile skeleton expected by the analista agent."""
+    return {
+        "perfil_nombre": "",
+        "dimensiones_mapeadas": {
+            "intereses": [],
+            "estilo_aprendizaje": [],
+            LEVEL_DIMENSION: {},
+            "valores_aspiraciones": [],
+        },
+        "tags_acumulados_vector": {},
+        "Resumen": {},
+    }
+
+
+def merge_profile_delta(profile: Dict[str, Any], delta: Dict[str, Any]) -> None:
+    """Accumulate the tags of one answer into ``profile`` in place."""
+    dimensions = profile["dimensiones_mapeadas"]
+    new_dimensions = delta.get("dimensiones_mapeadas") or {}
+    if isinstance(new_dimensions, dict):
+        for key in LIST_DIMENSIONS:
+            entries = new_dimensions.get(key) or []
+            for tag in entries if isinstance(entries, list) else []:
+                if isinstance(tag, str) and tag not in dimensions[key]:
+                    dimensions[key].append(tag)
+        levels = new_dimensions.get(LEVEL_DIMENSION) or {}
+        if isinstance(levels, dict):
+            # The latest answer is the most informed estimate of a level
+            dimensions[LEVEL_DIMENSION].update(levels)
+
+    vector = profile["tags_acumulados_vector"]
+    new_vector = delta.get("tags_acumulados_vector") or {}
+    if isinstance(new_vector, dict):
+        for tag, score in new_vector.items():
+            try:
+                increment = int(score)
+            except (TypeError, ValueError):
+                increment = 1
+            vector[tag] = vector.get(tag, 0) + max(increment, 0)
+
+
+@dataclass
+class _SessionProfile:
+    # Extraction result per submitted answer, in submission order
+    deltas: List[Optional[Dict[str, Any]]] = field(default_factory=list)
+    pending: List[Future] = field(default_factory=list)
+    failed: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class IncrementalProfiler:
+    """Runs per-answer tag extraction in the background, keyed by session."""
+
+    def __init__(
+        self, extract: ExtractFn, max_workers: int = 4, max_sessions: int = 1024
+    ) -> None:
+        self._extract = extract
+        self._max_workers = max_workers
+        self._max_sessions = max_sessions
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._sessions: "OrderedDict[str, _SessionProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_workers, thread_name_prefix="profiler"
+            )
+        return self._executor
+
+    def submit(self, session_id: str, question: str, answer: str) -> None:
+        """Queue the extraction of one answer for ``session_id``."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _SessionProfile()
+                # Abandoned interviews must not accumulate forever
+                while len(self._sessions) > self._max_sessions:
+                    self._sessions.popitem(last=False)
+            with session.lock:
+                index = len(session.deltas)
+                session.deltas.append(None)
+            future = self._get_executor().submit(
+                self._run, session, index, question, answer
+            )
+            session.pending.append(future)
+
+    def _run(
+        self, session: _SessionProfile, index: int, question: str, answer: str
+    ) -> None:
+        try:
+            delta = self._extract(question, answer)
+        except Exception as e:
+            logger.error(f"Incremental profiling failed: {e}")
+            delta = None
+        with session.lock:
+            if delta is None:
+                session.failed += 1
+            else:
+                session.deltas[index] = delta
+
+    def _pop(self, session_id: str) -> Optional[_SessionProfile]:
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+
+    @staticmethod
+    def _missing_answers(
+        session: _SessionProfile, expected_answers: Optional[int]
+    ) -> bool:
+        """Whether some answer is already known not to be profiled."""
+        with session.lock:
+            if session.failed:
+                return True
+            return expected_answers is not None and (
+                len(session.deltas) != expected_answers
+            )
+
+    @classmethod
+    def _give_up(
+        cls,
+        session_id: str,
+        session: _SessionProfile,
+        expected_answers: Optional[int],
+    ) -> Optional[Dict[str, Any]]:
+        # The caller falls back right away instead of waiting on extractions
+        # whose profile would be discarded anyway
+        for future in session.pending:
+            future.cancel()
+        return cls._result(session_id, session, 0, expected_answers)
+
+    @staticmethod
+    def _result(
+        session_id: str,
+        session: _SessionProfile,
+        not_done: int,
+        expected_answers: Optional[int],
+    ) -> Optional[Dict[str, Any]]:
+        with session.lock:
+            deltas = list(session.deltas)
+            failed = session.failed
+        if expected_answers is not None and len(deltas) != expected_answers:
+            logger.warning(
+                f"Incremental profile for {session_id} covers {len(deltas)} "
+                f"of {expected_answers} answers"
+            )
+            return None
+        if not_done or failed:
+            logger.warning(
+                f"Incremental profile for {session_id} incomplete "
+                f"(pending={not_done}, failed={failed})"
+            )
+            return None
+        profile = empty_profile()
+        for delta in deltas:
+            merge_profile_delta(profile, delta or {})
+        if not profile["tags_acumulados_vector"]:
+            return None
+        return profile
+
+    def collect(
+        self,
+        session_id: str,
+        timeout: float,
+        expected_answers: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Wait for the session's pending extractions and return its profile.
+
+        Args:
+            session_id: Interview session
+            timeout: Seconds to wait for extractions still running
+            expected_answers: Answers the interview holds; a session that
+                profiled a different number of them is not used
+
+        Returns:
+            The accumulated profile, or ``None`` when some answer could not
+            be profiled (the caller then builds the profile in one call)
+        """
+        session = self._pop(session_id)
+        if session is None:
+            return None
+        if self._missing_answers(session, expected_answers):
+            return self._give_up(session_id, session, expected_answers)
+        _, not_done = wait(session.pending, timeout=timeout)
+        for future in not_done:
+            future.cancel()
+        return self._result(session_id, session, len(not_done), expected_answers)
+
+    async def acollect(
+        self,
+        session_id: str,
+        timeout: float,
+        expected_answers: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Async variant of :meth:`collect` that does not block the loop."""
+        session = self._pop(session_id)
+        if session is None:
+            return None
+        if self._missing_answers(session, expected_answers):
+            return self._give_up(session_id, session, expected_answers)
+        if session.pending:
+            _, not_done = await asyncio.wait(
+                [asyncio.wrap_future(f) for f in session.pending], timeout=timeout
+            )
+        else:
+            not_done = set()
+        for future in not_done:
+            future.cancel()
+        return self._result(session_id, session, len(not_done), expected_answers)
+
+    def discard(self, session_id: str) -> None:
+        self._pop(session_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
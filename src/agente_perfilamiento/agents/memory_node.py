@@ -21,11 +21,16 @@ from agente_perfilamiento.adapters.file_long_term_repository import (
     FileLongTermMemoryRepository,
 )
 from agente_perfilamiento.domain.models.conversation_state import ConversationState
+from agente_perfilamiento.domain.services.memory_service import SESSION_AGENT
+from agente_perfilamiento.infrastructure.persistence.provider import get_memory_service
 
 
 class MemoryAgent(BaseAgent):
     """Agent class for handling conversation memory processing."""
 
+    # Summaries are stored, never shown to the user
+    stream_output = False
+
     def __init__(self):
         super().__init__("memory_agent")
 
@@ -45,57 +50,43 @@ class MemoryAgent(BaseAgent):
             state: Current conversation state
 
         Returns:
-            ConversationState: Updated conversation state after memory processing
+            ConversationState: State update after memory processing
         """
         self.logger.info("Processing memory node")
 
-        # Get conversation messages for summarization
-        messages = state.get("mensajes_previos", [])
         user_id = state.get("id_user", "")
 
         if user_id:
             try:
-                # Create a summary source from the session-wide memory window (full conversation)
-                conversation_text = ""
-                try:
-                    from agente_perfilamiento.infrastructure.memory.provider import (
-                        get_memory_service,
-                    )
-
-                    session_id = state.get("id_conversacion", "")
-                    full_window = (
-                        get_memory_service().get_window(
-                            agent_name="session_agent", session_id=session_id, limit=1000
-                        )
-                        if session_id
-                        else []
-                    )
-                    source = full_window if full_window else (messages or [])
-                except Exception:
-                    source = messages or []
-
-                for msg in source:
-                    role = msg.get("role", "unknown")
-                    content = msg.get("content", "")
-                    conversation_text += f"{role}: {content}\n"
+                conversation_text = self._build_conversation_text(state)
 
                 # Execute the agent to process and summarize the conversation
                 summary = self.execute_agent(state, conversation_text=conversation_text)
 
-                # Persist long-term summary with full state context (id_conversacion, fecha_inicio)
-                try:
-                    ltm = LongTermMemoryService(FileLongTermMemoryRepository())
-                    ltm.save_summary(
-                        {
-                            "id_user": user_id,
-                            "id_conversacion": state.get("id_conversacion", ""),
-                            "fecha_inicio": state.get("fecha_inicio", ""),
-                            "resumen": summary,
-                        }
-                    )
-                except Exception:
-                    pass
+                self._save_long_term_summary(state, summary)
+                self.logger.info("Memory processing completed successfully")
+
+            except Exception as e:
+                self.logger.error(f"Error in memory processing: {e}")
+                summary = "Error procesando memoria de conversación."
+        else:
+            summary = "No hay conversación para procesar."
+
+        return self._complete_turn(state, summary)
 
+    async def aprocess(self, state: ConversationState) -> ConversationState:
+        """Async variant of :meth:`process`."""
+        self.logger.info("Processing memory node")
+
+        user_id = state.get("id_user", "")
+
+        if user_id:
+            try:
+                conversation_text = self._build_conversation_text(state)
+                summary = await self.aexecute_agent(
+                    state, conversation_text=conversation_text
+                )
+                self._save_long_term_summary(state, summary)
                 self.logger.info("Memory processing completed successfully")
 
             except Exception as e:
@@ -104,10 +95,58 @@ class MemoryAgent(BaseAgent):
         else:
             summary = "No hay conversación para procesar."
 
+        return self._complete_turn(state, summary)
+
+    @staticmethod
+    def _build_conversation_text(state: ConversationState) -> str:
+        # Get conversation messages for summarization
+        messages = state.get("mensajes_previos", [])
+
+        # Create a summary source from the session-wide memory window
+        # (full conversation)
+        conversation_text = ""
+        try:
+            session_id = state.get("id_conversacion", "")
+            full_window = (
+                get_memory_service().get_window(
+                    agent_name=SESSION_AGENT, session_id=session_id, limit=1000
+                )
+                if session_id
+                else []
+            )
+            source = full_window if full_window else (messages or [])
+        except Exception:
+            source = messages or []
+
+        for msg in source:
+            role = msg.get("role", "unknown")
+            content = msg.get("content", "")
+            conversation_text += f"{role}: {content}\n"
+        return conversation_text
+
+    @staticmethod
+    def _save_long_term_summary(state: ConversationState, summary: str) -> None:
+        # Persist long-term summary with full state context
+        # (id_conversacion, fecha_inicio)
+        try:
+            ltm = LongTermMemoryService(FileLongTermMemoryRepository())
+            ltm.save_summary(
+                {
+                    "id_user": state.get("id_user", ""),
+                    "id_conversacion": state.get("id_conversacion", ""),
+                    "fecha_inicio": state.get("fecha_inicio", ""),
+                    "resumen": summary,
+                }
+            )
+        except Exception:
+            pass
+
+    def _complete_turn(
+        self, state: ConversationState, summary: str
+    ) -> ConversationState:
         self.logger.debug("Memory node processing completed")
 
         return {
-            **state,
             "memory_processed": True,
             "memory_summary": summary,
             "next_node": None,  # End of conversation flow
@@ -126,6 +165,11 @@ def memory_node(state: ConversationState) -> ConversationState:
         state: Current conversation state
 
     Returns:
-        Updated conversation state after memory processing
+        State update after memory processing
     """
     return memory_agent.process(state)
+
+
+async def amemory_node(state: ConversationState) -> ConversationState:
+    """Async function wrapper for the memory agent."""
+    return await memory_agent.aprocess(state)
@@ -99,7 +99,7 @@ class RouterAgent(BaseAgent):
             state: Current conversation state
 
         Returns:
-            ConversationState: Updated conversation state with routing decision
+            ConversationState: State update with routing decision
         """
         self.logger.info("Processing router node")
 
@@ -120,7 +120,8 @@ class RouterAgent(BaseAgent):
             self.logger.error(f"Error in router processing: {e}")
             next_route = "fallback"
 
-        # Append latest user input to the target agent's and session's short-term memory windows
+        # Log the user input once, tagged with the agent that will answer it;
+        # the session window is a view over the same log
         try:
             session_id = state.get("id_conversacion", "")
             user_input = state.get("input_usuario", "")
@@ -133,17 +134,8 @@ class RouterAgent(BaseAgent):
                     "final": "final_agent",
                     "fallback": "fallback_agent",
                 }
-                target_agent = target_agent_map.get(next_route)
-                if target_agent:
-                    get_memory_service().append_and_get_window(
-                        agent_name=target_agent,
-                        session_id=session_id,
-                        role="user",
-                        content=user_input,
-                    )
-                # Also keep a session-wide stream to enable full-conversation summaries
-                get_memory_service().append_and_get_window(
-                    agent_name="session_agent",
+                get_memory_service().append(
+                    agent_name=target_agent_map.get(next_route, self.agent_name),
                     session_id=session_id,
                     role="user",
                     content=user_input,
@@ -153,7 +145,7 @@ class RouterAgent(BaseAgent):
 
         self.logger.debug("Router node processing completed")
 
-        return {**state, "next_node": next_route}
+        return {"next_node": next_route}
 
 
 # Create instance and function wrapper for LangGraph compatibility
@@ -168,6 +160,11 @@ def router_node(state: ConversationState) -> ConversationState:
         state: Current conversation state
 
     Returns:
-        Updated conversation state with routing decision
+        State update with routing decision
     """
     return router_agent.process(state)
+
+
+async def arouter_node(state: ConversationState) -> ConversationState:
+    """Async function wrapper for the router agent (routing does no LLM I/O)."""
+    return await router_agent.aprocess(state)
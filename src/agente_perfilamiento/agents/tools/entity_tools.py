@@ -10,8 +10,8 @@ from langchain_core.tools import tool
 from agente_perfilamiento.domain.services.entity_memory_service import (
     EntityMemoryService,
 )
-from agente_perfilamiento.adapters.file_entity_repository import (
-    FileEntityMemoryRepository,
+from agente_perfilamiento.infrastructure.persistence.provider import (
+    get_entity_memory_service,
 )
 from agente_perfilamiento.infrastructure.logging.logger import get_logger
 
@@ -20,7 +20,7 @@ logger = get_logger(__name__)
 
 
 def _service() -> EntityMemoryService:
-    return EntityMemoryService(FileEntityMemoryRepository())
+    return get_entity_memory_service()
 
 
 @tool
@@ -13,7 +13,6 @@ from agente_perfilamiento.agents.base_agent import BaseAgent
 from agente_perfilamiento.agents.tools.memory_tools import get_conversation_memory
 from agente_perfilamiento.agents.tools.entity_tools import get_entity_memory
 from agente_perfilamiento.domain.models.conversation_state import ConversationState
-from agente_perfilamiento.infrastructure.persistence.provider import get_memory_service
 
 
 class WelcomeAgent(BaseAgent):
@@ -38,57 +37,47 @@ class WelcomeAgent(BaseAgent):
             state: Current conversation state
 
         Returns:
-            ConversationState: Updated conversation state with welcome response
+            ConversationState: State update with welcome response
         """
         self.logger.info("Processing welcome node")
 
         # Check if welcome has already been shown
         if state.get("saludo_mostrado"):
-            self.logger.debug("Welcome already shown, returning current state")
-            return state
+            self.logger.debug("Welcome already shown, nothing to update")
+            return {}
 
         # Fetch short-term memory window for this agent/session and attach to context
-        try:
-            memory = get_memory_service()
-            session_id = state.get("id_conversacion", "")
-            window = memory.get_window(self.agent_name, session_id)
-            context_data = state.get("context_data", {}) or {}
-            context_data["short_term_memory"] = window
-            state = {**state, "context_data": context_data}
-        except Exception:
-            pass
+        state = self.attach_short_term_memory(state)
 
         # Execute the agent to get response
         response = self.execute_agent(state)
 
-        # Update conversation history
-        messages = state.get("mensajes_previos", [])
-        messages.append({"role": "assistant", "content": response})
+        return self._complete_turn(state, response)
 
+    async def aprocess(self, state: ConversationState) -> ConversationState:
+        """Async variant of :meth:`process`."""
+        self.logger.info("Processing welcome node")
+
+        if state.get("saludo_mostrado"):
+            self.logger.debug("Welcome already shown, nothing to update")
+            return {}
+
+        state = self.attach_short_term_memory(state)
+        response = await self.aexecute_agent(state)
+
+        return self._complete_turn(state, response)
+
+    def _complete_turn(
+        self, state: ConversationState, response: str
+    ) -> ConversationState:
         # Persist assistant response in short-term memory
-        try:
-            if state.get("id_conversacion"):
-                get_memory_service().append_and_get_window(
-                    agent_name=self.agent_name,
-                    session_id=state["id_conversacion"],
-                    role="assistant",
-                    content=response,
-                )
-                # Session-wide stream for full summaries
-                get_memory_service().append_and_get_window(
-                    agent_name="session_agent",
-                    session_id=state["id_conversacion"],
-                    role="assistant",
-                    content=response,
-                )
-        except Exception:
-            pass
+        self.remember_response(state, response)
 
         self.logger.debug("Welcome node processing completed")
 
+        # Only the delta; the graph appends the message to the history
         return {
-            **state,
-            "mensajes_previos": messages,
+            "mensajes_previos": [{"role": "assistant", "content": response}],
             "saludo_mostrado": True,
             "next_node": None,  # Let router determine next step
         }
@@ -106,6 +95,11 @@ def welcome_node(state: ConversationState) -> ConversationState:
         state: Current conversation state
 
     Returns:
-        Updated conversation state with welcome response
+        State update with welcome response
     """
     return welcome_agent.process(state)
+
+
+async def awelcome_node(state: ConversationState) -> ConversationState:
+    """Async function wrapper for the welcome agent."""
+    return await welcome_agent.aprocess(state)
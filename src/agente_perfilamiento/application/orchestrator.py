@@ -5,22 +5,66 @@ This module contains the main graph construction logic that orchestrates
 conversation flow between different agent nodes following hexagonal architecture principles.
 """
 
+from typing import Callable, Optional
+
 from langchain_core.runnables import RunnableLambda
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import END, StateGraph
 
-from agente_perfilamiento.agents.fallback_node import fallback_node
-from agente_perfilamiento.agents.final_node import final_node
-from agente_perfilamiento.agents.memory_node import memory_node
-from agente_perfilamiento.agents.router_node import router_node
-from agente_perfilamiento.agents.welcome_node import welcome_node
-from agente_perfilamiento.agents.entrevistador_node import entrevistador_node
-from agente_perfilamiento.agents.analista_node import analista_node
+from agente_perfilamiento.agents.fallback_node import (
+    afallback_node,
+    fallback_agent,
+    fallback_node,
+)
+from agente_perfilamiento.agents.final_node import afinal_node, final_agent, final_node
+from agente_perfilamiento.agents.memory_node import (
+    amemory_node,
+    memory_agent,
+    memory_node,
+)
+from agente_perfilamiento.agents.router_node import (
+    arouter_node,
+    router_agent,
+    router_node,
+)
+from agente_perfilamiento.agents.welcome_node import (
+    awelcome_node,
+    welcome_agent,
+    welcome_node,
+)
+from agente_perfilamiento.agents.entrevistador_node import (
+    aentrevistador_node,
+    entrevistador_agent,
+    entrevistador_node,
+)
+from agente_perfilamiento.agents.analista_node import (
+    aanalista_node,
+    analista_agent,
+    analista_node,
+)
 from agente_perfilamiento.domain.models.conversation_state import ConversationState
+from agente_perfilamiento.infrastructure.persistence.checkpointer import (
+    create_checkpointer,
+)
 from agente_perfilamiento.infrastructure.logging.logger import get_logger
+from agente_perfilamiento.infrastructure.metrics.registry import (
+    NODE_DURATION,
+    NODE_ERRORS,
+    get_metrics,
+)
 
 logger = get_logger(__name__)
 
 
+def _node(name: str, func: Callable, afunc: Callable) -> RunnableLambda:
+    """Graph node runnable, timed per call when metrics are enabled."""
+    metrics = get_metrics()
+    if metrics.enabled:
+        func = metrics.wrap(func, NODE_DURATION, NODE_ERRORS, node=name)
+        afunc = metrics.wrap_async(afunc, NODE_DURATION, NODE_ERRORS, node=name)
+    return RunnableLambda(func, afunc=afunc, name=name)
+
+
 def create_agent_graph() -> StateGraph:
     """
     Creates and configures the LangGraph state graph for conversation orchestration.
@@ -36,14 +80,17 @@ def create_agent_graph() -> StateGraph:
     # Set entry point to router
     builder.set_entry_point("router")
 
-    # Add core nodes
-    builder.add_node("router", RunnableLambda(router_node))
-    builder.add_node("welcome", RunnableLambda(welcome_node))
-    builder.add_node("final", RunnableLambda(final_node))
-    builder.add_node("memory", RunnableLambda(memory_node))
-    builder.add_node("entrevistador", RunnableLambda(entrevistador_node))
-    builder.add_node("analista", RunnableLambda(analista_node))
-    builder.add_node("fallback", RunnableLambda(fallback_node))
+    # Add core nodes (sync for app.invoke, async for app.ainvoke)
+    builder.add_node("router", _node("router", router_node, arouter_node))
+    builder.add_node("welcome", _node("welcome", welcome_node, awelcome_node))
+    builder.add_node("final", _node("final", final_node, afinal_node))
+    builder.add_node("memory", _node("memory", memory_node, amemory_node))
+    builder.add_node(
+        "entrevistador",
+        _node("entrevistador", entrevistador_node, aentrevistador_node),
+    )
+    builder.add_node("analista", _node("analista", analista_node, aanalista_node))
+    builder.add_node("fallback", _node("fallback", fallback_node, afallback_node))
 
     # Add edges for conversation flow
     builder.add_edge("welcome", END)
@@ -71,19 +118,47 @@ def create_agent_graph() -> StateGraph:
     return builder
 
 
-def get_compiled_agent():
+def warm_up_agents() -> None:
+    """
+    Build the cached executors of every agent node ahead of the first turn.
+
+    Failures are logged and otherwise ignored; agents fall back to building
+    their executors lazily on first use.
+    """
+    agents = (
+        router_agent,
+        welcome_agent,
+        entrevistador_agent,
+        analista_agent,
+        final_agent,
+        memory_agent,
+        fallback_agent,
+    )
+    for agent in agents:
+        try:
+            agent.warm_up()
+        except Exception as e:
+            logger.warning(f"Could not warm up {agent.agent_name}: {e}")
+    logger.info("Agent executors warmed up")
+
+
+def get_compiled_agent(checkpointer: Optional[BaseCheckpointSaver] = None):
     """
     Creates and compiles the agent graph for execution.
 
+    Args:
+        checkpointer: Optional saver persisting the state of each conversation
+            under its ``id_conversacion`` thread, so turns only carry new input
+
     Returns:
         Compiled LangGraph agent ready for invocation
     """
     builder = create_agent_graph()
-    app = builder.compile()
+    app = builder.compile(checkpointer=checkpointer)
 
     logger.info("Agent graph compiled and ready for execution")
     return app
 
 
 # Create the compiled agent instance
-app = get_compiled_agent()
+app = get_compiled_agent(create_checkpointer())
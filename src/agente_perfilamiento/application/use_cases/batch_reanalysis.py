@@ -0,0 +1,185 @@
+"""
+Batch re-analysis of stored interviews.
+
+Streams the summaries in ``data/interviews/`` through ``AnalistaAgent`` with
+bounded concurrency and a request rate limit, appending one compact JSON
+line per interview to the output file. The output doubles as the progress
+checkpoint: interviews already analysed in it are skipped (failed ones are
+retried), so an interrupted run resumes where it stopped. Each prompt/model
+pair gets its own output file by default, so changing either starts a fresh
+run.
+
+Usage:
+    agente_perfilamiento reanalyze [--concurrency 4] [--rate 2] [--output PATH]
+
+Set ``LLM_PROVIDER=fake`` (or ``custom`` with a local ``LLM_BASE_URL``) to run
+it without a hosted model.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from agente_perfilamiento.agents.analista_node import (
+    RANKING_TOP_K,
+    AnalistaAgent,
+    analista_agent,
+)
+from agente_perfilamiento.infrastructure.config.settings import settings
+from agente_perfilamiento.infrastructure.llm.rate_limiter import AsyncRateLimiter
+from agente_perfilamiento.infrastructure.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def default_output_path(agent: AnalistaAgent) -> Path:
+    """``<analytics>/reanalysis/<model>-<prompt hash>.jsonl``"""
+    digest = hashlib.sha256(agent.load_prompt().encode("utf-8")).hexdigest()[:12]
+    model = f"{settings.llm_provider}-{settings.llm_model_name}".replace("/", "_")
+    return Path(settings.analytics_dir) / "reanalysis" / f"{model}-{digest}.jsonl"
+
+
+class BatchReanalysis:
+    """Re-run the analyst over every stored interview summary."""
+
+    def __init__(
+        self,
+        agent: AnalistaAgent,
+        interviews_dir: Optional[Path] = None,
+        output_path: Optional[Path] = None,
+        concurrency: int = 4,
+        rate_per_second: Optional[float] = None,
+    ) -> None:
+        self.agent = agent
+        self.interviews_dir = Path(interviews_dir or settings.interviews_dir)
+        self.output_path = Path(output_path or default_output_path(agent))
+        self.concurrency = max(1, concurrency)
+        self.limiter = AsyncRateLimiter(rate_per_second) if rate_per_second else None
+
+    def completed(self) -> Set[str]:
+        """Interview files already analysed successfully in the output."""
+        done: Set[str] = set()
+        try:
+            with self.output_path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn last line from an interrupted run
+                        continue
+                    # Failed analyses are retried; the latest line wins
+                    if record.get("fallback"):
+                        done.discard(record.get("source_file"))
+                    else:
+                        done.add(record.get("source_file"))
+        except FileNotFoundError:
+            pass
+        return done
+
+    def pending(self, done: Set[str]) -> Iterator[Tuple[Path, Dict[str, Any]]]:
+        for path in sorted(self.interviews_dir.glob("*.json")):
+            if path.name in done:
+                continue
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    yield path, json.load(f)
+            except Exception as e:
+                logger.warning(f"Skipping unreadable interview {path.name}: {e}")
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Analyse every interview not yet in the output.
+
+        Returns:
+            Counts of analysed, failed (fallback) and skipped interviews and
+            the elapsed seconds
+        """
+        started = time.perf_counter()
+        done = self.completed()
+        stats: Dict[str, Any] = {"analysed": 0, "fallback": 0, "skipped": len(done)}
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        # Bounded: summaries are read only as fast as workers take them
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        with self.output_path.open("a", encoding="utf-8") as out:
+
+            async def worker() -> None:
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        return
+                    path, summary = item
+                    try:
+                        record = await self._analyse(path, summary)
+                    except Exception as e:
+                        logger.error(f"Re-analysis of {path.name} failed: {e}")
+                        record = self._record(path, summary, None, True, str(e))
+                    line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+                    out.write(line + "\n")
+                    out.flush()
+                    stats["analysed"] += 1
+                    stats["fallback"] += record["fallback"]
+
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            try:
+                for item in self.pending(done):
+                    await queue.put(item)
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+                os.fsync(out.fileno())
+
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(f"Batch re-analysis finished: {stats}")
+        return stats
+
+    async def _analyse(self, path: Path, summary: Dict[str, Any]) -> Dict[str, Any]:
+        if self.limiter is not None:
+            await self.limiter.acquire()
+        result = await self.agent.areanalyze({**summary, "summary_path": str(path)})
+        return self._record(
+            path,
+            summary,
+            result["career_ranking"],
+            result["fallback"],
+            result["response"],
+        )
+
+    @staticmethod
+    def _record(
+        path: Path,
+        summary: Dict[str, Any],
+        ranking: Optional[List[Dict[str, Any]]],
+        fallback: bool,
+        response: str,
+    ) -> Dict[str, Any]:
+        return {
+            "source_file": path.name,
+            "id_user": summary.get("id_user"),
+            "session_id": summary.get("session_id"),
+            "model": f"{settings.llm_provider}:{settings.llm_model_name}",
+            "fallback": fallback,
+            "career_ranking": (ranking or [])[:RANKING_TOP_K],
+            "response": response,
+        }
+
+
+def run_batch_reanalysis(
+    interviews_dir: Optional[Path] = None,
+    output_path: Optional[Path] = None,
+    concurrency: int = 4,
+    rate_per_second: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Run a batch re-analysis to completion with the shared analyst agent."""
+    batch = BatchReanalysis(
+        analista_agent, interviews_dir, output_path, concurrency, rate_per_second
+    )
+    logger.info(f"Re-analysing {batch.interviews_dir} into {batch.output_path}")
+    return asyncio.run(batch.run())
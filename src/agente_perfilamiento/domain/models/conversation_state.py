@@ -3,9 +3,46 @@ Domain model for conversation state management.
 
 This module defines the conversation state structure that maintains
 the context and flow of agent conversations following domain-driven design principles.
+
+Growing fields (message lists and the user profile) carry LangGraph reducers:
+nodes return only what changed in a turn and the graph appends it, so nodes
+never rebuild the history. Reducers return new containers and never modify
+their inputs, so states already handed to callers stay unchanged.
 """
 
-from typing import Any, Dict, List, Optional, TypedDict, cast
+from typing import Annotated, Any, Dict, List, Optional, TypedDict, cast
+
+# List fields of ``user_profile`` that only ever grow
+PROFILE_LIST_KEYS = ("respuestas_test", "intereses", "valores")
+
+
+def append_only(
+    left: Optional[List[Any]], right: Optional[List[Any]]
+) -> Optional[List[Any]]:
+    """Reducer for append-only lists: a new list of ``left`` then ``right``."""
+    if right is None:
+        return left
+    if not left:
+        return list(right)
+    return left + right
+
+
+def merge_profile(
+    left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """Reducer for ``user_profile``: list values are appended, others replaced."""
+    if right is None or right is left:
+        return left
+    if not left:
+        return dict(right)
+    merged = dict(left)
+    for key, value in right.items():
+        current = merged.get(key)
+        if isinstance(value, list) and isinstance(current, list):
+            merged[key] = append_only(current, value)
+        else:
+            merged[key] = value
+    return merged
 
 
 class ConversationState(TypedDict):
@@ -24,8 +61,8 @@ class ConversationState(TypedDict):
     input_usuario: str
     intencion: Optional[str]
 
-    # Conversation history
-    mensajes_previos: Optional[List[Dict[str, str]]]
+    # Conversation history (append-only)
+    mensajes_previos: Annotated[Optional[List[Dict[str, str]]], append_only]
     fecha_inicio: Optional[str]
 
     # Navigation and flow control
@@ -39,15 +76,27 @@ class ConversationState(TypedDict):
     context_data: Optional[Dict[str, Any]]
 
     # Interview + analysis workflow state (specialized agents)
-    conversation_history: Optional[List[Dict[str, Any]]]
-    user_profile: Optional[Dict[str, Any]]  # { "respuestas_test": [], "intereses": [], "valores": [] }
+    conversation_history: Annotated[Optional[List[Dict[str, Any]]], append_only]
+    # { "respuestas_test": [], "intereses": [], "valores": [] }
+    user_profile: Annotated[Optional[Dict[str, Any]], merge_profile]
     current_question_index: Optional[int]
     evaluation_complete: Optional[bool]
     agent_recommendations: Optional[Any]
     ready_for_analysis: Optional[bool]
     interview_summary: Optional[Dict[str, Any]]
     interview_summary_path: Optional[str]
+    career_ranking: Optional[List[Dict[str, Any]]]
+
+    # Per-node flags
+    saludo_mostrado: Optional[bool]
+    fallback_triggered: Optional[bool]
+    conversation_finished: Optional[bool]
+    memory_processed: Optional[bool]
+    memory_summary: Optional[str]
+
 
+# Fields reduced with ``append_only``: a new version only adds items at the end
+APPEND_ONLY_FIELDS = ("mensajes_previos", "conversation_history")
 
 # Default schema values (documentation/helper)
 DEFAULT_STATE_SCHEMA: Dict[str, Any] = {
@@ -63,30 +112,33 @@ DEFAULT_STATE_SCHEMA: Dict[str, Any] = {
     "ready_for_analysis": False,
     "interview_summary": None,
     "interview_summary_path": None,
+    "career_ranking": None,
 }
 
 
 def apply_state_defaults(state: ConversationState) -> ConversationState:
-    """Ensure extended workflow fields exist with sensible defaults."""
+    """
+    Ensure extended workflow fields exist with sensible defaults.
+
+    Existing lists are kept by reference (never copied), so the cost does
+    not depend on the conversation length.
+    """
 
     merged: Dict[str, Any] = dict(state)
 
-    if not merged.get("conversation_history"):
+    if not isinstance(merged.get("conversation_history"), list):
         merged["conversation_history"] = []
 
-    user_profile = merged.get("user_profile") or {}
+    user_profile = merged.get("user_profile")
     if not isinstance(user_profile, dict):
         user_profile = {}
-    merged_user_profile = {
-        "respuestas_test": list(user_profile.get("respuestas_test") or []),
-        "intereses": list(user_profile.get("intereses") or []),
-        "valores": list(user_profile.get("valores") or []),
-    }
-    # Preserve any other custom attributes users might have stored
-    for key, value in user_profile.items():
-        if key not in merged_user_profile:
-            merged_user_profile[key] = value
-    merged["user_profile"] = merged_user_profile
+    missing = [
+        key for key in PROFILE_LIST_KEYS if not isinstance(user_profile.get(key), list)
+    ]
+    if missing:
+        # Preserve any other custom attributes users might have stored
+        user_profile = {**user_profile, **{key: [] for key in missing}}
+    merged["user_profile"] = user_profile
 
     merged["current_question_index"] = int(merged.get("current_question_index") or 0)
     merged["evaluation_complete"] = bool(merged.get("evaluation_complete") or False)
@@ -94,5 +146,6 @@ def apply_state_defaults(state: ConversationState) -> ConversationState:
     merged.setdefault("ready_for_analysis", False)
     merged.setdefault("interview_summary", None)
     merged.setdefault("interview_summary_path", None)
+    merged.setdefault("career_ranking", None)
 
     return cast(ConversationState, merged)
@@ -2,19 +2,82 @@
 Domain models for short-term memory handling.
 """
 
-from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
 
 
-@dataclass
 class ShortTermMemoryItem:
-    agent_name: str
-    session_id: str
-    role: str
-    content: str
-    metadata: Optional[Dict[str, Any]] = None
-    created_at: datetime = field(default_factory=datetime.utcnow)
+    """
+    One short-term memory message.
+
+    Items are slotted: agent, session and role strings are interned so every
+    item of a session shares them, ``created_at`` is a float epoch and
+    metadata is kept as a tuple of pairs until someone asks for the dict.
+    """
+
+    __slots__ = (
+        "agent_name",
+        "session_id",
+        "role",
+        "content",
+        "created_at",
+        "metadata_items",
+        "_public",
+    )
+
+    def __init__(
+        self,
+        agent_name: str,
+        session_id: str,
+        role: str,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        created_at: Optional[float] = None,
+    ) -> None:
+        self.agent_name = sys.intern(agent_name)
+        self.session_id = sys.intern(session_id)
+        self.role = sys.intern(role)
+        self.content = content
+        self.created_at = time.time() if created_at is None else float(created_at)
+        self.metadata_items: Optional[Tuple[Tuple[str, Any], ...]] = (
+            tuple(metadata.items()) if metadata else None
+        )
+        self._public: Optional[Dict[str, Any]] = None
+
+    @property
+    def metadata(self) -> Optional[Dict[str, Any]]:
+        return dict(self.metadata_items) if self.metadata_items else None
+
+    @property
+    def created_datetime(self) -> datetime:
+        """Creation time as a naive UTC datetime."""
+        created = datetime.fromtimestamp(self.created_at, timezone.utc)
+        return created.replace(tzinfo=None)
+
+    def to_public_dict(self) -> Dict[str, Any]:
+        """
+        Window entry for this item, built on first use and then shared.
+
+        Callers must treat the returned dict as read-only.
+        """
+        if self._public is None:
+            self._public = {
+                "role": self.role,
+                "content": self.content,
+                "created_at": self.created_datetime.isoformat(),
+                "agent_name": self.agent_name,
+            }
+        return self._public
+
+    def __repr__(self) -> str:
+        return (
+            f"ShortTermMemoryItem(agent_name={self.agent_name!r}, "
+            f"session_id={self.session_id!r}, role={self.role!r}, "
+            f"content={self.content!r}, created_at={self.created_at!r})"
+        )
 
 
 @dataclass
@@ -0,0 +1,180 @@
+"""
+Deterministic career matching for the analista agent.
+
+The career dossiers (career name followed by its comma-separated key tags)
+are parsed once into a tag x career weight matrix. Soft/vocational tags
+weigh more than technical ones, since they are harder to acquire. A user's
+tag vector is scored against every career with a single matrix-vector
+product, so the LLM only has to narrate the resulting ranking.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from agente_perfilamiento.infrastructure.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Technical tags: learnable through courses, so they weigh less
+HARD_SKILL_TAGS = frozenset(
+    {
+        "python_java_javascript",
+        "ingenieria_software",
+        "seguridad_redes",
+        "gestion_riesgos_cumplimiento",
+        "sql_extraccion_datos",
+        "python_r_estadistica",
+        "investigacion_usuarios",
+        "prototipado_alta_fidelidad",
+        "figma_adobe_xd",
+        "certificacion_aws_gcp_azure",
+        "docker_kubernetes",
+        "infraestructura_como_codigo",
+        "hardware_software_troubleshooting",
+        "conocimiento_sistemas_operativos",
+        "certificacion_ccna",
+        "protocolos_tcp_ip",
+        "documentacion_tecnica",
+        "routing_switching",
+    }
+)
+SOFT_SKILL_WEIGHT = 2.0
+HARD_SKILL_WEIGHT = 1.0
+
+# Profile dimensions whose entries count as tags when no tag vector is given
+_PROFILE_TAG_DIMENSIONS = (
+    "intereses",
+    "estilo_aprendizaje",
+    "competencias_tecnicas_iniciales",
+    "valores_aspiraciones",
+)
+
+
+def normalize_tag(tag: str) -> str:
+    """Canonical tag form: lowercase ASCII words joined by underscores."""
+    text = unicodedata.normalize("NFKD", str(tag)).encode("ascii", "ignore").decode()
+    # Drop qualifiers such as "sql_extraccion_datos (nivel bajo)"
+    text = re.sub(r"\(.*?\)", "", text).strip().lower()
+    return re.sub(r"[^a-z0-9]+", "_", text).strip("_")
+
+
+def parse_dossiers(text: str) -> List[Tuple[str, List[str]]]:
+    """
+    Extract ``(career, tags)`` pairs from the dossier section of a prompt.
+
+    A dossier is a line of comma-separated tags preceded by the career name.
+    """
+    lines = [line.strip() for line in text.splitlines()]
+    dossiers: List[Tuple[str, List[str]]] = []
+    for index, line in enumerate(lines):
+        if index == 0 or line.count(",") < 2 or " " in line.replace(", ", ","):
+            continue
+        name = lines[index - 1]
+        if not name or "," in name or name.startswith("#"):
+            continue
+        tags = [normalize_tag(tag) for tag in line.split(",") if tag.strip()]
+        dossiers.append((name, tags))
+    return dossiers
+
+
+class CareerMatcher:
+    """Scores tag vectors against career dossiers with a weight matrix."""
+
+    def __init__(
+        self,
+        dossiers: List[Tuple[str, List[str]]],
+        soft_weight: float = SOFT_SKILL_WEIGHT,
+        hard_weight: float = HARD_SKILL_WEIGHT,
+    ) -> None:
+        if not dossiers:
+            raise ValueError("At least one career dossier is required")
+        self.careers = [name for name, _ in dossiers]
+        self.tags = sorted({tag for _, tags in dossiers for tag in tags})
+        self._tag_index = {tag: i for i, tag in enumerate(self.tags)}
+
+        weights = np.zeros((len(self.tags), len(self.careers)))
+        for column, (_, tags) in enumerate(dossiers):
+            for tag in tags:
+                weight = hard_weight if tag in HARD_SKILL_TAGS else soft_weight
+                weights[self._tag_index[tag], column] = weight
+        # Each column sums to 1 so a perfect match scores 100%
+        self._weights = weights / weights.sum(axis=0, keepdims=True)
+
+    def tag_vector(self, user_tags: Mapping[str, Any]) -> np.ndarray:
+        """Project user tag scores onto the known tags, scaled to [0, 1]."""
+        vector = np.zeros(len(self.tags))
+        for tag, value in user_tags.items():
+            index = self._tag_index.get(normalize_tag(tag))
+            if index is None:
+                continue
+            try:
+                vector[index] += max(float(value), 0.0)
+            except (TypeError, ValueError):
+                vector[index] += 1.0
+        peak = vector.max() if vector.size else 0.0
+        return vector / peak if peak > 0 else vector
+
+    def rank(
+        self, user_tags: Mapping[str, Any], top_k: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Rank careers for a user's tag scores.
+
+        Args:
+            user_tags: Mapping of tag to score (counts or weights)
+            top_k: Number of careers to return (all by default)
+
+        Returns:
+            Careers ordered by match with their percentage and the
+            contribution of each matching tag
+        """
+        vector = self.tag_vector(user_tags)
+        scores = self._weights.T @ vector
+        order = np.argsort(-scores, kind="stable")[:top_k]
+
+        ranking = []
+        for column in order:
+            contributions = self._weights[:, column] * vector
+            matched = np.nonzero(contributions)[0]
+            ranking.append(
+                {
+                    "carrera": self.careers[column],
+                    "match_pct": round(float(scores[column]) * 100, 1),
+                    "contribuciones": {
+                        self.tags[i]: round(float(contributions[i]) * 100, 1)
+                        for i in sorted(matched, key=lambda i: -contributions[i])
+                    },
+                }
+            )
+        return ranking
+
+
+def profile_tags(structured_profile: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    """
+    Collect the tag scores of an interviewer structured profile.
+
+    Uses ``tags_acumulados_vector`` when present and falls back to the tags
+    listed under ``dimensiones_mapeadas``.
+    """
+    if not isinstance(structured_profile, Mapping):
+        return {}
+    vector = structured_profile.get("tags_acumulados_vector")
+    if isinstance(vector, Mapping) and vector:
+        return dict(vector)
+
+    tags: Dict[str, Any] = {}
+    dimensions = structured_profile.get("dimensiones_mapeadas") or {}
+    if not isinstance(dimensions, Mapping):
+        return tags
+    for dimension in _PROFILE_TAG_DIMENSIONS:
+        entries = dimensions.get(dimension) or []
+        # Technical competences map competence -> level; only the key is a tag
+        for tag in entries if isinstance(entries, (list, Mapping)) else []:
+            if isinstance(tag, str):
+                tags[tag] = tags.get(tag, 0) + 1
+    return tags
@@ -2,13 +2,24 @@
 Application service for user entity memory (profile-like attributes).
 """
 
-from typing import Dict
+from typing import Any, Dict
 
 from agente_perfilamiento.ports.entity_memory_repository import (
     EntityMemoryRepository,
 )
 
 
+def deep_merge(current: Dict[str, Any], attributes: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge nested dicts key by key; any other value replaces the stored one."""
+    merged = dict(current)
+    for key, value in attributes.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
 class EntityMemoryService:
     def __init__(self, repository: EntityMemoryRepository) -> None:
         self._repo = repository
@@ -17,10 +28,13 @@ class EntityMemoryService:
         return self._repo.get(user_id)
 
     def upsert(self, user_id: str, attributes: Dict) -> None:
-        # Shallow merge by default
-        current = self._repo.get(user_id)
-        merged = {**current, **(attributes or {})}
-        self._repo.upsert(user_id, merged)
+        self._repo.update(
+            user_id, lambda current: deep_merge(current, attributes or {})
+        )
+
+    def flush(self) -> None:
+        """Write the profiles changed during the turn (called once per turn)."""
+        self._repo.flush()
 
     def clear(self, user_id: str) -> None:
         self._repo.clear(user_id)
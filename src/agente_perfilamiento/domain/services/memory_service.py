@@ -1,5 +1,9 @@
 """
 Application service for managing short-term memory windows.
+
+Each message is stored once in its session log, tagged with one agent.
+Agent windows are views of that log; the ``session_agent`` window is the
+whole conversation.
 """
 
 from __future__ import annotations
@@ -13,6 +17,9 @@ from agente_perfilamiento.infrastructure.logging.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Window name for the full session log across agents
+SESSION_AGENT = "session_agent"
+
 
 class MemoryService:
     def __init__(
@@ -27,15 +34,15 @@ class MemoryService:
         self._max_items = max_items_per_agent
         self._window_limit = window_limit
 
-    def append_and_get_window(
+    def append(
         self,
         agent_name: str,
         session_id: str,
         role: str,
         content: str,
         metadata: Optional[Dict[str, Any]] = None,
-        limit: Optional[int] = None,
-    ) -> List[Dict[str, Any]]:
+    ) -> None:
+        """Store a message once in the session log, tagged with ``agent_name``."""
         item = ShortTermMemoryItem(
             agent_name=agent_name,
             session_id=session_id,
@@ -46,8 +53,19 @@ class MemoryService:
         self._repo.save(item)
         self._repo.prune(agent_name, session_id, self._ttl_seconds, self._max_items)
 
+    def append_and_get_window(
+        self,
+        agent_name: str,
+        session_id: str,
+        role: str,
+        content: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        self.append(agent_name, session_id, role, content, metadata)
+
         window_limit = limit if limit is not None else self._window_limit
-        items = self._repo.get_recent(agent_name, session_id, window_limit)
+        items = self._repo.get_recent(self._view(agent_name), session_id, window_limit)
         result = [self._to_public_dict(i) for i in items]
         logger.debug(
             f"memory.append_and_get_window agent={agent_name} session={session_id} size={len(result)}"
@@ -58,22 +76,26 @@ class MemoryService:
         self, agent_name: str, session_id: str, limit: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         window_limit = limit if limit is not None else self._window_limit
-        items = self._repo.get_recent(agent_name, session_id, window_limit)
+        items = self._repo.get_recent(self._view(agent_name), session_id, window_limit)
         result = [self._to_public_dict(i) for i in items]
         logger.debug(
             f"memory.get_window agent={agent_name} session={session_id} size={len(result)}"
         )
         return result
 
+    def flush(self) -> None:
+        """Commit writes the repository buffers (called once per turn)."""
+        self._repo.flush()
+
     def clear_session(self, session_id: str) -> None:
         self._repo.clear_session(session_id)
         logger.info(f"memory.clear_session session={session_id}")
 
+    @staticmethod
+    def _view(agent_name: str) -> Optional[str]:
+        return None if agent_name == SESSION_AGENT else agent_name
+
     @staticmethod
     def _to_public_dict(item: ShortTermMemoryItem) -> Dict[str, Any]:
-        return {
-            "role": item.role,
-            "content": item.content,
-            "created_at": item.created_at.isoformat(),
-            "agent_name": item.agent_name,
-        }
+        # Cached on the item: repeated window reads reuse the same dicts
+        return item.to_public_dict()
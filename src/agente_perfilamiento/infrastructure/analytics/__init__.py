@@ -0,0 +1,3 @@
+"""
+Analytics exports built from persisted interview data.
+"""
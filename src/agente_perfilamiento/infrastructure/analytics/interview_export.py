@@ -0,0 +1,344 @@
+"""
+Columnar export of stored interviews for analytics.
+
+``data/interviews/`` holds one JSON document per finished interview. This
+module streams those files into three hive-partitioned Parquet datasets
+(partitioned by ``month`` of the interview) so reports read one dataset
+instead of re-parsing every file:
+
+- ``interviews``: one row per interview with the flattened ``user_profile``
+- ``dimensions``: one row per tag of ``structured_profile.dimensiones_mapeadas``
+- ``tags``: one row per entry of ``structured_profile.tags_acumulados_vector``
+
+Runs are incremental: exported file names are recorded in ``_exported.json``
+and only new interviews are read. Each run adds one part file per partition;
+``compact()`` folds them back into a single file per partition.
+
+Requires the ``extras`` dependencies (pyarrow, pandas).
+
+Usage:
+    python -m agente_perfilamiento.infrastructure.analytics.interview_export [--compact]
+"""
+
+import argparse
+import json
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from agente_perfilamiento.infrastructure.config.settings import settings
+from agente_perfilamiento.infrastructure.logging.logger import get_logger
+from agente_perfilamiento.infrastructure.persistence.write_behind import (
+    atomic_write_text,
+)
+
+logger = get_logger(__name__)
+
+STATE_FILE = "_exported.json"
+DATASETS = ("interviews", "dimensions", "tags")
+
+
+def _pyarrow() -> Tuple[Any, Any, Any]:
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError(
+            "Interview export needs pyarrow; install the 'extras' dependencies"
+        ) from e
+    return pa, ds, pq
+
+
+def _schemas() -> Dict[str, Any]:
+    pa = _pyarrow()[0]
+    keys = [
+        ("source_file", pa.string()),
+        ("id_user", pa.string()),
+        ("session_id", pa.string()),
+        ("created_at", pa.timestamp("us")),
+    ]
+    return {
+        "interviews": pa.schema(
+            keys
+            + [
+                ("current_question_index", pa.int32()),
+                ("respuestas_test", pa.list_(pa.string())),
+                ("n_respuestas", pa.int32()),
+                ("intereses", pa.list_(pa.string())),
+                ("valores", pa.list_(pa.string())),
+                ("perfil_nombre", pa.string()),
+                ("has_structured_profile", pa.bool_()),
+                ("month", pa.string()),
+            ]
+        ),
+        "dimensions": pa.schema(
+            keys
+            + [
+                ("dimension", pa.string()),
+                ("tag", pa.string()),
+                ("nivel", pa.string()),
+                ("month", pa.string()),
+            ]
+        ),
+        "tags": pa.schema(
+            keys
+            + [("tag", pa.string()), ("weight", pa.float64()), ("month", pa.string())]
+        ),
+    }
+
+
+def _strings(values: Any) -> List[str]:
+    if not isinstance(values, list):
+        return []
+    return [str(v) for v in values if v is not None]
+
+
+def _mapping(value: Any) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else {}
+
+
+def _int32(value: Any) -> Optional[int]:
+    try:
+        number = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return number if -(2**31) <= number < 2**31 else None
+
+
+def _text(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def flatten_interview(name: str, payload: Dict[str, Any]) -> Dict[str, List[Dict]]:
+    """Rows contributed by one interview document to each dataset."""
+    try:
+        created_at = datetime.fromisoformat(str(payload.get("created_at")))
+    except ValueError:
+        created_at = None
+    keys = {
+        "source_file": name,
+        "id_user": str(payload.get("id_user") or ""),
+        "session_id": str(payload.get("session_id") or ""),
+        "created_at": created_at,
+        "month": created_at.strftime("%Y-%m") if created_at else "unknown",
+    }
+    profile = _mapping(payload.get("user_profile"))
+    structured = _mapping(payload.get("structured_profile"))
+    answers = _strings(profile.get("respuestas_test"))
+
+    dimensions: List[Dict] = []
+    for dimension, tags in _mapping(structured.get("dimensiones_mapeadas")).items():
+        if isinstance(tags, dict):
+            pairs = [
+                (str(tag), None if level is None else str(level))
+                for tag, level in tags.items()
+            ]
+        else:
+            pairs = [(tag, None) for tag in _strings(tags)]
+        dimensions.extend(
+            {**keys, "dimension": str(dimension), "tag": tag, "nivel": level}
+            for tag, level in pairs
+        )
+
+    tags: List[Dict] = []
+    for tag, weight in _mapping(structured.get("tags_acumulados_vector")).items():
+        try:
+            tags.append({**keys, "tag": str(tag), "weight": float(weight)})
+        except (TypeError, ValueError):
+            continue
+
+    return {
+        "interviews": [
+            {
+                **keys,
+                "current_question_index": _int32(payload.get("current_question_index")),
+                "respuestas_test": answers,
+                "n_respuestas": len(answers),
+                "intereses": _strings(profile.get("intereses")),
+                "valores": _strings(profile.get("valores")),
+                "perfil_nombre": _text(structured.get("perfil_nombre")),
+                "has_structured_profile": bool(structured),
+            }
+        ],
+        "dimensions": dimensions,
+        "tags": tags,
+    }
+
+
+def _table(pa: Any, rows: List[Dict], schema: Any, name: str) -> Any:
+    """Build a table from ``rows``, leaving out the ones that do not fit ``schema``."""
+    try:
+        return pa.Table.from_pylist(rows, schema=schema)
+    except (TypeError, ValueError):
+        # ArrowInvalid/ArrowTypeError: find the offending rows one by one
+        pass
+    valid = []
+    for row in rows:
+        try:
+            pa.Table.from_pylist([row], schema=schema)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Skipping {name} row of {row.get('source_file')}: {e}")
+            continue
+        valid.append(row)
+    return pa.Table.from_pylist(valid, schema=schema)
+
+
+class InterviewExporter:
+    """Incremental Parquet export of ``data/interviews``."""
+
+    def __init__(
+        self,
+        interviews_dir: Optional[Path] = None,
+        output_dir: Optional[Path] = None,
+        batch_size: int = 1000,
+    ) -> None:
+        self.interviews_dir = Path(interviews_dir or settings.interviews_dir)
+        self.output_dir = Path(output_dir or settings.analytics_dir)
+        self.batch_size = batch_size
+
+    @property
+    def _state_path(self) -> Path:
+        return self.output_dir / STATE_FILE
+
+    def _exported(self) -> Set[str]:
+        try:
+            with self._state_path.open("r", encoding="utf-8") as f:
+                return set(json.load(f).get("files", []))
+        except FileNotFoundError:
+            return set()
+
+    def _new_files(self, exported: Set[str]) -> Iterator[Path]:
+        for path in sorted(self.interviews_dir.glob("*.json")):
+            if path.name not in exported:
+                yield path
+
+    def export(self) -> Dict[str, int]:
+        """
+        Export interviews not seen by previous runs.
+
+        Returns:
+            Number of new files and of rows written to each dataset
+        """
+        exported = self._exported()
+        counts = {"files": 0, **{name: 0 for name in DATASETS}}
+        batch: Dict[str, List[Dict]] = {name: [] for name in DATASETS}
+        files: List[str] = []
+        run_id = uuid.uuid4().hex[:12]
+        part = 0
+
+        for path in self._new_files(exported):
+            try:
+                with path.open("r", encoding="utf-8") as f:
+                    payload = json.load(f)
+            except Exception as e:
+                logger.warning(f"Skipping unreadable interview {path.name}: {e}")
+                continue
+            if not isinstance(payload, dict):
+                logger.warning(f"Skipping malformed interview {path.name}")
+                continue
+            for name, rows in flatten_interview(path.name, payload).items():
+                batch[name].extend(rows)
+            files.append(path.name)
+            if len(files) >= self.batch_size:
+                self._write_batch(batch, files, exported, counts, f"{run_id}-{part}")
+                part += 1
+
+        self._write_batch(batch, files, exported, counts, f"{run_id}-{part}")
+        logger.info(f"Exported interviews: {counts}")
+        return counts
+
+    def _write_batch(
+        self,
+        batch: Dict[str, List[Dict]],
+        files: List[str],
+        exported: Set[str],
+        counts: Dict[str, int],
+        part: str,
+    ) -> None:
+        if not files:
+            return
+        pa, _, pq = _pyarrow()
+        schemas = _schemas()
+        for name in DATASETS:
+            rows = batch[name]
+            if not rows:
+                continue
+            table = _table(pa, rows, schemas[name], name)
+            rows.clear()
+            if not table.num_rows:
+                continue
+            pq.write_to_dataset(
+                table,
+                root_path=str(self.output_dir / name),
+                partition_cols=["month"],
+                basename_template=f"part-{part}-{{i}}.parquet",
+            )
+            counts[name] += table.num_rows
+
+        # Recorded once the batch is on disk, so an interrupted run resumes here
+        exported.update(files)
+        counts["files"] += len(files)
+        files.clear()
+        atomic_write_text(
+            self._state_path,
+            json.dumps({"files": sorted(exported)}, ensure_ascii=False),
+        )
+
+    def dataset(self, name: str) -> Any:
+        """A pyarrow dataset over the whole history of ``name`` (one scan)."""
+        ds = _pyarrow()[1]
+        return ds.dataset(
+            str(self.output_dir / name),
+            format="parquet",
+            partitioning="hive",
+            schema=_schemas()[name],
+        )
+
+    def compact(self) -> Dict[str, int]:
+        """
+        Rewrite every partition as a single Parquet file.
+
+        Returns:
+            Number of part files removed per dataset
+        """
+        pa, _, pq = _pyarrow()
+        removed = {name: 0 for name in DATASETS}
+        for name in DATASETS:
+            root = self.output_dir / name
+            for partition in sorted(p for p in root.glob("month=*") if p.is_dir()):
+                parts = sorted(partition.glob("*.parquet"))
+                if len(parts) < 2:
+                    continue
+                table = pa.concat_tables(pq.read_table(str(p)) for p in parts)
+                compacted = f"part-compacted-{uuid.uuid4().hex[:12]}.parquet"
+                tmp = partition / f".{compacted}.tmp"
+                pq.write_table(table, str(tmp))
+                # Publish before removing the parts: a crash in between leaves
+                # duplicate rows, never missing ones
+                tmp.replace(partition / compacted)
+                for p in parts:
+                    p.unlink()
+                removed[name] += len(parts) - 1
+        return removed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export data/interviews to Parquet")
+    parser.add_argument("--interviews-dir", type=Path, default=None)
+    parser.add_argument("--output-dir", type=Path, default=None)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument(
+        "--compact", action="store_true", help="merge part files after exporting"
+    )
+    args = parser.parse_args()
+
+    exporter = InterviewExporter(args.interviews_dir, args.output_dir, args.batch_size)
+    print(json.dumps(exporter.export()))
+    if args.compact:
+        print(json.dumps(exporter.compact()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Two-tier cache for LLM responses keyed on the rendered prompt.
+
+The first tier is an in-process LRU; the optional second tier is a SQLite
+file so cached responses survive restarts and are shared between workers.
+Both tiers honour the same TTL and have independent size caps.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from agente_perfilamiento.infrastructure.config.settings import settings
+from agente_perfilamiento.infrastructure.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ResponseCache:
+    """LRU + SQLite cache of LLM responses with TTL and hit/miss counters."""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: Optional[int] = None,
+        db_path: Optional[str] = None,
+        max_disk_entries: int = 10000,
+    ) -> None:
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+
+        self._conn: Optional[sqlite3.Connection] = None
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_accessed"
+                " ON responses (accessed_at)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(
+        agent_name: str,
+        system_prompt: str,
+        memory_block: Optional[str],
+        user_message: str,
+        model: str,
+    ) -> str:
+        """Hash every prompt segment that influences the response."""
+        digest = hashlib.sha256()
+        parts = (agent_name, system_prompt, memory_block or "", user_message, model)
+        for part in parts:
+            encoded = part.encode("utf-8")
+            # Length prefix keeps ("ab", "c") and ("a", "bc") distinct
+            digest.update(len(encoded).to_bytes(8, "big"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self._ttl_seconds is not None and now - created_at > self._ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if not self._expired(created_at, now):
+                        self._conn.execute(
+                            "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                            (now, key),
+                        )
+                        self._conn.commit()
+                        self._remember(key, value, created_at)
+                        self._stats["disk_hits"] += 1
+                        return value
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self._stats["writes"] += 1
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses"
+                    " (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now),
+                )
+                self._trim_disk(now)
+                self._conn.commit()
+
+    def _remember(self, key: str, value: str, created_at: float) -> None:
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _trim_disk(self, now: float) -> None:
+        if self._ttl_seconds is not None:
+            self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self._ttl_seconds,)
+            )
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        overflow = count - self._max_disk_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+            self._stats["evictions"] += overflow
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current in-memory size."""
+        with self._lock:
+            return {**self._stats, "memory_entries": len(self._memory)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses")
+                self._conn.commit()
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Get the shared response cache, or ``None`` when caching is disabled.
+
+    Returns:
+        The process-wide ResponseCache built from settings on first use
+    """
+    global _response_cache
+    if not settings.llm_cache_enabled:
+        return None
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(
+                    max_entries=settings.llm_cache_max_entries,
+                    ttl_seconds=settings.llm_cache_ttl_seconds,
+                    db_path=settings.llm_cache_path,
+                    max_disk_entries=settings.llm_cache_max_disk_entries,
+                )
+                logger.info("LLM response cache enabled")
+    return _response_cache
+
+
+def set_response_cache(cache: Optional[ResponseCache]) -> None:
+    global _response_cache
+    _response_cache = cache
@@ -6,8 +6,9 @@ configured instances of external services like LLM models.
 """
 
 import os
+import threading
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from dotenv import find_dotenv, load_dotenv
 
@@ -68,7 +69,25 @@ class Settings:
             "LLM_MODEL", os.getenv("LLM_MODEL_NAME", "gpt-4o-mini")
         )
         self.llm_provider: str = os.getenv("LLM_PROVIDER", "openai").lower()
-        self.llm_base_url: Optional[str] = os.getenv("LLM_BASE_URL")
+        self.llm_base_url: Optional[str] = os.getenv("LLM_BASE_URL") or None
+
+        # HTTP connection pooling for LLM clients (shared across all agents)
+        self.llm_http_max_connections: int = int(
+            os.getenv("LLM_HTTP_MAX_CONNECTIONS", "20")
+        )
+        self.llm_http_max_keepalive: int = int(
+            os.getenv("LLM_HTTP_MAX_KEEPALIVE", "10")
+        )
+        self.llm_http_keepalive_expiry: float = float(
+            os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60")
+        )
+        self.llm_http_timeout: float = float(os.getenv("LLM_HTTP_TIMEOUT", "60"))
+        self.llm_preconnect: bool = self._bool(os.getenv("LLM_PRECONNECT", "false"))
+        # Canned reply and delay of the offline provider (LLM_PROVIDER=fake)
+        self.llm_fake_response: str = os.getenv(
+            "LLM_FAKE_RESPONSE", "Respuesta simulada."
+        )
+        self.llm_fake_latency_ms: float = float(os.getenv("LLM_FAKE_LATENCY_MS", "0"))
 
         # Provider-specific configurations (fallback support)
         self.openai_api_key: str = os.getenv("OPENAI_API_KEY", self.llm_api_key)
@@ -87,14 +106,39 @@ class Settings:
         # Application Configuration
         self.log_level: str = os.getenv("LOG_LEVEL", "INFO")
         self.environment: str = os.getenv("ENVIRONMENT", "development")
+        # Print assistant replies token by token in the CLI
+        self.cli_streaming: bool = self._bool(os.getenv("CLI_STREAMING", "true"))
 
         # Data directories
         self.data_dir: str = os.getenv("DATA_DIR", "data")
         self.conversations_dir: str = f"{self.data_dir}/conversations"
         self.memory_dir: str = f"{self.data_dir}/memory"
+        self.interviews_dir: str = f"{self.data_dir}/interviews"
+        # Parquet datasets exported from the interviews for analysts
+        self.analytics_dir: str = os.getenv(
+            "ANALYTICS_DIR", f"{self.data_dir}/analytics"
+        )
 
         # Memory configuration (short-term)
+        # in_memory (per process) | sqlite (shared by workers, survives restarts)
+        # | mmap (shared ring buffers in a mapped file, one host)
         self.memory_provider: str = os.getenv("MEMORY_PROVIDER", "in_memory").lower()
+        self.memory_sqlite_path: str = os.getenv(
+            "MEMORY_SQLITE_PATH", f"{self.memory_dir}/short_term.sqlite3"
+        )
+        self.memory_mmap_path: str = os.getenv(
+            "MEMORY_MMAP_PATH", f"{self.memory_dir}/short_term.mmap"
+        )
+        self.memory_mmap_slots: int = int(os.getenv("MEMORY_MMAP_SLOTS", "1024"))
+        self.memory_mmap_slot_capacity: int = int(
+            os.getenv("MEMORY_MMAP_SLOT_CAPACITY", "64")
+        )
+        self.memory_mmap_inline_bytes: int = int(
+            os.getenv("MEMORY_MMAP_INLINE_BYTES", "512")
+        )
+        self.memory_mmap_overflow_bytes: int = int(
+            os.getenv("MEMORY_MMAP_OVERFLOW_BYTES", str(64 * 2**20))
+        )
         self.memory_ttl_seconds: int | None = self._int_or_none(
             os.getenv("MEMORY_TTL_SECONDS", "1800")
         )
@@ -102,15 +146,113 @@ class Settings:
             os.getenv("MEMORY_MAX_ITEMS_PER_AGENT", "300")
         )
         self.memory_window_limit: int = int(os.getenv("MEMORY_WINDOW_LIMIT", "12"))
+        # How often idle sessions (older than the TTL) are swept from memory
+        self.memory_sweep_interval_seconds: float = float(
+            os.getenv("MEMORY_SWEEP_INTERVAL_SECONDS", "60")
+        )
+        # Global budget across sessions; least recently used sessions are
+        # evicted first and spilled to MEMORY_SPILL_DIR when it is set
+        self.memory_max_total_items: int | None = self._int_or_none(
+            os.getenv("MEMORY_MAX_TOTAL_ITEMS", "100000")
+        )
+        self.memory_max_total_bytes: int | None = self._int_or_none(
+            os.getenv("MEMORY_MAX_TOTAL_BYTES", "268435456")
+        )
+        self.memory_spill_dir: Optional[str] = os.getenv("MEMORY_SPILL_DIR") or None
+
+        # Write-behind persistence of summaries and entity profiles
+        self.persist_write_behind: bool = self._bool(
+            os.getenv("PERSIST_WRITE_BEHIND", "true")
+        )
+        self.persist_queue_max: int = int(os.getenv("PERSIST_QUEUE_MAX", "1024"))
+        # none | file (fsync before rename) | full (also fsync the directory)
+        self.persist_fsync: str = os.getenv("PERSIST_FSYNC", "file").lower()
+
+        # Conversation checkpoints (LangGraph thread id = id_conversacion)
+        # memory | sqlite | none (callers then pass the full state each turn)
+        self.checkpointer: str = os.getenv("CHECKPOINTER", "memory").lower()
+        self.checkpoint_path: str = os.getenv(
+            "CHECKPOINT_PATH", f"{self.data_dir}/checkpoints.sqlite3"
+        )
+        self.checkpoint_keep_last: int | None = self._int_or_none(
+            os.getenv("CHECKPOINT_KEEP_LAST", "2")
+        )
+        self.checkpoint_idle_ttl_seconds: int | None = self._int_or_none(
+            os.getenv("CHECKPOINT_IDLE_TTL_SECONDS", "604800")
+        )
+        # exit (one checkpoint per turn) | async | sync (one per graph step)
+        self.checkpoint_durability: str = os.getenv(
+            "CHECKPOINT_DURABILITY", "exit"
+        ).lower()
+
+        # Prompt token budget per agent call (system + memory + user payload)
+        self.prompt_token_budget: int | None = self._int_or_none(
+            os.getenv("PROMPT_TOKEN_BUDGET", "8000")
+        )
+
+        # Incremental interview profiling: tags are extracted from each answer
+        # in the background so the closing turn does not wait on one big call
+        self.incremental_profiling: bool = self._bool(
+            os.getenv("INCREMENTAL_PROFILING", "true")
+        )
+        self.profiler_max_workers: int = int(os.getenv("PROFILER_MAX_WORKERS", "4"))
+        self.profiler_collect_timeout: float = float(
+            os.getenv("PROFILER_COLLECT_TIMEOUT", "2")
+        )
+
+        # Latency metrics (graph nodes, LLM calls, tools); off = no timing at all
+        self.metrics_enabled: bool = self._bool(os.getenv("METRICS_ENABLED", "false"))
+        # Serve Prometheus text on http://127.0.0.1:<port>/metrics from the CLI
+        self.metrics_port: int | None = self._int_or_none(os.getenv("METRICS_PORT", ""))
+
+        # LLM response cache (opt-in, tool-less calls of cacheable agents only)
+        self.llm_cache_enabled: bool = self._bool(
+            os.getenv("LLM_CACHE_ENABLED", "false")
+        )
+        self.llm_cache_max_entries: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+        self.llm_cache_ttl_seconds: int | None = self._int_or_none(
+            os.getenv("LLM_CACHE_TTL_SECONDS", "86400")
+        )
+        self.llm_cache_path: Optional[str] = (
+            os.getenv("LLM_CACHE_PATH", f"{self.data_dir}/cache/llm_responses.sqlite3")
+            or None
+        )
+        self.llm_cache_max_disk_entries: int = int(
+            os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", "10000")
+        )
 
         self._validate_settings()
 
     def _validate_settings(self) -> None:
         """Validate required settings."""
-        if not self.llm_api_key:
+        if not self.llm_api_key and self.llm_provider != "fake":
             raise ValueError("LLM_API_KEY environment variable is required")
 
-        supported_providers = ["openai", "anthropic", "google", "custom"]
+        if self.persist_fsync not in {"none", "file", "full"}:
+            raise ValueError(
+                f"Unsupported PERSIST_FSYNC: {self.persist_fsync}. "
+                "Supported: none, file, full"
+            )
+
+        if self.memory_provider not in {"in_memory", "sqlite", "mmap"}:
+            raise ValueError(
+                f"Unsupported MEMORY_PROVIDER: {self.memory_provider}. "
+                "Supported: in_memory, sqlite, mmap"
+            )
+
+        if self.checkpointer not in {"memory", "sqlite", "none"}:
+            raise ValueError(
+                f"Unsupported CHECKPOINTER: {self.checkpointer}. "
+                "Supported: memory, sqlite, none"
+            )
+
+        if self.checkpoint_durability not in {"exit", "async", "sync"}:
+            raise ValueError(
+                f"Unsupported CHECKPOINT_DURABILITY: {self.checkpoint_durability}. "
+                "Supported: exit, async, sync"
+            )
+
+        supported_providers = ["openai", "anthropic", "google", "custom", "fake"]
         if self.llm_provider not in supported_providers:
             raise ValueError(
                 f"Unsupported LLM provider: {self.llm_provider}. Supported: {supported_providers}"
@@ -130,65 +272,125 @@ class Settings:
         except Exception:
             return None
 
+    @staticmethod
+    def _bool(value: str | None) -> bool:
+        return str(value or "").strip().lower() in {"1", "true", "yes", "on"}
+
 
 # Global settings instance
 settings = Settings()
 
 
+# Process-wide LLM client registry keyed by (provider, model, temperature, base_url)
+LLMClientKey = Tuple[str, str, float, Optional[str]]
+_llm_clients: Dict[LLMClientKey, Any] = {}
+_llm_http_clients: Dict[LLMClientKey, Tuple[Any, Any]] = {}
+_llm_clients_lock = threading.Lock()
+
+DEFAULT_OPENAI_BASE_URL = "https://api.openai.com/v1"
+
+
+def _build_http_clients() -> Tuple[Any, Any]:
+    """Create the pooled sync/async HTTP clients shared by OpenAI-compatible models."""
+    import httpx
+
+    limits = httpx.Limits(
+        max_connections=settings.llm_http_max_connections,
+        max_keepalive_connections=settings.llm_http_max_keepalive,
+        keepalive_expiry=settings.llm_http_keepalive_expiry,
+    )
+    timeout = httpx.Timeout(settings.llm_http_timeout)
+    return (
+        httpx.Client(limits=limits, timeout=timeout),
+        httpx.AsyncClient(limits=limits, timeout=timeout),
+    )
+
+
+def _create_llm_model(key: LLMClientKey) -> Any:
+    provider, model_name, temperature, base_url = key
+
+    if provider in ("openai", "custom"):
+        # For custom providers, try to use OpenAI-compatible interface
+        from langchain_openai import ChatOpenAI
+
+        if provider == "custom" and not base_url:
+            raise ValueError("LLM_BASE_URL is required for custom provider")
+        http_client, http_async_client = _build_http_clients()
+        _llm_http_clients[key] = (http_client, http_async_client)
+        return ChatOpenAI(
+            model=model_name,
+            temperature=temperature,
+            api_key=settings.llm_api_key,
+            base_url=base_url,
+            http_client=http_client,
+            http_async_client=http_async_client,
+        )
+
+    elif provider == "anthropic":
+        from langchain_anthropic import ChatAnthropic
+
+        return ChatAnthropic(
+            model=model_name,
+            temperature=temperature,
+            api_key=settings.llm_api_key,
+        )
+
+    elif provider == "google":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        return ChatGoogleGenerativeAI(
+            model=model_name,
+            temperature=temperature,
+            google_api_key=settings.llm_api_key,
+        )
+
+    elif provider == "fake":
+        from agente_perfilamiento.infrastructure.llm.fake_llm import FakeChatModel
+
+        return FakeChatModel(
+            response=settings.llm_fake_response,
+            latency_seconds=settings.llm_fake_latency_ms / 1000,
+        )
+
+    else:
+        raise ValueError(f"Unsupported LLM provider: {provider}")
+
+
 def get_llm_model(temperature: float = 0.1) -> Union:
     """
     Get configured LLM model instance based on the provider setting.
 
+    Instances are shared process-wide per (provider, model, temperature,
+    base_url), so every agent reuses the same HTTP connection pool instead of
+    opening new connections on each turn.
+
     Args:
         temperature: Model temperature for response randomness
 
     Returns:
         Configured LLM instance (provider-specific)
     """
-    try:
-        if settings.llm_provider == "openai":
-            from langchain_openai import ChatOpenAI
-
-            return ChatOpenAI(
-                model=settings.llm_model_name,
-                temperature=temperature,
-                api_key=settings.llm_api_key,
-                base_url=settings.llm_base_url,
-            )
+    key: LLMClientKey = (
+        settings.llm_provider,
+        settings.llm_model_name,
+        float(temperature),
+        settings.llm_base_url,
+    )
+    model = _llm_clients.get(key)
+    if model is not None:
+        return model
 
-        elif settings.llm_provider == "anthropic":
-            from langchain_anthropic import ChatAnthropic
-
-            return ChatAnthropic(
-                model=settings.llm_model_name,
-                temperature=temperature,
-                api_key=settings.llm_api_key,
-            )
-
-        elif settings.llm_provider == "google":
-            from langchain_google_genai import ChatGoogleGenerativeAI
-
-            return ChatGoogleGenerativeAI(
-                model=settings.llm_model_name,
-                temperature=temperature,
-                google_api_key=settings.llm_api_key,
-            )
-
-        elif settings.llm_provider == "custom":
-            # For custom providers, try to use OpenAI-compatible interface
-            from langchain_openai import ChatOpenAI
-
-            if not settings.llm_base_url:
-                raise ValueError("LLM_BASE_URL is required for custom provider")
-            return ChatOpenAI(
-                model=settings.llm_model_name,
-                temperature=temperature,
-                api_key=settings.llm_api_key,
-                base_url=settings.llm_base_url,
-            )
-
-        else:
-            raise ValueError(f"Unsupported LLM provider: {settings.llm_provider}")
+    try:
+        with _llm_clients_lock:
+            model = _llm_clients.get(key)
+            if model is None:
+                model = _create_llm_model(key)
+                _llm_clients[key] = model
+                logger.info(
+                    f"Created shared LLM client for {settings.llm_provider}:"
+                    f"{settings.llm_model_name} (temperature={temperature})"
+                )
+        return model
 
     except ImportError as e:
         logger.error(f"Failed to import LLM provider {settings.llm_provider}: {e}")
@@ -201,6 +403,43 @@ def get_llm_model(temperature: float = 0.1) -> Union:
         raise
 
 
+def preconnect_llm_clients() -> None:
+    """
+    Open the pooled connections of the shared OpenAI-compatible clients.
+
+    Issues a lightweight ``GET /models`` through each pooled HTTP client so the
+    TCP/TLS handshake happens at startup rather than on the first user turn.
+    Errors are logged and ignored.
+    """
+    if not _llm_clients:
+        get_llm_model()
+
+    for key, (http_client, _) in list(_llm_http_clients.items()):
+        base_url = (key[3] or DEFAULT_OPENAI_BASE_URL).rstrip("/")
+        try:
+            http_client.get(
+                f"{base_url}/models",
+                headers={"Authorization": f"Bearer {settings.llm_api_key}"},
+            )
+            logger.info(f"Pre-connected LLM client to {base_url}")
+        except Exception as e:
+            logger.warning(f"LLM pre-connect to {base_url} failed: {e}")
+
+
+def close_llm_clients() -> None:
+    """Close pooled HTTP connections and drop all shared LLM clients."""
+    with _llm_clients_lock:
+        # Async pools need a running event loop to close; they are released
+        # when garbage collected.
+        for http_client, _ in _llm_http_clients.values():
+            try:
+                http_client.close()
+            except Exception:
+                pass
+        _llm_http_clients.clear()
+        _llm_clients.clear()
+
+
 def ensure_data_directories() -> None:
     """
     Ensure data directories exist.
@@ -0,0 +1,60 @@
+"""
+Offline chat model for batch runs, load tests and local development.
+
+Selected with ``LLM_PROVIDER=fake``: no network, no API key. Every call
+waits ``LLM_FAKE_LATENCY_MS`` and replies with ``LLM_FAKE_RESPONSE``. Tool
+binding is accepted and ignored, so tool-calling agents finish on the first
+reply.
+"""
+
+import asyncio
+import time
+from typing import Any, List, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model returning a canned reply after a fixed delay."""
+
+    response: str = "Respuesta simulada."
+    latency_seconds: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _result(self) -> ChatResult:
+        message = AIMessage(content=self.response)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency_seconds > 0:
+            time.sleep(self.latency_seconds)
+        return self._result()
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency_seconds > 0:
+            await asyncio.sleep(self.latency_seconds)
+        return self._result()
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "FakeChatModel":
+        return self
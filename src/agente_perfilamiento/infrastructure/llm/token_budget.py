@@ -0,0 +1,281 @@
+"""
+Token counting and prompt budgeting built on tiktoken.
+
+Prompts are assembled from segments of different priority: the system prompt
+is never trimmed, the user payload is compacted only when it alone exceeds
+the budget, and the short-term memory window is the first to be cut (oldest
+lines first). When tiktoken or its encoding files are unavailable, counts
+fall back to a characters-per-token estimate.
+"""
+
+import json
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from agente_perfilamiento.infrastructure.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Rough characters-per-token ratio used when tiktoken cannot be loaded
+APPROX_CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "\n[...]"
+
+
+class TokenCounter:
+    """Counts tokens for a model, caching the counts of static prompts."""
+
+    def __init__(self, model_name: str) -> None:
+        self.model_name = model_name
+        self._encoding: Any = None
+        self._encoding_loaded = False
+        self._lock = threading.Lock()
+
+    def _get_encoding(self) -> Any:
+        if not self._encoding_loaded:
+            with self._lock:
+                if not self._encoding_loaded:
+                    self._encoding = self._load_encoding()
+                    self._encoding_loaded = True
+        return self._encoding
+
+    def _load_encoding(self) -> Any:
+        try:
+            import tiktoken
+        except ImportError:
+            logger.warning("tiktoken not installed; using approximate token counts")
+            return None
+        try:
+            return tiktoken.encoding_for_model(self.model_name)
+        except KeyError:
+            # Non-OpenAI model names: the common base encoding is close enough
+            try:
+                return tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                logger.warning(f"tiktoken encoding unavailable ({e}); approximating")
+                return None
+        except Exception as e:
+            logger.warning(f"tiktoken encoding unavailable ({e}); approximating")
+            return None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        encoding = self._get_encoding()
+        if encoding is None:
+            return -(-len(text) // APPROX_CHARS_PER_TOKEN)
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def count_static(self, text: str) -> int:
+        """Count tokens of text that rarely changes (system prompts)."""
+        return _count_static(self, text)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Keep the head of ``text`` so that it fits in ``max_tokens``."""
+        if max_tokens <= 0:
+            return ""
+        if self.count(text) <= max_tokens:
+            return text
+        budget = max_tokens - self.count(TRUNCATION_MARKER)
+        if budget <= 0:
+            return ""
+        encoding = self._get_encoding()
+        if encoding is None:
+            head = text[: budget * APPROX_CHARS_PER_TOKEN]
+        else:
+            head = encoding.decode(
+                encoding.encode(text, disallowed_special=())[:budget]
+            )
+        return head + TRUNCATION_MARKER
+
+
+@lru_cache(maxsize=256)
+def _count_static(counter: TokenCounter, text: str) -> int:
+    return counter.count(text)
+
+
+class PromptBudgeter:
+    """Fits prompt segments into a token budget, trimming low priority first."""
+
+    def __init__(self, counter: TokenCounter) -> None:
+        self.counter = counter
+
+    def fit_lines(self, lines: Sequence[str], max_tokens: int) -> List[str]:
+        """Keep the most recent lines whose joined size fits in ``max_tokens``."""
+        kept: List[str] = []
+        used = 0
+        for line in reversed(lines):
+            # +1 accounts for the newline joining the lines
+            cost = self.counter.count(line) + 1
+            if used + cost > max_tokens:
+                break
+            kept.append(line)
+            used += cost
+        kept.reverse()
+        return kept
+
+    def allocate(
+        self,
+        budget: int,
+        system_prompt: str,
+        user_message: str,
+        memory_lines: Optional[Sequence[str]] = None,
+    ) -> Tuple[str, Optional[List[str]]]:
+        """
+        Fit the user message and memory window next to the system prompt.
+
+        Args:
+            budget: Total prompt token budget
+            system_prompt: Static system prompt (never trimmed)
+            user_message: User payload (truncated only if it alone overflows,
+                and never when it ends with a JSON document)
+            memory_lines: Short-term memory lines, oldest first (trimmed first)
+
+        Returns:
+            Tuple of the (possibly truncated) user message and kept memory lines
+        """
+        available = budget - self.counter.count_static(system_prompt)
+        if available <= 0:
+            # Sending an empty user message would be useless; go over budget
+            logger.warning(
+                f"prompt.budget system prompt alone exceeds the {budget} token "
+                "budget; sending the user message untrimmed without memory"
+            )
+            return user_message, ([] if memory_lines is not None else None)
+
+        user_tokens = self.counter.count(user_message)
+        if user_tokens > available:
+            if _ends_with_json(user_message):
+                # Cutting would break the JSON; render_payload already trimmed it
+                logger.warning(
+                    f"prompt.budget JSON user payload {user_tokens} tokens "
+                    f"exceeds {available}; sent untrimmed"
+                )
+            else:
+                logger.info(
+                    f"prompt.budget user payload {user_tokens} tokens "
+                    f"truncated to {available}"
+                )
+                user_message = self.counter.truncate(user_message, available)
+            user_tokens = self.counter.count(user_message)
+
+        if memory_lines is None:
+            return user_message, None
+        kept = self.fit_lines(memory_lines, available - user_tokens)
+        if len(kept) < len(memory_lines):
+            logger.info(
+                "prompt.budget memory window trimmed "
+                f"{len(memory_lines)} -> {len(kept)}"
+            )
+        return user_message, kept
+
+    def fit_json(
+        self,
+        payload: Dict[str, Any],
+        max_tokens: int,
+        trim_paths: Sequence[Tuple[str, ...]] = (),
+        render: Optional[Callable[[Dict[str, Any]], str]] = None,
+    ) -> str:
+        """
+        Serialize ``payload`` compactly, dropping the oldest list entries found
+        at ``trim_paths`` (in order) until it fits in ``max_tokens``. The
+        result is always valid JSON, even when trimming cannot make it fit.
+        """
+        render = render or _compact_json
+        text = render(payload)
+        if self.counter.count(text) <= max_tokens:
+            return text
+
+        payload = _copy_along(payload, trim_paths)
+        for path in trim_paths:
+            items = _get_path(payload, path)
+            if not isinstance(items, list) or not items:
+                continue
+            original = list(items)
+            items.clear()
+            if self.counter.count(render(payload)) > max_tokens:
+                # Still too large without this list; move on to the next one
+                continue
+            # Binary search the fewest oldest entries to drop
+            low, high = 0, len(original)
+            while low < high:
+                mid = (low + high) // 2
+                items[:] = original[mid:]
+                if self.counter.count(render(payload)) <= max_tokens:
+                    high = mid
+                else:
+                    low = mid + 1
+            items[:] = original[low:]
+            return render(payload)
+        text = render(payload)
+        logger.warning(
+            f"prompt.budget JSON payload {self.counter.count(text)} tokens "
+            f"exceeds {max_tokens} after trimming; sent whole"
+        )
+        return text
+
+
+def _ends_with_json(text: str) -> bool:
+    """Whether ``text`` ends with a JSON object or array (an embedded payload)."""
+    stripped = text.rstrip()
+    if not stripped.endswith(("}", "]")):
+        return False
+    decoder = json.JSONDecoder()
+    index = 0
+    while True:
+        brace, bracket = stripped.find("{", index), stripped.find("[", index)
+        starts = [i for i in (brace, bracket) if i >= 0]
+        if not starts:
+            return False
+        index = min(starts)
+        try:
+            _, end = decoder.raw_decode(stripped, index)
+        except ValueError:
+            index += 1
+            continue
+        if end == len(stripped):
+            return True
+        index = end
+
+
+def _compact_json(payload: Dict[str, Any]) -> str:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+def _get_path(payload: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    value: Any = payload
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _copy_along(payload: Dict[str, Any], paths: Sequence[Tuple[str, ...]]) -> Dict:
+    """Copy only the containers on ``paths`` so trimming never mutates state."""
+    root = dict(payload)
+    for path in paths:
+        node = root
+        for key in path[:-1]:
+            child = node.get(key)
+            if not isinstance(child, dict):
+                break
+            node[key] = dict(child)
+            node = node[key]
+        else:
+            if isinstance(node.get(path[-1]), list):
+                node[path[-1]] = list(node[path[-1]])
+    return root
+
+
+_budgeters: Dict[str, PromptBudgeter] = {}
+
+
+def get_prompt_budgeter(model_name: str) -> PromptBudgeter:
+    """Shared budgeter per model so encodings and static counts are reused."""
+    budgeter = _budgeters.get(model_name)
+    if budgeter is None:
+        budgeter = _budgeters.setdefault(
+            model_name, PromptBudgeter(TokenCounter(model_name))
+        )
+    return budgeter
@@ -0,0 +1,3 @@
+"""
+In-process latency metrics with Prometheus and JSON export.
+"""
@@ -0,0 +1,294 @@
+"""
+In-process latency metrics.
+
+Histograms with fixed latency buckets and counters, keyed by metric name and
+label set. They are exported in the Prometheus text format or as a JSON
+snapshot with p50/p95/p99 estimated from the buckets. Metrics are off unless
+``METRICS_ENABLED`` is set; instrumented code then skips the clock entirely
+and graph nodes and tools are not wrapped at all.
+"""
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from agente_perfilamiento.infrastructure.config.settings import settings
+from agente_perfilamiento.infrastructure.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Metric names
+NODE_DURATION = "agente_node_duration_seconds"
+NODE_ERRORS = "agente_node_errors_total"
+PROMPT_BUILD_DURATION = "agente_prompt_build_duration_seconds"
+LLM_CALL_DURATION = "agente_llm_call_duration_seconds"
+LLM_CALLS = "agente_llm_calls_total"
+TOOL_DURATION = "agente_tool_duration_seconds"
+TOOL_ERRORS = "agente_tool_errors_total"
+MEMORY_FLUSH_DURATION = "agente_memory_flush_duration_seconds"
+
+# Upper bounds in seconds, from sub-millisecond bookkeeping to slow LLM calls
+BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+QUANTILES = (0.5, 0.95, 0.99)
+
+Labels = Tuple[Tuple[str, str], ...]
+_NULL_TIMER = nullcontext()
+
+
+class Histogram:
+    """Bucketed latency distribution (last bucket is +Inf)."""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate by linear interpolation inside the bucket holding ``q``."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, in_bucket in enumerate(self.counts):
+            if in_bucket and seen + in_bucket >= rank:
+                if index == len(BUCKETS):
+                    return BUCKETS[-1]
+                lower = BUCKETS[index - 1] if index else 0.0
+                return lower + (BUCKETS[index] - lower) * (rank - seen) / in_bucket
+            seen += in_bucket
+        return BUCKETS[-1]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe histograms and counters."""
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def inc(self, name: str, amount: float = 1, **labels: Any) -> None:
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def timer(self, name: str, **labels: Any) -> Any:
+        """Context manager observing the duration of its block."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return self._timer(name, labels)
+
+    @contextmanager
+    def _timer(self, name: str, labels: Dict[str, Any]) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def wrap(
+        self, func: Callable, name: str, errors: Optional[str] = None, **labels: Any
+    ) -> Callable:
+        """Time every call of ``func`` (and count its exceptions in ``errors``)."""
+
+        @functools.wraps(func)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                if errors:
+                    self.inc(errors, **labels)
+                raise
+            finally:
+                self.observe(name, time.perf_counter() - started, **labels)
+
+        return timed
+
+    def wrap_async(
+        self, func: Callable, name: str, errors: Optional[str] = None, **labels: Any
+    ) -> Callable:
+        """Async variant of :meth:`wrap`."""
+
+        @functools.wraps(func)
+        async def timed(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                if errors:
+                    self.inc(errors, **labels)
+                raise
+            finally:
+                self.observe(name, time.perf_counter() - started, **labels)
+
+        return timed
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counts, sums and estimated quantiles (milliseconds) of every series."""
+        with self._lock:
+            histograms = [
+                (key, h.count, h.total, h) for key, h in self._histograms.items()
+            ]
+            counters = list(self._counters.items())
+            result: Dict[str, Any] = {"histograms": {}, "counters": {}}
+            for (name, labels), count, total, histogram in sorted(histograms):
+                row = {
+                    "labels": dict(labels),
+                    "count": count,
+                    "sum_ms": round(total * 1000, 3),
+                }
+                for q in QUANTILES:
+                    row[f"p{int(q * 100)}_ms"] = round(histogram.quantile(q) * 1000, 3)
+                result["histograms"].setdefault(name, []).append(row)
+        for (name, labels), value in sorted(counters):
+            result["counters"].setdefault(name, []).append(
+                {"labels": dict(labels), "value": value}
+            )
+        return result
+
+    def to_prometheus(self) -> str:
+        """Every series in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            histograms = sorted(
+                (key, list(h.counts), h.total, h.count)
+                for key, h in self._histograms.items()
+            )
+            counters = sorted(self._counters.items())
+        typed = set()
+        for (name, labels), counts, total, count in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, in_bucket in zip(BUCKETS + (float("inf"),), counts):
+                cumulative += in_bucket
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    f"{name}_bucket{_format_labels(labels, ('le', le))} {cumulative}"
+                )
+            lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+_metrics: Optional[MetricsRegistry] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get the process-wide registry (disabled unless METRICS_ENABLED)."""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = MetricsRegistry(enabled=settings.metrics_enabled)
+    return _metrics
+
+
+def timed_tool(tool: Any) -> Any:
+    """Copy of a function-backed LangChain tool whose calls are timed."""
+    metrics = get_metrics()
+    func = getattr(tool, "func", None)
+    if not metrics.enabled or func is None:
+        return tool
+    update = {"func": metrics.wrap(func, TOOL_DURATION, TOOL_ERRORS, tool=tool.name)}
+    coroutine = getattr(tool, "coroutine", None)
+    if coroutine is not None:
+        update["coroutine"] = metrics.wrap_async(
+            coroutine, TOOL_DURATION, TOOL_ERRORS, tool=tool.name
+        )
+    return tool.model_copy(update=update)
+
+
+def serve_metrics(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve ``GET /metrics`` (Prometheus text) from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = get_metrics().to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            return
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(
+        target=server.serve_forever, name="metrics-http", daemon=True
+    ).start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
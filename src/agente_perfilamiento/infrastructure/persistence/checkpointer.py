@@ -0,0 +1,543 @@
+"""
+LangGraph checkpointers for conversation sessions.
+
+Sessions are keyed by ``id_conversacion`` (the LangGraph thread id), so
+callers only pass the conversation id and the new input each turn. Both
+savers store channel values per version: a checkpoint only adds the channels
+a turn actually changed, and the SQLite saver stores a new version of an
+append-only message list as the items appended since the parent checkpoint.
+The retention policy keeps the latest checkpoints of each thread and drops
+threads that have been idle for too long.
+"""
+
+import asyncio
+import sqlite3
+from abc import ABC, abstractmethod
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from agente_perfilamiento.domain.models.conversation_state import APPEND_ONLY_FIELDS
+from agente_perfilamiento.infrastructure.config.settings import settings
+from agente_perfilamiento.infrastructure.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Idle-thread sweeps run at most this often (seconds)
+SWEEP_INTERVAL_SECONDS = 60
+# Append-only channels are stored whole again after this many deltas, which
+# bounds the rows read to restore them
+MAX_DELTA_CHAIN = 16
+
+
+@dataclass(frozen=True)
+class CheckpointRetention:
+    """How many checkpoints to keep per thread and how long idle threads live."""
+
+    keep_last: Optional[int] = None
+    idle_ttl_seconds: Optional[int] = None
+
+
+class _RetentionMixin(ABC):
+    """Applies a :class:`CheckpointRetention` after every saved checkpoint."""
+
+    retention: CheckpointRetention
+    _next_sweep: float
+
+    def _after_put(self, thread_id: str, checkpoint_ns: str) -> None:
+        if self.retention.keep_last:
+            self._prune(thread_id, checkpoint_ns, self.retention.keep_last)
+        ttl = self.retention.idle_ttl_seconds
+        now = time.time()
+        if ttl and now >= self._next_sweep:
+            self._next_sweep = now + SWEEP_INTERVAL_SECONDS
+            for idle in self._idle_threads(now - ttl):
+                self.delete_thread(idle)
+                logger.debug(f"Deleted idle checkpoint thread {idle}")
+
+    @abstractmethod
+    def _prune(self, thread_id: str, checkpoint_ns: str, keep_last: int) -> None:
+        """Drop all but the newest ``keep_last`` checkpoints of a thread."""
+
+    @abstractmethod
+    def _idle_threads(self, cutoff: float) -> List[str]:
+        """Threads whose last checkpoint is older than ``cutoff``."""
+
+
+class InMemoryCheckpointer(_RetentionMixin, InMemorySaver):
+    """In-process checkpointer with retention; sessions end with the process."""
+
+    def __init__(self, retention: Optional[CheckpointRetention] = None) -> None:
+        super().__init__()
+        self.retention = retention or CheckpointRetention()
+        self._next_sweep = 0.0
+        self._last_seen: Dict[str, float] = {}
+        # (thread_id, checkpoint_ns) -> {(channel, version)} stored in self.blobs
+        self._blob_index: Dict[Tuple[str, str], Set[Tuple[str, Any]]] = {}
+        self._retention_lock = threading.RLock()
+
+    def has_thread(self, thread_id: str) -> bool:
+        return bool(self.storage.get(thread_id))
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        with self._retention_lock:
+            result = super().put(config, checkpoint, metadata, new_versions)
+            thread_id = config["configurable"]["thread_id"]
+            checkpoint_ns = config["configurable"]["checkpoint_ns"]
+            self._blob_index.setdefault((thread_id, checkpoint_ns), set()).update(
+                new_versions.items()
+            )
+            self._last_seen[thread_id] = time.time()
+            self._after_put(thread_id, checkpoint_ns)
+        return result
+
+    def _prune(self, thread_id: str, checkpoint_ns: str, keep_last: int) -> None:
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= keep_last:
+            return
+        # Checkpoint ids are time-ordered (uuid6)
+        for checkpoint_id in sorted(checkpoints)[:-keep_last]:
+            del checkpoints[checkpoint_id]
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+
+        referenced: Set[Tuple[str, Any]] = set()
+        for serialized, _, _ in checkpoints.values():
+            referenced.update(
+                self.serde.loads_typed(serialized)["channel_versions"].items()
+            )
+        stored = self._blob_index.get((thread_id, checkpoint_ns), set())
+        for channel, version in stored - referenced:
+            self.blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+        stored &= referenced
+
+    def _idle_threads(self, cutoff: float) -> List[str]:
+        return [thread for thread, seen in self._last_seen.items() if seen < cutoff]
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._retention_lock:
+            namespaces = list(self.storage.pop(thread_id, {}))
+            for checkpoint_ns in namespaces:
+                stored = self._blob_index.pop((thread_id, checkpoint_ns), ())
+                for channel, version in stored:
+                    self.blobs.pop((thread_id, checkpoint_ns, channel, version), None)
+            for key in [key for key in self.writes if key[0] == thread_id]:
+                del self.writes[key]
+            self._last_seen.pop(thread_id, None)
+
+
+class SqliteCheckpointer(_RetentionMixin, SqliteSaver):
+    """
+    SQLite checkpointer storing channel values once per version.
+
+    The stock saver pickles every channel into each checkpoint row; here the
+    row keeps only the channel versions and values live in a side table, so
+    unchanged channels are not written again. A new version of an append-only
+    channel stores only the items added since its version in the parent
+    checkpoint (``base_version``), up to :data:`MAX_DELTA_CHAIN` deltas in a
+    row. Async methods run the sync ones on a worker thread so the same graph
+    serves ``ainvoke``.
+    """
+
+    def __init__(
+        self, conn: sqlite3.Connection, retention: Optional[CheckpointRetention] = None
+    ) -> None:
+        super().__init__(conn)
+        self.retention = retention or CheckpointRetention()
+        self._next_sweep = 0.0
+
+    @classmethod
+    def from_path(
+        cls, path: str, retention: Optional[CheckpointRetention] = None
+    ) -> "SqliteCheckpointer":
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        return cls(sqlite3.connect(path, check_same_thread=False), retention)
+
+    def setup(self) -> None:
+        if self.is_setup:
+            return
+        super().setup()
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoint_blobs (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                type TEXT NOT NULL,
+                blob BLOB,
+                base_version TEXT,
+                length INTEGER,
+                depth INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS checkpoint_threads (
+                thread_id TEXT PRIMARY KEY,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_checkpoint_threads_updated
+                ON checkpoint_threads (updated_at);
+            """
+        )
+        columns = {
+            row[1] for row in self.conn.execute("PRAGMA table_info(checkpoint_blobs)")
+        }
+        # Tables created before deltas hold whole values only
+        for column, ddl in (
+            ("base_version", "base_version TEXT"),
+            ("length", "length INTEGER"),
+            ("depth", "depth INTEGER NOT NULL DEFAULT 0"),
+        ):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE checkpoint_blobs ADD COLUMN {ddl}")
+        self.conn.commit()
+
+    def has_thread(self, thread_id: str) -> bool:
+        with self.cursor(transaction=False) as cur:
+            cur.execute(
+                "SELECT 1 FROM checkpoint_threads WHERE thread_id = ?",
+                (str(thread_id),),
+            )
+            return cur.fetchone() is not None
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        compact = checkpoint.copy()
+        values: Dict[str, Any] = compact.pop("channel_values")  # type: ignore[misc]
+        compact["channel_values"] = {}
+
+        with self.cursor() as cur:
+            parents = self._parent_blobs(
+                cur,
+                thread_id,
+                checkpoint_ns,
+                config["configurable"].get("checkpoint_id"),
+                [c for c in new_versions if c in APPEND_ONLY_FIELDS],
+            )
+            rows = []
+            for channel, version in new_versions.items():
+                value = values.get(channel)
+                base_version = length = None
+                depth = 0
+                if channel not in values:
+                    type_, blob = "empty", None
+                else:
+                    if isinstance(value, list):
+                        length = len(value)
+                    parent = parents.get(channel)
+                    if (
+                        parent is not None
+                        and length is not None
+                        and parent[1] <= length
+                        and parent[2] < MAX_DELTA_CHAIN
+                    ):
+                        base_version, depth = parent[0], parent[2] + 1
+                        value = value[parent[1] :]
+                    type_, blob = self.serde.dumps_typed(value)
+                rows.append(
+                    (
+                        thread_id,
+                        checkpoint_ns,
+                        channel,
+                        str(version),
+                        type_,
+                        blob,
+                        base_version,
+                        length,
+                        depth,
+                    )
+                )
+            cur.executemany(
+                "INSERT OR REPLACE INTO checkpoint_blobs (thread_id, checkpoint_ns,"
+                " channel, version, type, blob, base_version, length, depth)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            cur.execute(
+                "INSERT OR REPLACE INTO checkpoint_threads (thread_id, updated_at)"
+                " VALUES (?, ?)",
+                (thread_id, time.time()),
+            )
+        result = super().put(config, compact, metadata, new_versions)
+        self._after_put(thread_id, checkpoint_ns)
+        return result
+
+    def _with_values(self, tup: Optional[CheckpointTuple]) -> Optional[CheckpointTuple]:
+        if tup is None:
+            return None
+        checkpoint = tup.checkpoint
+        configurable = tup.config["configurable"]
+        missing = {
+            channel: version
+            for channel, version in checkpoint["channel_versions"].items()
+            if channel not in checkpoint["channel_values"]
+        }
+        if missing:
+            checkpoint["channel_values"].update(
+                self._load_blobs(
+                    str(configurable["thread_id"]),
+                    configurable.get("checkpoint_ns", ""),
+                    missing,
+                )
+            )
+        return tup
+
+    def _parent_blobs(
+        self,
+        cur: sqlite3.Cursor,
+        thread_id: str,
+        checkpoint_ns: str,
+        parent_id: Optional[str],
+        channels: List[str],
+    ) -> Dict[str, Tuple[str, int, int]]:
+        """(version, length, depth) of ``channels`` in the parent checkpoint."""
+        if not parent_id or not channels:
+            return {}
+        cur.execute(
+            "SELECT type, checkpoint FROM checkpoints"
+            " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, parent_id),
+        )
+        row = cur.fetchone()
+        if row is None:
+            return {}
+        versions = self.serde.loads_typed((row[0], row[1]))["channel_versions"]
+        parents = {}
+        for channel in channels:
+            if channel not in versions:
+                continue
+            cur.execute(
+                "SELECT length, depth FROM checkpoint_blobs WHERE thread_id = ?"
+                " AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(versions[channel])),
+            )
+            found = cur.fetchone()
+            if found is not None and found[0] is not None:
+                parents[channel] = (str(versions[channel]), found[0], found[1])
+        return parents
+
+    def _load_blobs(
+        self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions
+    ) -> Dict[str, Any]:
+        values: Dict[str, Any] = {}
+        # Slices read so far per delta-stored channel, newest first
+        tails: Dict[str, List[List[Any]]] = {}
+        wanted = {channel: str(version) for channel, version in versions.items()}
+        while wanted:
+            rows = self._blob_rows(thread_id, checkpoint_ns, wanted)
+            wanted = {}
+            for channel, type_, blob, base_version in rows:
+                if type_ == "empty":
+                    continue
+                value = self.serde.loads_typed((type_, blob))
+                if base_version is not None:
+                    tails.setdefault(channel, []).append(value)
+                    wanted[channel] = base_version
+                    continue
+                if channel in tails:
+                    value = list(value)
+                    for tail in reversed(tails.pop(channel)):
+                        value.extend(tail)
+                values[channel] = value
+        for channel in tails:
+            logger.warning(f"Checkpoint {thread_id} lost the base of {channel}")
+        return values
+
+    def _blob_rows(
+        self, thread_id: str, checkpoint_ns: str, versions: Dict[str, str]
+    ) -> List[Tuple[Any, ...]]:
+        clauses = " OR ".join(["(channel = ? AND version = ?)"] * len(versions))
+        params: List[Any] = [thread_id, checkpoint_ns]
+        for channel, version in versions.items():
+            params.extend((channel, version))
+        with self.cursor(transaction=False) as cur:
+            cur.execute(
+                "SELECT channel, type, blob, base_version FROM checkpoint_blobs"
+                f" WHERE thread_id = ? AND checkpoint_ns = ? AND ({clauses})",
+                params,
+            )
+            return cur.fetchall()
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self._with_values(super().get_tuple(config))
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        # Materialize first: loading blobs needs the connection lock
+        tuples = list(super().list(config, filter=filter, before=before, limit=limit))
+        for tup in tuples:
+            yield self._with_values(tup)
+
+    def _prune(self, thread_id: str, checkpoint_ns: str, keep_last: int) -> None:
+        keep = (
+            "SELECT checkpoint_id FROM checkpoints"
+            " WHERE thread_id = ? AND checkpoint_ns = ?"
+            " ORDER BY checkpoint_id DESC LIMIT ?"
+        )
+        scope = (thread_id, checkpoint_ns)
+        with self.cursor() as cur:
+            for table in ("checkpoints", "writes"):
+                cur.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ?"
+                    f" AND checkpoint_id NOT IN ({keep})",
+                    (*scope, *scope, keep_last),
+                )
+            cur.execute(
+                "SELECT type, checkpoint FROM checkpoints"
+                " WHERE thread_id = ? AND checkpoint_ns = ?",
+                scope,
+            )
+            referenced = set()
+            for type_, blob in cur.fetchall():
+                versions = self.serde.loads_typed((type_, blob))["channel_versions"]
+                referenced.update((c, str(v)) for c, v in versions.items())
+            cur.execute(
+                "SELECT channel, version, base_version FROM checkpoint_blobs"
+                " WHERE thread_id = ? AND checkpoint_ns = ?",
+                scope,
+            )
+            bases = {(c, v): base for c, v, base in cur.fetchall()}
+            # Deltas need every version down to their last whole value
+            for channel, version in list(referenced):
+                base = bases.get((channel, version))
+                while base is not None and (channel, base) not in referenced:
+                    referenced.add((channel, base))
+                    base = bases.get((channel, base))
+            stale = [key for key in bases if key not in referenced]
+            cur.executemany(
+                "DELETE FROM checkpoint_blobs WHERE thread_id = ? AND checkpoint_ns = ?"
+                " AND channel = ? AND version = ?",
+                [(*scope, channel, version) for channel, version in stale],
+            )
+
+    def _idle_threads(self, cutoff: float) -> List[str]:
+        with self.cursor(transaction=False) as cur:
+            cur.execute(
+                "SELECT thread_id FROM checkpoint_threads WHERE updated_at < ?",
+                (cutoff,),
+            )
+            return [row[0] for row in cur.fetchall()]
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        with self.cursor() as cur:
+            cur.execute(
+                "DELETE FROM checkpoint_blobs WHERE thread_id = ?", (str(thread_id),)
+            )
+            cur.execute(
+                "DELETE FROM checkpoint_threads WHERE thread_id = ?", (str(thread_id),)
+            )
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for tup in tuples:
+            yield tup
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def create_checkpointer(
+    kind: Optional[str] = None,
+    path: Optional[str] = None,
+    retention: Optional[CheckpointRetention] = None,
+) -> Optional[BaseCheckpointSaver]:
+    """
+    Build the checkpointer configured in settings.
+
+    Args:
+        kind: ``memory``, ``sqlite`` or ``none`` (defaults to CHECKPOINTER)
+        path: SQLite file (defaults to CHECKPOINT_PATH)
+        retention: Retention policy (defaults to CHECKPOINT_KEEP_LAST and
+            CHECKPOINT_IDLE_TTL_SECONDS)
+
+    Returns:
+        The checkpointer, or ``None`` for stateless graphs
+    """
+    kind = (kind or settings.checkpointer).lower()
+    retention = retention or CheckpointRetention(
+        keep_last=settings.checkpoint_keep_last,
+        idle_ttl_seconds=settings.checkpoint_idle_ttl_seconds,
+    )
+    if kind == "memory":
+        return InMemoryCheckpointer(retention)
+    if kind == "sqlite":
+        return SqliteCheckpointer.from_path(path or settings.checkpoint_path, retention)
+    if kind == "none":
+        return None
+    raise ValueError(
+        f"Unsupported checkpointer: {kind}. Supported: memory, sqlite, none"
+    )
@@ -2,11 +2,20 @@
 Simple provider to share a singleton MemoryService across nodes.
 """
 
+import atexit
+import threading
 from typing import Optional
 
+from agente_perfilamiento.domain.services.entity_memory_service import (
+    EntityMemoryService,
+)
 from agente_perfilamiento.domain.services.memory_service import MemoryService
+from agente_perfilamiento.infrastructure.config.settings import settings
+from agente_perfilamiento.ports.memory_repository import MemoryRepository
 
 _memory_service: Optional[MemoryService] = None
+_entity_memory_service: Optional[EntityMemoryService] = None
+_entity_lock = threading.Lock()
 
 
 def set_memory_service(service: MemoryService) -> None:
@@ -20,3 +29,83 @@ def get_memory_service() -> MemoryService:
             "MemoryService is not initialized. Call set_memory_service() in main before processing."
         )
     return _memory_service
+
+
+def create_memory_repository(provider: Optional[str] = None) -> MemoryRepository:
+    """
+    Build the short-term memory repository selected by ``MEMORY_PROVIDER``.
+
+    Args:
+        provider: ``in_memory`` (per process), ``sqlite`` (shared by the
+            workers of a host and kept across restarts) or ``mmap`` (shared
+            ring buffers in a mapped file)
+
+    Returns:
+        The configured repository
+    """
+    provider = (provider or settings.memory_provider).lower()
+    if provider == "in_memory":
+        from agente_perfilamiento.adapters.in_memory_repository import (
+            InMemoryMemoryRepository,
+        )
+
+        return InMemoryMemoryRepository(
+            ttl_seconds=settings.memory_ttl_seconds,
+            sweep_interval_seconds=settings.memory_sweep_interval_seconds,
+            max_total_items=settings.memory_max_total_items,
+            max_total_bytes=settings.memory_max_total_bytes,
+            spill_dir=settings.memory_spill_dir,
+        )
+    if provider == "sqlite":
+        from agente_perfilamiento.adapters.sqlite_memory_repository import (
+            SqliteMemoryRepository,
+        )
+
+        return SqliteMemoryRepository(
+            settings.memory_sqlite_path,
+            ttl_seconds=settings.memory_ttl_seconds,
+            sweep_interval_seconds=settings.memory_sweep_interval_seconds,
+        )
+    if provider == "mmap":
+        from agente_perfilamiento.adapters.mmap_memory_repository import (
+            MmapMemoryRepository,
+        )
+
+        return MmapMemoryRepository(
+            settings.memory_mmap_path,
+            slots=settings.memory_mmap_slots,
+            capacity=settings.memory_mmap_slot_capacity,
+            inline_bytes=settings.memory_mmap_inline_bytes,
+            overflow_bytes=settings.memory_mmap_overflow_bytes,
+            ttl_seconds=settings.memory_ttl_seconds,
+            sweep_interval_seconds=settings.memory_sweep_interval_seconds,
+        )
+    raise ValueError(
+        f"Unsupported MEMORY_PROVIDER: {provider}. Supported: in_memory, sqlite, mmap"
+    )
+
+
+def create_memory_service(provider: Optional[str] = None) -> MemoryService:
+    """Build a MemoryService over the configured repository."""
+    return MemoryService(
+        repository=create_memory_repository(provider),
+        ttl_seconds=settings.memory_ttl_seconds,
+        max_items_per_agent=settings.memory_max_items_per_agent,
+        window_limit=settings.memory_window_limit,
+    )
+
+
+def get_entity_memory_service() -> EntityMemoryService:
+    """Get the process-wide entity memory service, flushed automatically at exit."""
+    global _entity_memory_service
+    if _entity_memory_service is None:
+        with _entity_lock:
+            if _entity_memory_service is None:
+                from agente_perfilamiento.adapters.file_entity_repository import (
+                    FileEntityMemoryRepository,
+                )
+
+                service = EntityMemoryService(FileEntityMemoryRepository())
+                atexit.register(service.flush)
+                _entity_memory_service = service
+    return _entity_memory_service
@@ -0,0 +1,238 @@
+"""
+Write-behind persistence for JSON documents.
+
+Writes are serialized on the caller's thread and handed to a single
+background worker through a bounded queue keyed by file path, so repeated
+writes to the same file coalesce into one. Every write goes to a temporary
+file that is renamed over the target, so readers never see partial JSON.
+Pending documents stay readable until they reach disk.
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from agente_perfilamiento.infrastructure.config.settings import settings
+from agente_perfilamiento.infrastructure.logging.logger import get_logger
+
+logger = get_logger(__name__)
+
+# fsync policies: skip it, sync the file before rename, or also sync the dir
+FSYNC_NONE = "none"
+FSYNC_FILE = "file"
+FSYNC_FULL = "full"
+
+# Queued marker for a pending deletion
+_DELETE = object()
+
+
+def atomic_write_text(path: Path, text: str, fsync_policy: str = FSYNC_FILE) -> None:
+    """Write ``text`` to a temp file in the target dir and rename it over ``path``."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+            if fsync_policy != FSYNC_NONE:
+                handle.flush()
+                os.fsync(handle.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    if fsync_policy == FSYNC_FULL and hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(path.parent, os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class WriteBehindWriter:
+    """Single background worker draining a bounded, coalescing write queue."""
+
+    def __init__(
+        self,
+        max_pending: int = 1024,
+        fsync_policy: str = FSYNC_FILE,
+        synchronous: bool = False,
+    ) -> None:
+        self._max_pending = max_pending
+        self._fsync_policy = fsync_policy
+        self._synchronous = synchronous
+        # path -> (serialized text or _DELETE, first enqueue time)
+        self._pending: "OrderedDict[Path, Tuple[Any, float]]" = OrderedDict()
+        # (path, value) being written by the worker, still readable
+        self._in_flight: Optional[Tuple[Path, Any]] = None
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        self._stats: Dict[str, float] = {
+            "writes": 0,
+            "coalesced": 0,
+            "errors": 0,
+            "max_lag_seconds": 0.0,
+            "last_write_ms": 0.0,
+        }
+
+    def write_json(self, path: Path, payload: Any, indent: Optional[int] = 2) -> None:
+        """Queue ``payload`` to be written to ``path`` as JSON."""
+        text = json.dumps(payload, ensure_ascii=False, indent=indent)
+        self._enqueue(Path(path), text)
+
+    def delete(self, path: Path) -> None:
+        """Queue the removal of ``path``, superseding any pending write."""
+        self._enqueue(Path(path), _DELETE)
+
+    def read_json(self, path: Path) -> Tuple[bool, Any]:
+        """
+        Return ``(True, payload)`` if ``path`` has a pending write, ``(True,
+        None)`` for a pending delete and ``(False, None)`` when nothing is queued.
+        """
+        path = Path(path)
+        with self._cond:
+            entry = self._pending.get(path)
+            in_flight = self._in_flight
+            if entry is None and in_flight is not None and in_flight[0] == path:
+                entry = in_flight[1:]
+        if entry is None:
+            return False, None
+        value = entry[0]
+        return True, None if value is _DELETE else json.loads(value)
+
+    def has_pending(self, path: Path) -> bool:
+        """Whether a write or delete of ``path`` is queued or in flight."""
+        path = Path(path)
+        with self._cond:
+            in_flight = self._in_flight
+            return path in self._pending or (
+                in_flight is not None and in_flight[0] == path
+            )
+
+    def pending_paths(self, directory: Path) -> Dict[Path, bool]:
+        """Pending paths in ``directory`` mapped to whether they will exist."""
+        directory = Path(directory)
+        with self._cond:
+            entries = [(path, value) for path, (value, _) in self._pending.items()]
+            if self._in_flight is not None:
+                entries.insert(0, self._in_flight)
+            return {
+                path: value is not _DELETE
+                for path, value in entries
+                if path.parent == directory
+            }
+
+    def _enqueue(self, path: Path, value: Any) -> None:
+        if self._synchronous or self._closed:
+            self._write(path, value)
+            return
+        with self._cond:
+            entry = self._pending.get(path)
+            if entry is not None:
+                # Keep the original enqueue time so lag reflects the oldest data
+                self._pending[path] = (value, entry[1])
+                self._stats["coalesced"] += 1
+                return
+            # Backpressure: block only when the worker is far behind
+            while len(self._pending) >= self._max_pending:
+                self._cond.wait()
+            self._pending[path] = (value, time.monotonic())
+            self._ensure_worker()
+            self._cond.notify_all()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name="write-behind", daemon=True
+            )
+            self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                path, (value, enqueued_at) = self._pending.popitem(last=False)
+                self._in_flight = (path, value)
+                lag = time.monotonic() - enqueued_at
+                self._stats["max_lag_seconds"] = max(
+                    self._stats["max_lag_seconds"], lag
+                )
+                self._cond.notify_all()
+            try:
+                self._write(path, value)
+            finally:
+                with self._cond:
+                    self._in_flight = None
+                    self._cond.notify_all()
+
+    def _write(self, path: Path, value: Any) -> None:
+        started = time.perf_counter()
+        try:
+            if value is _DELETE:
+                path.unlink(missing_ok=True)
+            else:
+                atomic_write_text(path, value, self._fsync_policy)
+        except Exception as e:
+            self._stats["errors"] += 1
+            logger.error(f"Write-behind failed for {path}: {e}")
+            return
+        self._stats["writes"] += 1
+        self._stats["last_write_ms"] = (time.perf_counter() - started) * 1000
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued write is on disk; ``False`` on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._in_flight is not None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Flush and switch to synchronous writes (used at shutdown)."""
+        self.flush(timeout)
+        self._closed = True
+
+    def stats(self) -> Dict[str, float]:
+        """Queue depth, current lag of the oldest pending write and counters."""
+        with self._cond:
+            oldest = next(iter(self._pending.values()), None)
+            lag = time.monotonic() - oldest[1] if oldest else 0.0
+            return {
+                **self._stats,
+                "depth": len(self._pending) + (self._in_flight is not None),
+                "lag_seconds": lag,
+            }
+
+
+_writer: Optional[WriteBehindWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_write_behind_writer() -> WriteBehindWriter:
+    """Get the process-wide writer, flushed automatically at exit."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = WriteBehindWriter(
+                    max_pending=settings.persist_queue_max,
+                    fsync_policy=settings.persist_fsync,
+                    synchronous=not settings.persist_write_behind,
+                )
+                atexit.register(_writer.close)
+    return _writer
@@ -5,25 +5,39 @@ This module provides the main execution logic for the chat agent,
 following hexagonal architecture principles with clean separation of concerns.
 """
 
+import argparse
+import json
+import sys
 import uuid
 from datetime import datetime
-from typing import Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 
-from agente_perfilamiento.application.orchestrator import app
-from agente_perfilamiento.domain.services.memory_service import MemoryService
+from langchain_core.messages import AIMessage
+
+from agente_perfilamiento.agents.entrevistador_node import FINAL_TRIGGER
+from agente_perfilamiento.application.orchestrator import app, warm_up_agents
+from agente_perfilamiento.application.use_cases.batch_reanalysis import (
+    run_batch_reanalysis,
+)
 from agente_perfilamiento.domain.models.conversation_state import ConversationState
 from agente_perfilamiento.infrastructure.config.settings import (
     ensure_data_directories,
+    preconnect_llm_clients,
     settings,
 )
 from agente_perfilamiento.infrastructure.logging.logger import (
     configure_logging,
     get_logger,
 )
-from agente_perfilamiento.adapters.in_memory_repository import (
-    InMemoryMemoryRepository,
+from agente_perfilamiento.infrastructure.metrics.registry import (
+    MEMORY_FLUSH_DURATION,
+    get_metrics,
+    serve_metrics,
 )
 from agente_perfilamiento.infrastructure.persistence.provider import (
+    create_memory_service,
+    get_entity_memory_service,
     get_memory_service,
     set_memory_service,
 )
@@ -62,6 +76,118 @@ def create_initial_state(
     )
 
 
+def _turn_config(conversation_id: str) -> Optional[Dict[str, Any]]:
+    """LangGraph config for a checkpointed turn (``None`` when stateless)."""
+    if app.checkpointer is None:
+        return None
+    return {"configurable": {"thread_id": conversation_id}}
+
+
+def _run_options(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if config is None:
+        return {}
+    return {"config": config, "durability": settings.checkpoint_durability}
+
+
+def _has_checkpoint(config: Dict[str, Any]) -> bool:
+    checkpointer = app.checkpointer
+    has_thread = getattr(checkpointer, "has_thread", None)
+    if has_thread is not None:
+        return has_thread(config["configurable"]["thread_id"])
+    return checkpointer.get_tuple(config) is not None
+
+
+def _prepare_turn_state(
+    user_id: str,
+    user_input: str,
+    conversation_id: Optional[str],
+    existing_state: Optional[ConversationState],
+) -> Tuple[ConversationState, Optional[Dict[str, Any]]]:
+    """Build the graph input and config for a conversation turn."""
+    if not conversation_id and existing_state:
+        conversation_id = existing_state.get("id_conversacion")
+    conversation_id = conversation_id or str(uuid.uuid4())
+    config = _turn_config(conversation_id)
+    user_message = {"role": "user", "content": user_input}
+
+    if config is not None and _has_checkpoint(config):
+        # The checkpoint holds the conversation: send only this turn's input,
+        # the message reducer appends it to the stored history
+        state = ConversationState(
+            id_user=user_id,
+            id_conversacion=conversation_id,
+            input_usuario=user_input,
+            mensajes_previos=[user_message],
+        )
+    elif existing_state:
+        # New containers only: the caller's state is never modified.
+        # With a checkpointer this seeds a thread that is not stored yet.
+        state = dict(existing_state)
+        state["id_conversacion"] = conversation_id
+        state["input_usuario"] = user_input
+        state["mensajes_previos"] = [
+            *(existing_state.get("mensajes_previos") or []),
+            user_message,
+        ]
+    else:
+        state = create_initial_state(user_id, user_input, conversation_id)
+        state["mensajes_previos"].append(user_message)
+
+    # The router stores the user message in short-term memory, tagged with
+    # the agent it routes to
+    return state, config
+
+
+def _flush_memory() -> None:
+    """Commit the short-term and entity memory writes buffered during the turn."""
+    with get_metrics().timer(MEMORY_FLUSH_DURATION):
+        try:
+            get_entity_memory_service().flush()
+        except Exception as e:
+            logger.error(f"Could not flush entity memory: {e}")
+        try:
+            memory = get_memory_service()
+        except RuntimeError:
+            return
+        try:
+            memory.flush()
+        except Exception as e:
+            logger.error(f"Could not flush short-term memory: {e}")
+
+
+def _print_metrics(command: str) -> None:
+    """Handle ``/metrics`` (JSON snapshot) and ``/metrics prom`` in the CLI."""
+    metrics = get_metrics()
+    if not metrics.enabled:
+        print("Metrics are disabled (set METRICS_ENABLED=true).")
+    elif command.split()[1:] == ["prom"]:
+        print(metrics.to_prometheus(), end="")
+    else:
+        print(json.dumps(metrics.snapshot(), indent=2))
+
+
+def _error_state(
+    state: ConversationState, config: Optional[Dict[str, Any]], error: Exception
+) -> ConversationState:
+    logger.error(f"Error processing conversation: {error}")
+    if config is not None:
+        # Report from the last saved checkpoint plus the failed input
+        try:
+            stored = app.get_state(config).values
+        except Exception:
+            stored = {}
+        if stored:
+            previous = stored.get("mensajes_previos") or []
+            messages = previous + state["mensajes_previos"]
+            state = {**stored, **state, "mensajes_previos": messages}
+    # Return state with error message
+    error_message = {
+        "role": "assistant",
+        "content": f"Lo siento, ocurrió un error procesando tu solicitud. Por favor intenta de nuevo.",
+    }
+    return {**state, "mensajes_previos": [*state["mensajes_previos"], error_message]}
+
+
 def process_conversation(
     user_id: str,
     user_input: str,
@@ -71,62 +197,193 @@ def process_conversation(
     """
     Processes a conversation turn through the agent orchestrator.
 
+    Blocking wrapper around the same turn logic as
+    :func:`aprocess_conversation`, for callers without an event loop.
+    With a checkpointer configured the conversation id is enough to resume
+    the session; ``existing_state`` is only needed for stateless graphs.
+
     Args:
         user_id: Unique identifier for the user
         user_input: User's message input
         conversation_id: Optional existing conversation ID
+        existing_state: Optional state returned by the previous turn
 
     Returns:
         Updated conversation state after processing
     """
     logger.info(f"Processing conversation for user {user_id}")
 
-    # Create or update conversation state
-    if existing_state:
-        state = {**existing_state}
-        # Ensure we track the conversation id consistently
-        if conversation_id:
-            state["id_conversacion"] = conversation_id
-        conversation_id = state.get("id_conversacion")
-        messages = list(state.get("mensajes_previos", []) or [])
-    else:
-        state = create_initial_state(user_id, user_input, conversation_id)
-        conversation_id = state["id_conversacion"]
-        messages = []
+    state, config = _prepare_turn_state(
+        user_id, user_input, conversation_id, existing_state
+    )
 
-    # Update input and message history
-    state["input_usuario"] = user_input
-    messages.append({"role": "user", "content": user_input})
-    state["mensajes_previos"] = messages
+    try:
+        # Process through agent orchestrator
+        result = app.invoke(state, **_run_options(config))
+        logger.info("Conversation processed successfully")
+        return result
+
+    except Exception as e:
+        return _error_state(state, config, e)
+
+    finally:
+        _flush_memory()
+
+
+async def aprocess_conversation(
+    user_id: str,
+    user_input: str,
+    conversation_id: Optional[str] = None,
+    existing_state: Optional[ConversationState] = None,
+) -> ConversationState:
+    """
+    Processes a conversation turn without blocking the event loop.
+
+    Nodes run their async variants and LLM calls are awaited, so a single
+    process can serve many concurrent interviews.
+
+    Args:
+        user_id: Unique identifier for the user
+        user_input: User's message input
+        conversation_id: Optional existing conversation ID
+        existing_state: Optional state returned by the previous turn
+
+    Returns:
+        Updated conversation state after processing
+    """
+    logger.info(f"Processing conversation for user {user_id}")
+
+    state, config = _prepare_turn_state(
+        user_id, user_input, conversation_id, existing_state
+    )
 
-    # Append user message to short-term memory (router as default agent context)
     try:
-        mem = get_memory_service()
-        mem.append_and_get_window(
-            agent_name="router_agent",
-            session_id=state["id_conversacion"],
-            role="user",
-            content=user_input,
-        )
-    except Exception:
-        pass
+        result = await app.ainvoke(state, **_run_options(config))
+        logger.info("Conversation processed successfully")
+        return result
+
+    except Exception as e:
+        return _error_state(state, config, e)
+
+    finally:
+        _flush_memory()
+
+
+def stream_conversation(
+    user_id: str,
+    user_input: str,
+    on_token: Callable[[str, str], None],
+    conversation_id: Optional[str] = None,
+    existing_state: Optional[ConversationState] = None,
+) -> ConversationState:
+    """
+    Processes a conversation turn while streaming LLM tokens as they arrive.
+
+    Tokens from user-facing LLM calls are passed to ``on_token(node, text)``
+    as soon as the model emits them; the returned state is the same one
+    :func:`process_conversation` would return.
+
+    Args:
+        user_id: Unique identifier for the user
+        user_input: User's message input
+        on_token: Callback receiving the active node name and a text chunk
+        conversation_id: Optional existing conversation ID
+        existing_state: Optional state returned by the previous turn
+
+    Returns:
+        Updated conversation state after processing
+    """
+    logger.info(f"Streaming conversation for user {user_id}")
+
+    state, config = _prepare_turn_state(
+        user_id, user_input, conversation_id, existing_state
+    )
 
     try:
-        # Process through agent orchestrator
-        result = app.invoke(state)
+        result = state
+        for mode, chunk in app.stream(
+            state, stream_mode=["messages", "values"], **_run_options(config)
+        ):
+            if mode == "messages":
+                message, metadata = chunk
+                content = getattr(message, "content", None)
+                if isinstance(message, AIMessage) and isinstance(content, str):
+                    if content:
+                        on_token(metadata.get("langgraph_node", ""), content)
+            else:
+                result = chunk
         logger.info("Conversation processed successfully")
         return result
 
     except Exception as e:
-        logger.error(f"Error processing conversation: {e}")
-        # Return state with error message
-        state["mensajes_previos"].append(
-            {
-                "role": "assistant",
-                "content": f"Lo siento, ocurrió un error procesando tu solicitud. Por favor intenta de nuevo.",
-            }
-        )
-        return state
+        return _error_state(state, config, e)
+
+    finally:
+        _flush_memory()
+
+
+class _StreamPrinter:
+    """Print streamed tokens per node, hiding the interviewer's end marker."""
+
+    def __init__(self, out=None) -> None:
+        self._out = out or sys.stdout
+        self._node: Optional[str] = None
+        self._pending = ""
+        self._streamed: Dict[str, List[str]] = {}
+
+    def __call__(self, node: str, token: str) -> None:
+        if node != self._node:
+            self.finish()
+            self._node = node
+            self._out.write("[Assistant]: ")
+        self._streamed.setdefault(node, []).append(token)
+        self._pending += token
+
+        # Hold back any tail that could still grow into the end marker
+        self._pending = self._pending.replace(FINAL_TRIGGER, "")
+        keep = 0
+        for size in range(min(len(FINAL_TRIGGER) - 1, len(self._pending)), 0, -1):
+            if FINAL_TRIGGER.startswith(self._pending[-size:]):
+                keep = size
+                break
+        ready = self._pending[: len(self._pending) - keep]
+        self._pending = self._pending[len(self._pending) - keep :]
+        if ready:
+            self._out.write(ready)
+            self._out.flush()
+
+    def finish(self) -> None:
+        """Flush the current node's output and end its line."""
+        if self._node is None:
+            return
+        self._out.write(self._pending + "\n")
+        self._out.flush()
+        self._pending = ""
+        self._node = None
+
+    def streamed_texts(self) -> Set[str]:
+        """Texts already shown to the user this turn (end marker removed)."""
+        return {
+            "".join(tokens).replace(FINAL_TRIGGER, "").strip()
+            for tokens in self._streamed.values()
+        }
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="agente_perfilamiento")
+    commands = parser.add_subparsers(dest="command")
+    reanalyze = commands.add_parser(
+        "reanalyze", help="re-run the analyst over every stored interview"
+    )
+    reanalyze.add_argument("--interviews-dir", type=Path, default=None)
+    reanalyze.add_argument(
+        "--output", type=Path, default=None, help="JSONL results and resume checkpoint"
+    )
+    reanalyze.add_argument("--concurrency", type=int, default=4)
+    reanalyze.add_argument(
+        "--rate", type=float, default=None, help="max LLM requests per second"
+    )
+    return parser.parse_args(argv)
 
 
 def main():
@@ -136,23 +393,40 @@ def main():
     This provides a simple CLI interface for testing the agent.
     For web interfaces, use the appropriate framework integration.
     """
+    args = _parse_args()
     configure_logging(settings.log_level)
     ensure_data_directories()
 
-    # Initialize short-term memory service (in-memory adapter for now)
-    repo = InMemoryMemoryRepository()
-    memory_service = MemoryService(
-        repository=repo,
-        ttl_seconds=settings.memory_ttl_seconds,
-        max_items_per_agent=settings.memory_max_items_per_agent,
-        window_limit=settings.memory_window_limit,
-    )
+    if args.command == "reanalyze":
+        stats = run_batch_reanalysis(
+            interviews_dir=args.interviews_dir,
+            output_path=args.output,
+            concurrency=args.concurrency,
+            rate_per_second=args.rate,
+        )
+        print(json.dumps(stats))
+        if get_metrics().enabled:
+            print(json.dumps(get_metrics().snapshot()))
+        return
+
+    # Initialize short-term memory service (MEMORY_PROVIDER selects the store)
+    memory_service = create_memory_service()
     set_memory_service(memory_service)
 
+    # Build agent executors up front so the first user does not pay for it
+    warm_up_agents()
+    if settings.llm_preconnect:
+        preconnect_llm_clients()
+
+    if settings.metrics_enabled and settings.metrics_port:
+        serve_metrics(settings.metrics_port)
+
     logger.info("Starting Agente_Perfilamiento CLI")
 
     print(f"Bienvenido a itti Academy")
     print("Type 'quit' or 'exit' to end the conversation.")
+    if settings.metrics_enabled:
+        print("Type '/metrics' (or '/metrics prom') for latency metrics.")
     print("-" * 50)
 
     user_id = input("¿Mba'eteko pio? Bienvenido a itti Academy! ¿Cuál es tu nombre? : ").strip()
@@ -174,25 +448,46 @@ def main():
             if not user_input:
                 continue
 
+            if user_input.startswith("/metrics"):
+                _print_metrics(user_input)
+                continue
+
             # Process conversation
-            result = process_conversation(
-                user_id=user_id,
-                user_input=user_input,
-                conversation_id=conversation_id,
-                existing_state=current_state,
-            )
-
-            # Display only new assistant responses
+            streamed: Set[str] = set()
+            if settings.cli_streaming:
+                printer = _StreamPrinter()
+                result = stream_conversation(
+                    user_id=user_id,
+                    user_input=user_input,
+                    on_token=printer,
+                    conversation_id=conversation_id,
+                    existing_state=current_state,
+                )
+                printer.finish()
+                streamed = printer.streamed_texts()
+            else:
+                result = process_conversation(
+                    user_id=user_id,
+                    user_input=user_input,
+                    conversation_id=conversation_id,
+                    existing_state=current_state,
+                )
+
+            # Display only new assistant responses not already streamed
             messages = result.get("mensajes_previos", []) or []
             new_messages = messages[last_rendered_index:]
             for message in new_messages:
                 if message.get("role") == "assistant":
+                    if message["content"].strip() in streamed:
+                        continue
                     print(f"[Assistant]: {message['content']}")
             last_rendered_index = len(messages)
 
-            # Update conversation ID for continuation
+            # Update conversation ID for continuation; the checkpointer keeps
+            # the state itself, so only stateless graphs carry it over
             conversation_id = result["id_conversacion"]
-            current_state = result
+            if app.checkpointer is None:
+                current_state = result
 
         except KeyboardInterrupt:
             print("\nGoodbye!")
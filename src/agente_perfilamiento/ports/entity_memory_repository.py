@@ -3,7 +3,7 @@ Application port for entity (user profile) memory repository.
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Callable, Dict
 
 
 class EntityMemoryRepository(ABC):
@@ -19,3 +19,14 @@ class EntityMemoryRepository(ABC):
     def clear(self, user_id: str) -> None:
         ...
 
+    def update(self, user_id: str, change: Callable[[Dict], Dict]) -> None:
+        """
+        Replace a user's attributes with ``change(current)``.
+
+        Repositories shared between threads override this to run the
+        read-modify-write under a per-user lock.
+        """
+        self.upsert(user_id, change(self.get(user_id)))
+
+    def flush(self) -> None:
+        """Persist buffered writes; repositories that write through need nothing."""
@@ -1,5 +1,9 @@
 """
 Application port for short-term memory repository.
+
+Repositories keep one ordered log per session. Every item is tagged with
+the agent that produced or received it, and an agent's window is the view
+of the log filtered by that tag.
 """
 
 from abc import ABC, abstractmethod
@@ -15,8 +19,9 @@ class MemoryRepository(ABC):
 
     @abstractmethod
     def get_recent(
-        self, agent_name: str, session_id: str, limit: Optional[int] = None
+        self, agent_name: Optional[str], session_id: str, limit: Optional[int] = None
     ) -> List[ShortTermMemoryItem]:  # pragma: no cover
+        """Latest items of an agent's view (the whole log if ``agent_name`` is None)."""
         ...
 
     @abstractmethod
@@ -27,8 +32,12 @@ class MemoryRepository(ABC):
         ttl_seconds: Optional[int],
         max_items: Optional[int],
     ) -> None:  # pragma: no cover
+        """Drop expired session items and cap the agent's view at ``max_items``."""
         ...
 
     @abstractmethod
     def clear_session(self, session_id: str) -> None:  # pragma: no cover
         ...
+
+    def flush(self) -> None:
+        """Persist buffered writes; repositories that write through need nothing."""
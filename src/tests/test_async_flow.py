@@ -0,0 +1,94 @@
+import asyncio
+import os
+
+os.environ.setdefault("LLM_API_KEY", "test-key")
+
+from agente_perfilamiento.agents.base_agent import BaseAgent
+from agente_perfilamiento.domain.services.memory_service import MemoryService
+from agente_perfilamiento.adapters.in_memory_repository import (
+    InMemoryMemoryRepository,
+)
+from agente_perfilamiento.infrastructure.config.settings import settings
+from agente_perfilamiento.infrastructure.persistence.provider import set_memory_service
+from agente_perfilamiento.infrastructure.logging.logger import configure_logging
+from agente_perfilamiento.infrastructure.persistence.write_behind import (
+    get_write_behind_writer,
+)
+from agente_perfilamiento.main import aprocess_conversation
+
+
+def _fake_response(agent_name: str) -> str:
+    return {
+        "welcome_agent": "Bienvenido, empecemos la entrevista.",
+        "entrevistador_agent": "Pregunta",
+        "analista_agent": "Resumen generado.",
+        "final_agent": "Gracias, aqui tienes los proximos pasos.",
+        "memory_agent": "Memoria consolidada.",
+    }.get(agent_name, "Mensaje auxiliar.")
+
+
+def test_concurrent_sessions_share_one_event_loop(monkeypatch, tmp_path):
+    configure_logging("WARNING")
+    # Interview summaries and long-term memory shards stay out of data/
+    monkeypatch.setattr(settings, "memory_dir", str(tmp_path / "memory"))
+    monkeypatch.setattr(settings, "interviews_dir", str(tmp_path / "interviews"))
+    set_memory_service(
+        MemoryService(
+            repository=InMemoryMemoryRepository(),
+            ttl_seconds=None,
+            max_items_per_agent=50,
+            window_limit=12,
+        )
+    )
+
+    in_flight = 0
+    peak = 0
+
+    async def fake_aexecute_agent(self, state, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            return _fake_response(self.agent_name)
+        finally:
+            in_flight -= 1
+
+    def fail_execute_agent(self, state, **kwargs):
+        raise AssertionError("sync execute_agent must not run on the async path")
+
+    monkeypatch.setattr(BaseAgent, "aexecute_agent", fake_aexecute_agent)
+    monkeypatch.setattr(BaseAgent, "execute_agent", fail_execute_agent)
+    # Per-answer tag extraction runs on the profiler's worker threads
+    monkeypatch.setattr(
+        BaseAgent,
+        "execute_json",
+        lambda self, state, **kwargs: {"tags_acumulados_vector": {"empatia": 1}},
+    )
+
+    turns = ["hola", "Me gusta programar.", "terminar", "ok", "gracias"]
+
+    async def run_session(index: int):
+        state = None
+        for turn in turns:
+            state = await aprocess_conversation(
+                user_id=f"async-user-{index}",
+                user_input=turn,
+                conversation_id=f"async-flow-{index}",
+                existing_state=state,
+            )
+        return state
+
+    async def run_all():
+        return await asyncio.gather(*(run_session(i) for i in range(8)))
+
+    states = asyncio.run(run_all())
+    # Summaries are written behind; let them land in tmp_path
+    get_write_behind_writer().flush(timeout=5)
+
+    assert peak > 1
+    for state in states:
+        assert state["evaluation_complete"] is True
+        assert state["agent_recommendations"] == "Resumen generado."
+        assert state["mensajes_previos"][-1]["content"].endswith("proximos pasos.")
+        assert state["interview_summary_path"].startswith(str(tmp_path))
@@ -0,0 +1,140 @@
+import os
+from types import SimpleNamespace
+
+os.environ.setdefault("LLM_API_KEY", "test-key")
+
+from agente_perfilamiento.agents.analista_node import AnalistaAgent
+from agente_perfilamiento.agents.base_agent import MEMORY_BLOCK_VARIABLE
+from agente_perfilamiento.agents.welcome_node import WelcomeAgent
+
+
+def test_executors_are_built_once_per_layout():
+    agent = WelcomeAgent()
+
+    plain = agent.get_executor(with_memory=False)
+    with_memory = agent.get_executor(with_memory=True)
+
+    assert agent.get_executor(with_memory=False) is plain
+    assert agent.get_executor(with_memory=True) is with_memory
+    assert plain is not with_memory
+
+
+def test_warm_up_builds_all_layouts():
+    agent = WelcomeAgent()
+    agent.warm_up()
+
+    assert set(agent._executor_cache) == {(False, "tools"), (True, "tools")}
+
+
+def test_tool_less_calls_use_direct_chain(monkeypatch):
+    from itertools import cycle
+
+    from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+    from langchain_core.messages import AIMessage
+
+    from agente_perfilamiento.agents import base_agent
+    from agente_perfilamiento.agents.fallback_node import FallbackAgent
+
+    # No bind_tools: any attempt to build a tool-calling agent would fail
+    replies = cycle(
+        [
+            AIMessage(content=" Reformula tu pregunta, por favor. "),
+            AIMessage(content='Aqui tienes: {"perfil_nombre": "ana"} Listo.'),
+        ]
+    )
+    monkeypatch.setattr(
+        base_agent,
+        "get_llm_model",
+        lambda *a, **k: GenericFakeChatModel(messages=replies),
+    )
+
+    agent = FallbackAgent()
+    assert not agent.has_tools()
+    assert agent.execute_agent({"input_usuario": "???"}) == (
+        "Reformula tu pregunta, por favor."
+    )
+    assert agent.execute_json({"input_usuario": "perfil"}) == {"perfil_nombre": "ana"}
+    assert set(agent._executor_cache) == {(False, "direct"), (False, "json")}
+
+
+def test_memory_block_is_a_prompt_variable():
+    agent = WelcomeAgent()
+    prompt = agent.create_chat_prompt(
+        [("system", f"Memoria reciente:\n{{{MEMORY_BLOCK_VARIABLE}}}")]
+    )
+
+    assert MEMORY_BLOCK_VARIABLE in prompt.input_variables
+
+    state = {
+        "context_data": {
+            "short_term_memory": [
+                {"role": "user", "content": "hola {sin variables}"},
+                {"role": "assistant", "content": "¡Bienvenido!"},
+            ]
+        }
+    }
+    block = agent._format_memory_block(state)
+    assert block == "user: hola {sin variables}\nassistant: ¡Bienvenido!"
+    assert agent._format_memory_block({"context_data": {}}) is None
+
+
+def test_response_cache_tiers_and_counters(tmp_path, monkeypatch):
+    from agente_perfilamiento.infrastructure.cache import response_cache
+    from agente_perfilamiento.infrastructure.cache.response_cache import ResponseCache
+
+    cache = ResponseCache(max_entries=1, db_path=str(tmp_path / "cache.sqlite3"))
+    cache.set("a", "respuesta a")
+    cache.set("b", "respuesta b")  # evicts "a" from the LRU tier
+
+    assert cache.get("b") == "respuesta b"
+    assert cache.get("a") == "respuesta a"  # served by the SQLite tier
+    assert cache.get("c") is None
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+    # Expired entries are misses in both tiers
+    expired = ResponseCache(ttl_seconds=60)
+    expired.set("k", "v")
+    later = response_cache.time.time() + 120
+    monkeypatch.setattr(response_cache, "time", SimpleNamespace(time=lambda: later))
+    assert expired.get("k") is None
+
+
+def test_cacheable_agent_skips_llm_on_repeat(monkeypatch):
+    from agente_perfilamiento.agents import base_agent
+    from agente_perfilamiento.infrastructure.cache.response_cache import ResponseCache
+
+    cache = ResponseCache()
+    monkeypatch.setattr(base_agent, "get_response_cache", lambda: cache)
+
+    calls = []
+
+    class _Executor:
+        def invoke(self, params, config=None):
+            calls.append(params)
+            return {"output": " ¡Hola! "}
+
+    agent = AnalistaAgent()
+    monkeypatch.setattr(
+        agent,
+        "_prepare_invocation",
+        lambda state, kwargs, mode=None: (
+            _Executor(),
+            {"user_message": state["input_usuario"]},
+        ),
+    )
+
+    def run(message, use_tools=False):
+        return agent.execute_agent({"input_usuario": message}, use_tools=use_tools)
+
+    assert run("hola") == "¡Hola!"
+    assert run("hola") == "¡Hola!"
+    assert run("buenas") == "¡Hola!"
+    assert len(calls) == 2
+
+    # Tool results depend on the user, so tool calls always reach the LLM
+    assert run("hola", use_tools=True) == "¡Hola!"
+    assert run("hola", use_tools=True) == "¡Hola!"
+    assert len(calls) == 4
+    assert not WelcomeAgent.cacheable
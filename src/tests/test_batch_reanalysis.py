@@ -0,0 +1,86 @@
+import asyncio
+import json
+import time
+
+from agente_perfilamiento.agents.analista_node import AnalistaAgent
+from agente_perfilamiento.application.use_cases.batch_reanalysis import (
+    BatchReanalysis,
+)
+from agente_perfilamiento.infrastructure.config.settings import settings
+from agente_perfilamiento.infrastructure.llm.rate_limiter import AsyncRateLimiter
+
+
+def _interviews(directory, count):
+    directory.mkdir()
+    for n in range(count):
+        payload = {
+            "id_user": f"u{n}",
+            "session_id": f"s{n}",
+            "user_profile": {"respuestas_test": ["logica", "datos"]},
+        }
+        (directory / f"u{n}_s{n}.json").write_text(
+            json.dumps(payload), encoding="utf-8"
+        )
+
+
+def test_batch_runs_on_fake_llm_and_resumes(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "llm_provider", "fake")
+    monkeypatch.setattr(settings, "llm_fake_response", "Analisis simulado")
+    monkeypatch.setattr(settings, "llm_fake_latency_ms", 20)
+    _interviews(tmp_path / "interviews", 6)
+    output = tmp_path / "out.jsonl"
+
+    batch = BatchReanalysis(
+        AnalistaAgent(),
+        tmp_path / "interviews",
+        output,
+        concurrency=3,
+        rate_per_second=100,
+    )
+    started = time.perf_counter()
+    stats = asyncio.run(batch.run())
+    assert stats["analysed"] == 6 and stats["fallback"] == 0
+    # Six 20ms calls three at a time
+    assert time.perf_counter() - started < 0.12 * 3
+
+    lines = output.read_text(encoding="utf-8").splitlines()
+    records = [json.loads(line) for line in lines]
+    names = sorted(r["source_file"] for r in records)
+    assert names == [f"u{n}_s{n}.json" for n in range(6)]
+    assert {r["response"] for r in records} == {"Analisis simulado"}
+
+    (tmp_path / "interviews" / "u9_s9.json").write_text(
+        json.dumps({"id_user": "u9", "session_id": "s9"}), encoding="utf-8"
+    )
+    again = asyncio.run(batch.run())
+    assert again["analysed"] == 1 and again["skipped"] == 6
+
+
+def test_failed_analyses_are_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "llm_provider", "fake")
+    _interviews(tmp_path / "interviews", 2)
+    output = tmp_path / "out.jsonl"
+    agent = AnalistaAgent()
+
+    async def broken(summary):
+        raise RuntimeError("modelo caido")
+
+    monkeypatch.setattr(agent, "areanalyze", broken)
+    batch = BatchReanalysis(agent, tmp_path / "interviews", output, concurrency=2)
+    assert asyncio.run(batch.run())["fallback"] == 2
+
+    monkeypatch.undo()
+    monkeypatch.setattr(settings, "llm_provider", "fake")
+    assert asyncio.run(batch.run())["analysed"] == 2
+    assert batch.completed() == {"u0_s0.json", "u1_s1.json"}
+
+
+def test_rate_limiter_spaces_requests():
+    async def acquire_all():
+        limiter = AsyncRateLimiter(rate=50, burst=1)
+        started = time.perf_counter()
+        for _ in range(6):
+            await limiter.acquire()
+        return time.perf_counter() - started
+
+    assert asyncio.run(acquire_all()) >= 0.09
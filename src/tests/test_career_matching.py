@@ -0,0 +1,60 @@
+import os
+
+os.environ.setdefault("LLM_API_KEY", "test-key")
+
+from agente_perfilamiento.agents.analista_node import AnalistaAgent
+from agente_perfilamiento.domain.services.career_matching_service import (
+    CareerMatcher,
+    normalize_tag,
+    profile_tags,
+)
+
+
+def test_prompt_dossiers_are_parsed_into_matrix():
+    matcher = AnalistaAgent().get_matcher()
+
+    assert len(matcher.careers) == 7
+    assert "Diseñador UI/UX" in matcher.careers
+    assert "empatia" in matcher.tags
+
+
+def test_ranking_is_deterministic_with_soft_skill_weighting():
+    matcher = CareerMatcher(
+        [
+            ("Soft", ["empatia", "paciencia"]),
+            ("Hard", ["docker_kubernetes", "routing_switching"]),
+        ]
+    )
+    # Same number of matched tags; the soft-skill career wins
+    ranking = matcher.rank({"empatia": 1, "docker_kubernetes": 1})
+
+    assert [entry["carrera"] for entry in ranking] == ["Soft", "Hard"]
+    assert ranking[0]["match_pct"] == 50.0
+    assert ranking[0]["contribuciones"] == {"empatia": 50.0}
+    assert matcher.rank({"empatia": 1, "docker_kubernetes": 1}) == ranking
+
+
+def test_analista_ranks_structured_profile():
+    agent = AnalistaAgent()
+    profile = {
+        "tags_acumulados_vector": {
+            "creatividad_visual": 2,
+            "Empatía": 2,
+            "investigacion_usuarios": 1,
+            "sql_extraccion_datos (nivel bajo)": 1,
+        }
+    }
+
+    ranking = agent.rank_careers({"structured_profile": profile})
+
+    assert ranking[0]["carrera"] == "Diseñador UI/UX"
+    assert set(ranking[0]["contribuciones"]) == {
+        "creatividad_visual",
+        "empatia",
+        "investigacion_usuarios",
+    }
+    assert normalize_tag("sql_extraccion_datos (nivel bajo)") == "sql_extraccion_datos"
+    assert agent.rank_careers({"user_profile": {}}) is None
+    assert profile_tags(
+        {"dimensiones_mapeadas": {"intereses": ["empatia"], "estilo_aprendizaje": []}}
+    ) == {"empatia": 1}
@@ -0,0 +1,131 @@
+import os
+
+os.environ.setdefault("LLM_API_KEY", "test-key")
+
+import pytest
+
+from agente_perfilamiento import main
+from agente_perfilamiento.adapters.in_memory_repository import (
+    InMemoryMemoryRepository,
+)
+from agente_perfilamiento.agents.base_agent import BaseAgent
+from agente_perfilamiento.application.orchestrator import get_compiled_agent
+from agente_perfilamiento.domain.services.memory_service import MemoryService
+from agente_perfilamiento.infrastructure.persistence.checkpointer import (
+    CheckpointRetention,
+    InMemoryCheckpointer,
+    SqliteCheckpointer,
+)
+from agente_perfilamiento.infrastructure.persistence.provider import set_memory_service
+from agente_perfilamiento.main import aprocess_conversation, process_conversation
+
+
+@pytest.fixture(autouse=True)
+def fake_agents(monkeypatch):
+    set_memory_service(MemoryService(repository=InMemoryMemoryRepository()))
+    monkeypatch.setattr(
+        BaseAgent, "execute_agent", lambda self, state, **kwargs: "Pregunta"
+    )
+
+    async def fake_aexecute_agent(self, state, **kwargs):
+        return "Pregunta"
+
+    monkeypatch.setattr(BaseAgent, "aexecute_agent", fake_aexecute_agent)
+    monkeypatch.setattr(BaseAgent, "execute_json", lambda self, state, **kwargs: None)
+
+
+def _use_checkpointer(monkeypatch, checkpointer):
+    monkeypatch.setattr(main, "app", get_compiled_agent(checkpointer))
+
+
+def _config(thread_id):
+    return {"configurable": {"thread_id": thread_id}}
+
+
+def test_turns_resume_from_conversation_id(monkeypatch):
+    saver = InMemoryCheckpointer(CheckpointRetention(keep_last=2))
+    _use_checkpointer(monkeypatch, saver)
+
+    for answer in ["hola", "Me gusta programar", "Prefiero trabajar en grupo"]:
+        state = process_conversation("ckpt-user", answer, "ckpt-flow")
+
+    assert [m["role"] for m in state["mensajes_previos"]] == ["user", "assistant"] * 3
+    assert state["user_profile"]["respuestas_test"] == [
+        "Me gusta programar",
+        "Prefiero trabajar en grupo",
+    ]
+    assert state["current_question_index"] == 2
+    # One checkpoint per turn, pruned to the retention limit
+    assert len(list(saver.list(_config("ckpt-flow")))) == 2
+
+
+@pytest.mark.asyncio
+async def test_async_turns_resume_from_conversation_id(monkeypatch, tmp_path):
+    saver = SqliteCheckpointer.from_path(str(tmp_path / "checkpoints.sqlite3"))
+    _use_checkpointer(monkeypatch, saver)
+
+    await aprocess_conversation("ckpt-user", "hola", "ckpt-async")
+    state = await aprocess_conversation("ckpt-user", "Me gusta programar", "ckpt-async")
+
+    assert state["current_question_index"] == 1
+    assert len(state["mensajes_previos"]) == 4
+
+
+def test_sqlite_sessions_survive_reopen_and_store_deltas(monkeypatch, tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite3")
+    saver = SqliteCheckpointer.from_path(path, CheckpointRetention(keep_last=2))
+    _use_checkpointer(monkeypatch, saver)
+    process_conversation("ckpt-user", "hola", "ckpt-sqlite")
+    process_conversation("ckpt-user", "Me gusta programar", "ckpt-sqlite")
+    saver.conn.close()
+
+    reopened = SqliteCheckpointer.from_path(path, CheckpointRetention(keep_last=2))
+    _use_checkpointer(monkeypatch, reopened)
+    state = process_conversation(
+        "ckpt-user", "Prefiero trabajar en grupo", "ckpt-sqlite"
+    )
+
+    assert state["current_question_index"] == 2
+    assert len(state["mensajes_previos"]) == 6
+    with reopened.cursor(transaction=False) as cur:
+        cur.execute(
+            "SELECT COUNT(*) FROM checkpoint_blobs WHERE channel = 'fecha_inicio'"
+        )
+        # Set on the first turn only, so never written again
+        assert cur.fetchone()[0] == 1
+        cur.execute("SELECT COUNT(*) FROM checkpoints")
+        assert cur.fetchone()[0] == 2
+        cur.execute(
+            "SELECT type, blob, base_version, length FROM checkpoint_blobs"
+            " WHERE channel = 'mensajes_previos' ORDER BY version"
+        )
+        rows = cur.fetchall()
+
+    # The first turn is stored whole, later turns only add their two messages
+    slices = [reopened.serde.loads_typed((type_, blob)) for type_, blob, _, _ in rows]
+    assert [base is None for _, _, base, _ in rows] == [True, False, False]
+    assert [length for _, _, _, length in rows] == [2, 4, 6]
+    assert [[m["content"] for m in part] for part in slices] == [
+        ["hola", "Pregunta"],
+        ["Me gusta programar", "Pregunta"],
+        ["Prefiero trabajar en grupo", "Pregunta"],
+    ]
+    whole = reopened.serde.dumps_typed(state["mensajes_previos"])[1]
+    assert len(rows[-1][1]) < len(whole) / 2
+
+    restored = reopened.get_tuple(_config("ckpt-sqlite")).checkpoint
+    assert restored["channel_values"]["mensajes_previos"] == state["mensajes_previos"]
+
+
+def test_idle_threads_are_swept(monkeypatch):
+    saver = InMemoryCheckpointer(CheckpointRetention(idle_ttl_seconds=60))
+    _use_checkpointer(monkeypatch, saver)
+
+    process_conversation("ckpt-user", "hola", "ckpt-idle")
+    saver._last_seen["ckpt-idle"] -= 120
+    saver._next_sweep = 0.0
+    process_conversation("ckpt-user", "hola", "ckpt-active")
+
+    assert not saver.has_thread("ckpt-idle")
+    assert saver.has_thread("ckpt-active")
+    assert all(key[0] != "ckpt-idle" for key in saver.blobs)
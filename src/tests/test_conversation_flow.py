@@ -13,17 +13,23 @@ from agente_perfilamiento.infrastructure.persistence.provider import (
     set_memory_service,
 )
 from agente_perfilamiento.infrastructure.logging.logger import configure_logging
+from agente_perfilamiento.infrastructure.persistence.write_behind import (
+    get_write_behind_writer,
+)
 from agente_perfilamiento.infrastructure.config.settings import settings
 from agente_perfilamiento.main import process_conversation
 
 
 @pytest.mark.usefixtures("caplog")
-def test_interview_analyst_flow(monkeypatch, caplog):
+def test_interview_analyst_flow(monkeypatch, caplog, tmp_path):
     os.environ.setdefault("LLM_API_KEY", "test-key")
     os.environ.setdefault("LLM_MODEL", "gpt-4o-mini")
     os.environ.setdefault("LLM_PROVIDER", "openai")
 
     configure_logging("WARNING")
+    # Summaries, long-term memory and layout markers stay out of data/
+    monkeypatch.setattr(settings, "memory_dir", str(tmp_path / "memory"))
+    monkeypatch.setattr(settings, "interviews_dir", str(tmp_path / "interviews"))
 
     repo = InMemoryMemoryRepository()
     memory_service = MemoryService(
@@ -61,6 +67,13 @@ def test_interview_analyst_flow(monkeypatch, caplog):
         return "Mensaje auxiliar."
 
     monkeypatch.setattr(BaseAgent, "execute_agent", fake_execute_agent, raising=False)
+    monkeypatch.setattr(
+        BaseAgent,
+        "execute_json",
+        lambda self, state, **kwargs: {
+            "tags_acumulados_vector": {"pensamiento_logico": 1}
+        },
+    )
 
     conversation_id = "test-flow"
     user_id = "user-test"
@@ -90,9 +103,14 @@ def test_interview_analyst_flow(monkeypatch, caplog):
     assert state.get("evaluation_complete") is True
     assert state.get("agent_recommendations")
     assert state.get("interview_summary")
+    # Built incrementally; "Definitivamente..." already matches the "fin" keyword
+    structured = state["interview_summary"]["structured_profile"]
+    assert structured["tags_acumulados_vector"] == {"pensamiento_logico": 2}
+    assert structured["perfil_nombre"] == user_id
 
     summary_path = state.get("interview_summary_path")
     assert summary_path
+    assert get_write_behind_writer().flush(timeout=5)
     summary_file = Path(summary_path)
     assert summary_file.exists()
 
@@ -123,7 +141,3 @@ def test_interview_analyst_flow(monkeypatch, caplog):
         if msg.get("role") == "assistant" and "Resumen generado" in msg.get("content", "")
     ]
     assert analyst_messages
-
-    # Cleanup generated summary file to keep test artifacts tidy
-    if summary_file.exists():
-        summary_file.unlink()
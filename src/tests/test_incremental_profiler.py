@@ -0,0 +1,99 @@
+import threading
+import time
+
+from agente_perfilamiento.agents.incremental_profiler import IncrementalProfiler
+
+
+def test_answers_are_merged_in_background():
+    seen_threads = set()
+
+    def extract(question, answer):
+        seen_threads.add(threading.current_thread().name)
+        return {
+            "dimensiones_mapeadas": {
+                "intereses": [answer],
+                "competencias_tecnicas_iniciales": {"sql_extraccion_datos": question},
+            },
+            "tags_acumulados_vector": {answer: 1, "adaptabilidad": 2},
+        }
+
+    profiler = IncrementalProfiler(extract, max_workers=2)
+    profiler.submit("s1", "bajo", "empatia")
+    profiler.submit("s1", "medio", "analitico")
+    profiler.submit("s1", "medio", "empatia")
+
+    profile = profiler.collect("s1", timeout=5)
+    profiler.shutdown()
+
+    assert all(name.startswith("profiler") for name in seen_threads)
+    assert profile["tags_acumulados_vector"] == {
+        "empatia": 2,
+        "analitico": 1,
+        "adaptabilidad": 6,
+    }
+    assert sorted(profile["dimensiones_mapeadas"]["intereses"]) == [
+        "analitico",
+        "empatia",
+    ]
+    assert profiler.collect("s1", timeout=5) is None
+
+
+def test_failed_extraction_falls_back_to_full_profile():
+    answers = iter([{"tags_acumulados_vector": {"empatia": 1}}, None])
+    profiler = IncrementalProfiler(lambda q, a: next(answers), max_workers=1)
+    profiler.submit("s2", "", "uno")
+    profiler.submit("s2", "", "dos")
+
+    assert profiler.collect("s2", timeout=5) is None
+    profiler.shutdown()
+
+
+def test_deltas_merge_in_submission_order():
+    def extract(question, answer):
+        # The first answer finishes last
+        if answer == "primera":
+            time.sleep(0.05)
+        return {
+            "dimensiones_mapeadas": {
+                "competencias_tecnicas_iniciales": {"logica": answer},
+            },
+            "tags_acumulados_vector": {answer: 1},
+        }
+
+    profiler = IncrementalProfiler(extract, max_workers=2)
+    profiler.submit("s3", "", "primera")
+    profiler.submit("s3", "", "segunda")
+
+    profile = profiler.collect("s3", timeout=5, expected_answers=2)
+    profiler.shutdown()
+
+    levels = profile["dimensiones_mapeadas"]["competencias_tecnicas_iniciales"]
+    assert levels == {"logica": "segunda"}
+
+
+def test_profile_missing_answers_is_not_used():
+    # e.g. the session was evicted or earlier turns ran on another worker
+    profiler = IncrementalProfiler(
+        lambda q, a: {"tags_acumulados_vector": {a: 1}}, max_workers=1
+    )
+    profiler.submit("s4", "", "tercera")
+
+    assert profiler.collect("s4", timeout=5, expected_answers=3) is None
+    profiler.shutdown()
+
+
+def test_known_missing_answers_fall_back_without_waiting():
+    release = threading.Event()
+
+    def extract(question, answer):
+        release.wait(5)
+        return {"tags_acumulados_vector": {answer: 1}}
+
+    profiler = IncrementalProfiler(extract, max_workers=1)
+    profiler.submit("s5", "", "tercera")
+
+    started = time.monotonic()
+    assert profiler.collect("s5", timeout=5, expected_answers=3) is None
+    assert time.monotonic() - started < 1
+    release.set()
+    profiler.shutdown()
@@ -0,0 +1,143 @@
+import json
+
+import pytest
+
+from agente_perfilamiento.infrastructure.analytics import interview_export
+from agente_perfilamiento.infrastructure.analytics.interview_export import (
+    InterviewExporter,
+)
+
+# The exporter imports pyarrow lazily, on first use
+pytest.importorskip("pyarrow")
+
+
+def _interview(user_id, session_id, created_at, tags):
+    return {
+        "id_user": user_id,
+        "session_id": session_id,
+        "created_at": created_at,
+        "current_question_index": 2,
+        "user_profile": {"respuestas_test": ["a", "b"], "intereses": [], "valores": []},
+        "structured_profile": {
+            "perfil_nombre": user_id,
+            "dimensiones_mapeadas": {
+                "intereses": ["datos"],
+                "competencias_tecnicas_iniciales": {"pensamiento_logico": "alto"},
+            },
+            "tags_acumulados_vector": tags,
+        },
+    }
+
+
+def _write(directory, name, payload):
+    (directory / name).write_text(json.dumps(payload), encoding="utf-8")
+
+
+def test_export_is_incremental_partitioned_and_compactable(tmp_path):
+    source = tmp_path / "interviews"
+    source.mkdir()
+    _write(
+        source,
+        "ana_s1.json",
+        _interview("ana", "s1", "2025-09-25T14:04:49", {"datos": 2}),
+    )
+    _write(
+        source,
+        "bo_s2.json",
+        _interview("bo", "s2", "2025-10-01T09:00:00", {"datos": 1}),
+    )
+    exporter = InterviewExporter(source, tmp_path / "analytics", batch_size=1)
+
+    assert exporter.export() == {
+        "files": 2,
+        "interviews": 2,
+        "dimensions": 4,
+        "tags": 2,
+    }
+    assert exporter.export()["files"] == 0
+
+    _write(
+        source,
+        "ana_s3.json",
+        _interview("ana", "s3", "2025-09-30T10:00:00", {"web": 3}),
+    )
+    assert exporter.export()["files"] == 1
+    assert sorted(p.name for p in (tmp_path / "analytics" / "tags").iterdir()) == [
+        "month=2025-09",
+        "month=2025-10",
+    ]
+
+    assert exporter.compact()["tags"] == 1
+    september = tmp_path / "analytics" / "tags" / "month=2025-09"
+    assert [p.name.startswith("part-compacted-") for p in september.iterdir()] == [True]
+    tags = exporter.dataset("tags").to_table().to_pylist()
+    totals = {}
+    for row in tags:
+        totals[row["tag"]] = totals.get(row["tag"], 0) + row["weight"]
+    assert totals == {"datos": 3.0, "web": 3.0}
+
+    dimensions = exporter.dataset("dimensions").to_table().to_pylist()
+    assert len(dimensions) == 6
+    assert {row["nivel"] for row in dimensions if row["dimension"] != "intereses"} == {
+        "alto"
+    }
+
+
+def test_malformed_documents_do_not_abort_the_export(tmp_path):
+    source = tmp_path / "interviews"
+    source.mkdir()
+    broken = _interview("ana", "s1", "2025-09-25T14:04:49", {"datos": 2})
+    broken["structured_profile"]["dimensiones_mapeadas"] = ["datos"]
+    broken["user_profile"] = "sin perfil"
+    _write(source, "ana_s1.json", broken)
+    _write(source, "bo_s2.json", {**broken, "structured_profile": "pendiente"})
+    _write(source, "list.json", [broken])
+    exporter = InterviewExporter(source, tmp_path / "analytics")
+
+    assert exporter.export() == {
+        "files": 2,
+        "interviews": 2,
+        "dimensions": 0,
+        "tags": 1,
+    }
+
+
+def test_wrongly_typed_fields_are_coerced_or_skipped(tmp_path, monkeypatch):
+    source = tmp_path / "interviews"
+    source.mkdir()
+    odd = _interview("ana", "s1", "2025-09-25T14:04:49", {"datos": 2})
+    odd["current_question_index"] = "3"
+    odd["structured_profile"]["perfil_nombre"] = {"nombre": "Ana"}
+    _write(source, "ana_s1.json", odd)
+    _write(source, "bo_s2.json", {**odd, "current_question_index": "tres"})
+    exporter = InterviewExporter(source, tmp_path / "analytics")
+
+    assert exporter.export()["interviews"] == 2
+    rows = exporter.dataset("interviews").to_table().to_pylist()
+    assert sorted(r["current_question_index"] or 0 for r in rows) == [0, 3]
+    assert {r["perfil_nombre"] for r in rows} == {"{'nombre': 'Ana'}"}
+
+    # Rows that still do not fit the schema are dropped, not the whole batch
+    flatten = interview_export.flatten_interview
+
+    def with_bad_tag(name, payload):
+        rows = flatten(name, payload)
+        if name == "cy_s3.json":
+            rows["tags"][0]["weight"] = "pesado"
+        return rows
+
+    monkeypatch.setattr(interview_export, "flatten_interview", with_bad_tag)
+    _write(
+        source, "cy_s3.json", _interview("cy", "s3", "2025-09-26T10:00:00", {"a": 1})
+    )
+    _write(
+        source, "di_s4.json", _interview("di", "s4", "2025-09-27T10:00:00", {"b": 1})
+    )
+
+    assert exporter.export() == {
+        "files": 2,
+        "interviews": 2,
+        "dimensions": 4,
+        "tags": 1,
+    }
+    assert exporter.export()["files"] == 0
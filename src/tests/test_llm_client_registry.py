@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault("LLM_API_KEY", "test-key")
+
+import pytest
+
+from agente_perfilamiento.infrastructure.config import settings as settings_module
+from agente_perfilamiento.infrastructure.config.settings import (
+    close_llm_clients,
+    get_llm_model,
+    preconnect_llm_clients,
+    settings,
+)
+
+
+class _StubOpenAIHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible server that records client connections."""
+
+    protocol_version = "HTTP/1.1"
+    connections: list = []
+
+    def setup(self):
+        super().setup()
+        type(self).connections.append(self.client_address)
+
+    def log_message(self, *args):  # keep test output quiet
+        pass
+
+    def _send_json(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send_json({"object": "list", "data": []})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        self._send_json(
+            {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": 0,
+                "model": request.get("model", "stub"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "hola"},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 1,
+                    "completion_tokens": 1,
+                    "total_tokens": 2,
+                },
+            }
+        )
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    _StubOpenAIHandler.connections = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubOpenAIHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(settings, "llm_provider", "openai")
+    monkeypatch.setattr(settings, "llm_model_name", "stub-model")
+    monkeypatch.setattr(
+        settings, "llm_base_url", f"http://127.0.0.1:{server.server_port}/v1"
+    )
+    close_llm_clients()
+    try:
+        yield _StubOpenAIHandler
+    finally:
+        close_llm_clients()
+        server.shutdown()
+        server.server_close()
+
+
+def test_llm_clients_are_shared_per_key(stub_server):
+    first = get_llm_model()
+    assert get_llm_model() is first
+    assert get_llm_model(temperature=0.5) is not first
+    assert len(settings_module._llm_clients) == 2
+
+
+def test_llm_calls_reuse_pooled_connection(stub_server):
+    preconnect_llm_clients()
+    assert len(stub_server.connections) == 1
+
+    for _ in range(3):
+        assert get_llm_model().invoke("hola").content == "hola"
+
+    # Pre-connect and every completion went over a single keep-alive connection
+    assert len(stub_server.connections) == 1
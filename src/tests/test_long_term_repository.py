@@ -0,0 +1,104 @@
+import json
+
+from agente_perfilamiento.adapters.file_long_term_repository import (
+    DATA_FILE,
+    MANIFEST_FILE,
+    FileLongTermMemoryRepository,
+    _cache,
+)
+
+
+def _record(user_id, session_id, resumen):
+    return {"id_user": user_id, "id_conversacion": session_id, "resumen": resumen}
+
+
+def test_prefix_user_ids_are_isolated(tmp_path):
+    repo = FileLongTermMemoryRepository(tmp_path)
+    repo.save_summary(_record("user", "s1", "primero"))
+    repo.save_summary(_record("user_2", "s2", "otro usuario"))
+    repo.save_summary(_record("user", "s3", "segundo"))
+
+    assert [r["id_conversacion"] for r in repo.list_user_summaries("user")] == [
+        "s1",
+        "s3",
+    ]
+    assert repo.read_user_summaries_text("user") == "primero\n\n---\n\nsegundo"
+    assert repo.read_user_summaries_text("user_2") == "otro usuario"
+    assert repo.list_user_summaries("nobody") == []
+
+    assert [e["session"] for e in repo.read_manifest("user")] == ["s1", "s3"]
+    assert repo.get_summary("user", "s3")["resumen"] == "segundo"
+    assert repo.get_summary("user", "s2") is None
+
+
+def test_cached_text_is_invalidated_by_new_summaries(tmp_path):
+    writer = FileLongTermMemoryRepository(tmp_path)
+    reader = FileLongTermMemoryRepository(tmp_path)
+    writer.save_summary(_record("u1", "s1", "uno"))
+    assert reader.read_user_summaries_text("u1") == "uno"
+    assert reader.read_user_summaries_text("u1") is reader.read_user_summaries_text(
+        "u1"
+    )
+
+    writer.save_summary(_record("u1", "s2", "dos"))
+    assert reader.read_user_summaries_text("u1") == "uno\n\n---\n\ndos"
+
+
+def test_flat_files_are_migrated_once(tmp_path):
+    for name, record in (
+        ("ana_20240101s1.json", _record("ana", "s1", "uno")),
+        ("ana_20240102s2.json", _record("ana", "s2", "dos")),
+        ("ana_b_20240101s3.json", _record("ana_b", "s3", "tres")),
+    ):
+        (tmp_path / name).write_text(json.dumps(record), encoding="utf-8")
+
+    repo = FileLongTermMemoryRepository(tmp_path)
+
+    assert repo.read_user_summaries_text("ana") == "uno\n\n---\n\ndos"
+    assert repo.read_user_summaries_text("ana_b") == "tres"
+    assert [e["date"] for e in repo.read_manifest("ana")] == ["20240101", "20240102"]
+    assert not list(tmp_path.glob("*.json"))
+
+    # A stray flat file after migration is not picked up again
+    (tmp_path / "ana_20240103s4.json").write_text(
+        json.dumps(_record("ana", "s4", "cuatro")), encoding="utf-8"
+    )
+    assert len(FileLongTermMemoryRepository(tmp_path).list_user_summaries("ana")) == 2
+
+
+def test_saving_a_session_again_supersedes_it(tmp_path):
+    repo = FileLongTermMemoryRepository(tmp_path)
+    for version in ("v0", "v1", "v2"):
+        repo.save_summary(_record("u", "s1", version))
+    repo.save_summary(_record("u", "s2", "otra"))
+
+    assert [r["resumen"] for r in repo.list_user_summaries("u")] == ["v2", "otra"]
+    assert repo.read_user_summaries_text("u") == "v2\n\n---\n\notra"
+    assert [e["session"] for e in repo.read_manifest("u")] == ["s1", "s2"]
+    assert repo.get_summary("u", "s1")["resumen"] == "v2"
+
+
+def test_clear_cache_only_drops_this_repository(tmp_path):
+    repo = FileLongTermMemoryRepository(tmp_path / "a")
+    other = FileLongTermMemoryRepository(tmp_path / "b")
+    repo.save_summary(_record("u", "s1", "uno"))
+    other.save_summary(_record("u", "s1", "otro"))
+    repo.list_user_summaries("u")
+    other.list_user_summaries("u")
+
+    repo.clear_cache()
+
+    assert repo.users_dir / "u" / DATA_FILE not in _cache
+    assert other.users_dir / "u" / DATA_FILE in _cache
+    assert repo.read_user_summaries_text("u") == "uno"
+
+
+def test_torn_manifest_lines_are_skipped(tmp_path):
+    repo = FileLongTermMemoryRepository(tmp_path)
+    repo.save_summary(_record("u", "s1", "uno"))
+    # A crash mid-append leaves a partial last line
+    with (repo.users_dir / "u" / MANIFEST_FILE).open("a", encoding="utf-8") as f:
+        f.write('{"session": "s2", "off')
+
+    assert [e["session"] for e in repo.read_manifest("u")] == ["s1"]
+    assert repo.get_summary("u", "s1")["resumen"] == "uno"
@@ -0,0 +1,99 @@
+from agente_perfilamiento.adapters.in_memory_repository import (
+    InMemoryMemoryRepository,
+)
+from agente_perfilamiento.domain.services.memory_service import (
+    SESSION_AGENT,
+    MemoryService,
+)
+
+
+def _contents(window):
+    return [item["content"] for item in window]
+
+
+def test_agent_windows_are_views_of_one_session_log():
+    repo = InMemoryMemoryRepository()
+    memory = MemoryService(repository=repo, max_items_per_agent=2)
+
+    memory.append("welcome_agent", "s1", "assistant", "hola")
+    memory.append("entrevistador_agent", "s1", "user", "r1")
+    memory.append("entrevistador_agent", "s1", "assistant", "p1")
+    memory.append("entrevistador_agent", "s1", "user", "r2")
+
+    assert _contents(memory.get_window("entrevistador_agent", "s1")) == ["p1", "r2"]
+    # The capped item left the log too: nothing is stored twice or orphaned
+    assert _contents(memory.get_window(SESSION_AGENT, "s1")) == ["hola", "p1", "r2"]
+    assert len(repo.get_recent(None, "s1")) == 3
+
+    memory.clear_session("s1")
+    assert memory.get_window(SESSION_AGENT, "s1") == []
+    assert memory.get_window("welcome_agent", "s1") == []
+
+
+def test_log_bound_evicts_oldest_from_its_view():
+    memory = MemoryService(repository=InMemoryMemoryRepository(default_maxlen=2))
+
+    memory.append("welcome_agent", "s1", "assistant", "hola")
+    memory.append("entrevistador_agent", "s1", "user", "r1")
+    window = memory.append_and_get_window(
+        "entrevistador_agent", "s1", "assistant", "p1"
+    )
+
+    assert _contents(window) == ["r1", "p1"]
+    assert memory.get_window("welcome_agent", "s1") == []
+
+
+def test_sweep_drops_idle_sessions_and_updates_counts():
+    repo = InMemoryMemoryRepository(ttl_seconds=60)
+    memory = MemoryService(repository=repo)
+    memory.append("welcome_agent", "idle", "assistant", "hola")
+    memory.append("welcome_agent", "active", "assistant", "hola")
+    for _ in range(5):
+        memory.append("entrevistador_agent", "active", "user", "r")
+    repo._sessions["idle"].items[-1].created_at -= 120
+
+    assert (repo.stats()["sessions"], repo.stats()["items"]) == (2, 7)
+    assert repo.sweep() == 1
+    stats = repo.stats()
+    assert (stats["sessions"], stats["items"], stats["swept_sessions"]) == (1, 6, 1)
+    assert _contents(memory.get_window("entrevistador_agent", "active", limit=2)) == [
+        "r",
+        "r",
+    ]
+
+
+def test_global_budget_evicts_least_recent_session_and_spills(tmp_path):
+    evicted = []
+    repo = InMemoryMemoryRepository(
+        max_total_items=4,
+        spill_dir=tmp_path,
+        on_evict=lambda session_id, items: evicted.append((session_id, len(items))),
+    )
+    memory = MemoryService(repository=repo)
+    for session_id in ("s1", "s2"):
+        memory.append("welcome_agent", session_id, "assistant", f"hola {session_id}")
+        memory.append("entrevistador_agent", session_id, "user", "r1")
+    memory.get_window("welcome_agent", "s1")  # s1 is now the most recent
+    memory.append("welcome_agent", "s3", "assistant", "hola s3")
+
+    assert evicted == [("s2", 2)]
+    assert repo.stats()["items"] == 3
+    assert repo.stats()["spilled_sessions"] == 1
+
+    # Reading a spilled session reloads it (evicting the next LRU session)
+    assert _contents(memory.get_window(SESSION_AGENT, "s2")) == ["hola s2", "r1"]
+    assert evicted[-1] == ("s1", 2)
+    assert repo.stats()["items"] == 3
+
+
+def test_items_are_slotted_and_share_public_dicts():
+    memory = MemoryService(repository=InMemoryMemoryRepository())
+    memory.append("welcome_agent", "s1", "assistant", "hola", metadata={"turno": 1})
+
+    first = memory.get_window("welcome_agent", "s1")[0]
+    assert memory.get_window("welcome_agent", "s1")[0] is first
+    assert set(first) == {"role", "content", "created_at", "agent_name"}
+
+    item = memory._repo.get_recent("welcome_agent", "s1")[0]
+    assert not hasattr(item, "__dict__")
+    assert item.metadata == {"turno": 1}
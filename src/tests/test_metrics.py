@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from langchain_core.tools import tool
+
+from agente_perfilamiento.application import orchestrator
+from agente_perfilamiento.infrastructure.metrics import registry
+from agente_perfilamiento.infrastructure.metrics.registry import (
+    NODE_DURATION,
+    NODE_ERRORS,
+    TOOL_DURATION,
+    MetricsRegistry,
+    timed_tool,
+)
+
+
+def test_histogram_quantiles_and_exports():
+    metrics = MetricsRegistry()
+    for _ in range(90):
+        metrics.observe("lat_seconds", 0.003, agent="a")
+    for _ in range(10):
+        metrics.observe("lat_seconds", 0.7, agent="a")
+    metrics.inc("calls_total", agent="a", outcome="ok")
+
+    row = metrics.snapshot()["histograms"]["lat_seconds"][0]
+    assert row["labels"] == {"agent": "a"} and row["count"] == 100
+    assert 2.5 <= row["p50_ms"] <= 5
+    assert 500 <= row["p95_ms"] <= 1000 and row["p99_ms"] <= 1000
+
+    text = metrics.to_prometheus()
+    assert "# TYPE lat_seconds histogram" in text
+    assert 'lat_seconds_bucket{agent="a",le="0.005"} 90' in text
+    assert 'lat_seconds_bucket{agent="a",le="+Inf"} 100' in text
+    assert 'calls_total{agent="a",outcome="ok"} 1' in text
+
+
+def test_disabled_registry_records_nothing_and_wraps_nothing(monkeypatch):
+    monkeypatch.setattr(registry, "_metrics", MetricsRegistry(enabled=False))
+    metrics = registry.get_metrics()
+    with metrics.timer("lat_seconds"):
+        pass
+    metrics.inc("calls_total")
+
+    @tool
+    def lookup(query: str) -> str:
+        """Look something up."""
+        return query
+
+    assert timed_tool(lookup) is lookup
+    node = orchestrator._node("welcome", lambda state: state, None)
+    assert node.func.__name__ == "<lambda>"
+    assert metrics.snapshot() == {"histograms": {}, "counters": {}}
+
+
+def test_nodes_and_tools_are_timed_when_enabled(monkeypatch):
+    monkeypatch.setattr(registry, "_metrics", MetricsRegistry(enabled=True))
+
+    def failing(state):
+        raise ValueError("boom")
+
+    async def anode(state):
+        return {"seen": True}
+
+    node = orchestrator._node("welcome", lambda state: {"seen": True}, anode)
+    assert node.invoke({}) == {"seen": True}
+    assert asyncio.run(node.ainvoke({})) == {"seen": True}
+    with pytest.raises(ValueError):
+        orchestrator._node("fallback", failing, anode).invoke({})
+
+    @tool
+    def lookup(query: str) -> str:
+        """Look something up."""
+        return query.upper()
+
+    assert timed_tool(lookup).invoke({"query": "x"}) == "X"
+
+    snapshot = registry.get_metrics().snapshot()
+    nodes = {
+        row["labels"]["node"]: row["count"]
+        for row in snapshot["histograms"][NODE_DURATION]
+    }
+    assert nodes == {"welcome": 2, "fallback": 1}
+    assert snapshot["counters"][NODE_ERRORS][0]["labels"] == {"node": "fallback"}
+    assert snapshot["histograms"][TOOL_DURATION][0]["labels"] == {"tool": "lookup"}
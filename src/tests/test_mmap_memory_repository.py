@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+
+from agente_perfilamiento.adapters.mmap_memory_repository import (
+    MmapMemoryRepository,
+)
+from agente_perfilamiento.domain.services.memory_service import (
+    SESSION_AGENT,
+    MemoryService,
+)
+
+
+def _contents(window):
+    return [item["content"] for item in window]
+
+
+def _append_from_worker(path, count):
+    memory = MemoryService(repository=MmapMemoryRepository(path))
+    for i in range(count):
+        memory.append("entrevistador_agent", "shared", "user", f"hijo {i}")
+
+
+def test_windows_prune_and_overflow(tmp_path):
+    path = str(tmp_path / "memory.mmap")
+    repo = MmapMemoryRepository(path, slots=8, capacity=4, inline_bytes=32)
+    memory = MemoryService(repository=repo, max_items_per_agent=2)
+    long_answer = "respuesta larga " * 10
+
+    memory.append("welcome_agent", "s1", "assistant", "hola", metadata={"turno": 1})
+    memory.append("entrevistador_agent", "s1", "user", "r1")
+    memory.append("entrevistador_agent", "s1", "assistant", "p1")
+    memory.append("entrevistador_agent", "s1", "user", long_answer)
+
+    assert _contents(memory.get_window("entrevistador_agent", "s1")) == [
+        "p1",
+        long_answer,
+    ]
+    assert _contents(memory.get_window(SESSION_AGENT, "s1")) == [
+        "hola",
+        "p1",
+        long_answer,
+    ]
+    assert repo.get_recent("welcome_agent", "s1")[0].metadata == {"turno": 1}
+    assert repo.stats()["overflow_bytes"] == len(long_answer)
+
+    # The fifth record overwrites "hola" in the 4-record ring; the agent cap
+    # then drops "p1"
+    memory.append("entrevistador_agent", "s1", "assistant", "p2")
+    assert _contents(memory.get_window(SESSION_AGENT, "s1")) == [long_answer, "p2"]
+
+    memory.clear_session("s1")
+    assert memory.get_window(SESSION_AGENT, "s1") == []
+
+
+def test_sessions_are_shared_between_processes(tmp_path):
+    path = str(tmp_path / "memory.mmap")
+    memory = MemoryService(repository=MmapMemoryRepository(path, slots=8, capacity=128))
+
+    worker = multiprocessing.get_context("fork").Process(
+        target=_append_from_worker, args=(path, 50)
+    )
+    worker.start()
+    for i in range(50):
+        memory.append("entrevistador_agent", "shared", "user", f"padre {i}")
+    worker.join(timeout=30)
+
+    window = _contents(memory.get_window("entrevistador_agent", "shared", limit=None))
+    assert worker.exitcode == 0
+    assert len(window) == 100
+    assert [c for c in window if c.startswith("hijo")] == [
+        f"hijo {i}" for i in range(50)
+    ]
+
+
+def test_full_table_reuses_the_least_recent_slot(tmp_path):
+    repo = MmapMemoryRepository(str(tmp_path / "memory.mmap"), slots=2, capacity=4)
+    memory = MemoryService(repository=repo)
+    for session_id in ("s1", "s2", "s3"):
+        memory.append("welcome_agent", session_id, "assistant", f"hola {session_id}")
+
+    assert memory.get_window("welcome_agent", "s1") == []
+    assert _contents(memory.get_window("welcome_agent", "s3")) == ["hola s3"]
+    assert repo.stats()["sessions"] == 2
+
+
+def test_overflow_ring_bounds_disk_use(tmp_path):
+    path = str(tmp_path / "memory.mmap")
+    repo = MmapMemoryRepository(
+        path, slots=4, capacity=16, inline_bytes=16, overflow_bytes=256
+    )
+    memory = MemoryService(repository=repo)
+    answers = [f"respuesta {i:02d} " + "x" * 80 for i in range(10)]
+    # Cleared sessions must not keep their overflow bytes either
+    for session_id in ("s2", "s3"):
+        memory.append("entrevistador_agent", session_id, "user", answers[0])
+        memory.clear_session(session_id)
+    for answer in answers:
+        memory.append("entrevistador_agent", "s1", "user", answer)
+
+    assert os.path.getsize(f"{path}.overflow") <= 32 + 256
+    assert repo.stats()["overflow_bytes"] == 256
+    # Overwritten payloads expire; the two newest still fit in the ring
+    window = _contents(memory.get_window("entrevistador_agent", "s1", limit=None))
+    assert window == answers[-2:]
+
+    memory.append("entrevistador_agent", "s4", "user", "y" * 1000)
+    assert _contents(memory.get_window("entrevistador_agent", "s4")) == ["y" * 16]
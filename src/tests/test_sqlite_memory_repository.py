@@ -0,0 +1,48 @@
+from agente_perfilamiento.adapters.sqlite_memory_repository import (
+    SqliteMemoryRepository,
+)
+from agente_perfilamiento.domain.services.memory_service import (
+    SESSION_AGENT,
+    MemoryService,
+)
+
+
+def _contents(window):
+    return [item["content"] for item in window]
+
+
+def test_turn_writes_are_batched_and_shared_across_workers(tmp_path):
+    path = str(tmp_path / "memory.sqlite3")
+    worker_a = MemoryService(
+        repository=SqliteMemoryRepository(path), max_items_per_agent=2
+    )
+    worker_b = MemoryService(repository=SqliteMemoryRepository(path))
+
+    worker_a.append("welcome_agent", "s1", "assistant", "hola")
+    worker_a.append("entrevistador_agent", "s1", "user", "r1")
+    assert worker_a._repo.stats()["pending"] == 2
+    assert worker_b.get_window(SESSION_AGENT, "s1") == []
+
+    worker_a.append("entrevistador_agent", "s1", "assistant", "p1")
+    worker_a.append("entrevistador_agent", "s1", "user", "r2")
+    worker_a.flush()
+
+    assert _contents(worker_b.get_window(SESSION_AGENT, "s1")) == ["hola", "p1", "r2"]
+    latest = worker_b.get_window("entrevistador_agent", "s1", limit=1)
+    assert _contents(latest) == ["r2"]
+
+
+def test_memory_survives_restart_and_clear_session(tmp_path):
+    path = str(tmp_path / "memory.sqlite3")
+    repo = SqliteMemoryRepository(path)
+    memory = MemoryService(repository=repo)
+    memory.append("welcome_agent", "s1", "assistant", "hola", metadata={"turno": 1})
+    memory.append("welcome_agent", "s2", "assistant", "hola")
+    repo.close()
+
+    reopened = SqliteMemoryRepository(path)
+    item = reopened.get_recent("welcome_agent", "s1")[0]
+    assert (item.content, item.metadata) == ("hola", {"turno": 1})
+
+    MemoryService(repository=reopened).clear_session("s1")
+    assert reopened.stats() == {"sessions": 1, "items": 1, "pending": 0}
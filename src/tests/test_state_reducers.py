@@ -0,0 +1,90 @@
+import os
+
+os.environ.setdefault("LLM_API_KEY", "test-key")
+
+from agente_perfilamiento.adapters.in_memory_repository import (
+    InMemoryMemoryRepository,
+)
+from agente_perfilamiento.agents.base_agent import BaseAgent
+from agente_perfilamiento.domain.models.conversation_state import (
+    append_only,
+    merge_profile,
+)
+from agente_perfilamiento.domain.services.memory_service import MemoryService
+from agente_perfilamiento.infrastructure.persistence.provider import set_memory_service
+from agente_perfilamiento import main
+from agente_perfilamiento.application.orchestrator import get_compiled_agent
+from agente_perfilamiento.main import process_conversation
+
+
+def test_reducers_never_modify_their_inputs():
+    history = [{"role": "user", "content": "hola"}]
+    reply = [{"role": "assistant", "content": "hey"}]
+    assert append_only(history, reply) == history + reply
+    assert len(history) == 1
+    assert append_only(None, reply) is not reply
+
+    profile = {"respuestas_test": ["a"], "nivel": "bajo"}
+    merged = merge_profile(profile, {"respuestas_test": ["b"], "nivel": "medio"})
+    assert merged == {"respuestas_test": ["a", "b"], "nivel": "medio"}
+    assert profile == {"respuestas_test": ["a"], "nivel": "bajo"}
+
+
+def test_turns_leave_earlier_states_untouched(monkeypatch):
+    # Stateless graph: the caller carries the state between turns
+    monkeypatch.setattr(main, "app", get_compiled_agent())
+    set_memory_service(MemoryService(repository=InMemoryMemoryRepository()))
+    monkeypatch.setattr(
+        BaseAgent, "execute_agent", lambda self, state, **kwargs: "Pregunta"
+    )
+    monkeypatch.setattr(BaseAgent, "execute_json", lambda self, state, **kwargs: None)
+
+    states = [process_conversation("reducer-user", "hola", "reducer-flow")]
+    for answer in ["Me gusta programar", "Prefiero trabajar en grupo"]:
+        states.append(
+            process_conversation(
+                "reducer-user", answer, "reducer-flow", existing_state=states[-1]
+            )
+        )
+    state = states[-1]
+
+    assert [len(s["mensajes_previos"]) for s in states] == [2, 4, 6]
+    assert states[1]["user_profile"]["respuestas_test"] == ["Me gusta programar"]
+    assert [m["role"] for m in state["mensajes_previos"]] == ["user", "assistant"] * 3
+    assert [m["content"] for m in state["conversation_history"]] == [
+        "Me gusta programar",
+        "Prefiero trabajar en grupo",
+    ]
+    assert state["user_profile"]["respuestas_test"] == [
+        "Me gusta programar",
+        "Prefiero trabajar en grupo",
+    ]
+    assert state["current_question_index"] == 2
+    assert state["saludo_mostrado"] is True
+
+
+def test_failed_turn_leaves_caller_state_untouched(monkeypatch):
+    monkeypatch.setattr(main, "app", get_compiled_agent())
+    set_memory_service(MemoryService(repository=InMemoryMemoryRepository()))
+    monkeypatch.setattr(
+        BaseAgent, "execute_agent", lambda self, state, **kwargs: "Pregunta"
+    )
+    monkeypatch.setattr(BaseAgent, "execute_json", lambda self, state, **kwargs: None)
+    state = process_conversation("reducer-user", "hola", "reducer-error")
+    before = [dict(m) for m in state["mensajes_previos"]]
+
+    def failing_invoke(*args, **kwargs):
+        raise RuntimeError("graph error")
+
+    monkeypatch.setattr(main.app, "invoke", failing_invoke)
+    failed = process_conversation(
+        "reducer-user", "otra", "reducer-error", existing_state=state
+    )
+
+    assert state["mensajes_previos"] == before
+    assert [m["role"] for m in failed["mensajes_previos"]] == [
+        "user",
+        "assistant",
+        "user",
+        "assistant",
+    ]
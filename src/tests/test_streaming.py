@@ -0,0 +1,54 @@
+import io
+import os
+from itertools import cycle
+
+os.environ.setdefault("LLM_API_KEY", "test-key")
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from agente_perfilamiento.agents import base_agent
+from agente_perfilamiento.agents.welcome_node import welcome_agent
+from agente_perfilamiento.domain.services.memory_service import MemoryService
+from agente_perfilamiento.adapters.in_memory_repository import (
+    InMemoryMemoryRepository,
+)
+from agente_perfilamiento.infrastructure.persistence.provider import set_memory_service
+from agente_perfilamiento.main import _StreamPrinter, stream_conversation
+
+
+class _StreamingFakeModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def test_stream_conversation_emits_tokens_and_final_state(monkeypatch):
+    set_memory_service(MemoryService(repository=InMemoryMemoryRepository()))
+    reply = "Hola, bienvenido a itti Academy"
+    model = _StreamingFakeModel(messages=cycle([AIMessage(content=reply)]))
+    monkeypatch.setattr(base_agent, "get_llm_model", lambda *a, **k: model)
+    monkeypatch.setattr(welcome_agent, "_executor_cache", {})
+
+    tokens = []
+    state = stream_conversation(
+        user_id="stream-user",
+        user_input="hola",
+        on_token=lambda node, text: tokens.append((node, text)),
+        conversation_id="stream-flow",
+    )
+
+    assert len(tokens) > 1
+    assert {node for node, _ in tokens} == {"welcome"}
+    assert "".join(text for _, text in tokens) == reply
+    assert state["mensajes_previos"][-1] == {"role": "assistant", "content": reply}
+
+
+def test_stream_printer_hides_end_marker():
+    out = io.StringIO()
+    printer = _StreamPrinter(out)
+    for token in ["Gracias por ", "todo <<FIN", "_ENTREV", "ISTA>>"]:
+        printer("entrevistador", token)
+    printer.finish()
+
+    assert out.getvalue() == "[Assistant]: Gracias por todo \n"
+    assert printer.streamed_texts() == {"Gracias por todo"}
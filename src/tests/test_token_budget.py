@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from agente_perfilamiento.infrastructure.llm.token_budget import (
+    PromptBudgeter,
+    TokenCounter,
+)
+
+
+@pytest.fixture
+def budgeter(monkeypatch):
+    # Use the offline approximation (4 chars per token) for stable counts
+    monkeypatch.setattr(TokenCounter, "_load_encoding", lambda self: None)
+    return PromptBudgeter(TokenCounter("test-model"))
+
+
+def test_memory_window_is_trimmed_before_user_message(budgeter):
+    system_prompt = "s" * 400  # 100 tokens
+    user_message = "u" * 80  # 20 tokens
+    memory = [f"user: {'m' * 34}" for _ in range(10)]  # 10 tokens + newline each
+
+    message, kept = budgeter.allocate(150, system_prompt, user_message, memory)
+
+    assert message == user_message
+    assert len(kept) == 2
+    assert kept == memory[-2:]
+
+
+def test_user_message_is_truncated_only_when_it_alone_overflows(budgeter):
+    message, kept = budgeter.allocate(60, "s" * 200, "u" * 400, ["user: hola"])
+
+    assert budgeter.counter.count(message) <= 10
+    assert message.endswith("[...]")
+    assert kept == []
+
+
+def test_json_payload_is_never_cut_mid_structure(budgeter):
+    payload = {"respuestas": [f"respuesta {i}" for i in range(40)]}
+    user_message = "Datos:\n" + json.dumps(payload, separators=(",", ":"))
+
+    message, kept = budgeter.allocate(60, "s" * 200, user_message, ["user: hola"])
+
+    assert message == user_message
+    assert json.loads(message.split("\n", 1)[1]) == payload
+    assert kept == []
+
+
+def test_system_prompt_over_budget_keeps_user_message(budgeter):
+    message, kept = budgeter.allocate(50, "s" * 400, "hola", ["user: hola"])
+
+    assert message == "hola"
+    assert kept == []
+
+
+def test_fit_json_drops_oldest_entries_without_mutating_payload(budgeter):
+    history = [
+        {"role": "user", "content": f"respuesta {i:02d} " * 4} for i in range(20)
+    ]
+    payload = {
+        "user_profile": {"intereses": ["datos"]},
+        "conversation_history": history,
+    }
+
+    text = budgeter.fit_json(payload, 200, trim_paths=[("conversation_history",)])
+    fitted = json.loads(text)
+
+    assert budgeter.counter.count(text) <= 200
+    assert 0 < len(fitted["conversation_history"]) < 20
+    assert fitted["conversation_history"][-1] == history[-1]
+    assert fitted["user_profile"] == {"intereses": ["datos"]}
+    assert len(payload["conversation_history"]) == 20
+
+
+def test_static_counts_are_cached(budgeter, monkeypatch):
+    calls = []
+    original = TokenCounter.count
+    monkeypatch.setattr(
+        TokenCounter,
+        "count",
+        lambda self, text: calls.append(text) or original(self, text),
+    )
+
+    prompt = "prompt estatico " * 10
+    count_static = budgeter.counter.count_static
+    assert count_static(prompt) == count_static(prompt)
+    assert calls.count(prompt) == 1
@@ -0,0 +1,126 @@
+import json
+import threading
+
+from agente_perfilamiento.adapters.file_entity_repository import (
+    FileEntityMemoryRepository,
+)
+from agente_perfilamiento.domain.services.entity_memory_service import (
+    EntityMemoryService,
+)
+from agente_perfilamiento.infrastructure.persistence import write_behind
+from agente_perfilamiento.infrastructure.persistence.write_behind import (
+    WriteBehindWriter,
+)
+
+
+def test_repeated_writes_coalesce_and_land_atomically(tmp_path, monkeypatch):
+    writer = WriteBehindWriter(fsync_policy="none")
+    target = tmp_path / "perfil.json"
+
+    # Hold the worker on a first write so the next ones stay queued
+    release = threading.Event()
+    original = write_behind.atomic_write_text
+
+    def slow_write(path, text, fsync_policy):
+        release.wait(5)
+        original(path, text, fsync_policy)
+
+    monkeypatch.setattr(write_behind, "atomic_write_text", slow_write)
+    writer.write_json(tmp_path / "otro.json", {"n": 0})
+    for n in range(1, 4):
+        writer.write_json(target, {"n": n})
+
+    assert writer.read_json(target) == (True, {"n": 3})
+    assert writer.stats()["coalesced"] == 2
+    assert writer.stats()["depth"] >= 1
+
+    release.set()
+    assert writer.flush(timeout=5)
+    assert json.loads(target.read_text(encoding="utf-8")) == {"n": 3}
+    assert writer.stats()["writes"] == 2
+    assert writer.stats()["depth"] == 0
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_entity_repository_reads_its_own_queued_writes(tmp_path, monkeypatch):
+    writer = WriteBehindWriter()
+    monkeypatch.setattr(write_behind, "_writer", writer)
+    repo = FileEntityMemoryRepository(base_dir=tmp_path)
+
+    repo.upsert("ana", {"intereses": ["datos"]})
+    assert repo.get("ana") == {"intereses": ["datos"]}
+    repo.clear("ana")
+    assert repo.get("ana") == {}
+
+    assert writer.flush(timeout=5)
+    assert not (tmp_path / "ana.json").exists()
+
+
+def test_entity_upserts_deep_merge_and_coalesce_per_turn(tmp_path, monkeypatch):
+    writer = WriteBehindWriter(synchronous=True, fsync_policy="none")
+    monkeypatch.setattr(write_behind, "_writer", writer)
+    service = EntityMemoryService(FileEntityMemoryRepository(base_dir=tmp_path))
+
+    service.upsert("ana", {"perfil": {"intereses": ["datos"]}})
+    service.upsert("ana", {"perfil": {"nivel": "senior"}, "ciudad": "Lima"})
+    assert not (tmp_path / "ana.json").exists()
+    assert service.get("ana") == {
+        "perfil": {"intereses": ["datos"], "nivel": "senior"},
+        "ciudad": "Lima",
+    }
+
+    service.flush()
+    assert writer.stats()["writes"] == 1
+    stored = json.loads((tmp_path / "ana.json").read_text(encoding="utf-8"))
+    assert stored["ciudad"] == "Lima"
+    service.flush()
+    assert writer.stats()["writes"] == 1
+
+
+def test_concurrent_entity_upserts_do_not_lose_updates(tmp_path, monkeypatch):
+    monkeypatch.setattr(write_behind, "_writer", WriteBehindWriter(fsync_policy="none"))
+    service = EntityMemoryService(FileEntityMemoryRepository(base_dir=tmp_path))
+
+    def worker(n):
+        for i in range(50):
+            service.upsert("ana", {"respuestas": {f"{n}-{i}": i}})
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(service.get("ana")["respuestas"]) == 200
+
+
+def test_entity_profiles_follow_writes_of_other_workers(tmp_path, monkeypatch):
+    writer = WriteBehindWriter(synchronous=True, fsync_policy="none")
+    monkeypatch.setattr(write_behind, "_writer", writer)
+    # Two workers sharing the entities directory
+    first = EntityMemoryService(FileEntityMemoryRepository(base_dir=tmp_path))
+    second = EntityMemoryService(FileEntityMemoryRepository(base_dir=tmp_path))
+
+    first.upsert("ana", {"ciudad": "Lima"})
+    first.flush()
+    assert second.get("ana") == {"ciudad": "Lima"}
+
+    # Both change the profile in the same turn: the later flush merges
+    first.upsert("ana", {"nivel": "senior"})
+    second.upsert("ana", {"intereses": ["datos"]})
+    first.flush()
+    second.flush()
+
+    expected = {"ciudad": "Lima", "nivel": "senior", "intereses": ["datos"]}
+    assert json.loads((tmp_path / "ana.json").read_text(encoding="utf-8")) == expected
+    assert first.get("ana") == expected
+
+
+def test_entity_locks_are_evicted_with_their_profiles(tmp_path, monkeypatch):
+    monkeypatch.setattr(write_behind, "_writer", WriteBehindWriter(synchronous=True))
+    repo = FileEntityMemoryRepository(base_dir=tmp_path, max_cached=2)
+
+    for n in range(10):
+        repo.get(f"user{n}")
+
+    assert len(repo._user_locks) <= 2